@@ -14,16 +14,33 @@ Much faster and more efficient than individual INSERT statements
 
 import os
 import sys
-import pandas as pd
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 from pathlib import Path
 import json
 from datetime import datetime
 import argparse
 
+# Shared COPY engine lives with the src/dataload loader
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src' / 'dataload'))
+from copy_engine import CopyEngine, DEFAULT_CHUNK_ROWS, DEFAULT_COMMIT_CHUNKS
+from parallel_copy import DEFAULT_PARALLEL_COPY_MB, parallel_copy_file
+from load_graph import fetch_fk_dependencies, chain_dependencies, run_in_dependency_order
+from constraint_deferral import DEFAULT_REBUILD_WORKERS, ConstraintDeferral
+from load_metrics import DEFAULT_METRICS_FILE, LoadMetrics, format_phases
+from partitions import PartitionManager, parse_month
+from integrity import IntegrityChecker, format_result
+from summary_stats import TableSummary, format_count, format_range
+from incremental import new_run_id
+from columnar import copy_columnar_file, find_source_file, is_columnar
+from row_conversion import SchemaCoercer
+
 class FitnessCenterDBLoader:
     def __init__(self, host='localhost', port=5432, database='fitness_center_ods', 
-                 user='postgres', password='nopassword'):
+                 user='postgres', password='nopassword',
+                 chunk_rows=DEFAULT_CHUNK_ROWS, commit_chunks=DEFAULT_COMMIT_CHUNKS,
+                 copy_processes=1, parallel_copy_mb=DEFAULT_PARALLEL_COPY_MB,
+                 defer_constraints=False, period=None):
         self.connection_params = {
             'host': host,
             'port': port,
@@ -33,6 +50,17 @@ class FitnessCenterDBLoader:
         }
         self.connection = None
         self.cursor = None
+        self.copy_engine = None
+        self.chunk_rows = chunk_rows
+        self.commit_chunks = commit_chunks
+        self.copy_processes = copy_processes
+        self.parallel_copy_mb = parallel_copy_mb
+        self.defer_constraints = defer_constraints
+        self.period = period
+        self.cleared = False
+        self.loaded_counts = {}
+        self.table_info = {}
+        self.metrics = LoadMetrics(new_run_id(), 'db_loader')
         
         # Define table loading order (respects foreign key dependencies)
         self.table_order = [
@@ -63,6 +91,7 @@ class FitnessCenterDBLoader:
         try:
             self.connection = psycopg2.connect(**self.connection_params)
             self.cursor = self.connection.cursor()
+            self.copy_engine = CopyEngine(self.connection, self.chunk_rows, self.commit_chunks)
             print(f"Connected to PostgreSQL database: {self.connection_params['database']}")
             return True
         except psycopg2.Error as e:
@@ -96,6 +125,7 @@ class FitnessCenterDBLoader:
             self.cursor.execute("SET session_replication_role = DEFAULT;")
             
             self.connection.commit()
+            self.cleared = True
             print("SUCCESS: All tables cleared successfully")
             
         except psycopg2.Error as e:
@@ -104,130 +134,175 @@ class FitnessCenterDBLoader:
             raise
 
     def validate_csv_files(self, data_dir):
-        """Validate that all required CSV files exist"""
+        """Validate that every table has a CSV, Parquet or Arrow source file"""
         missing_files = []
         
-        for csv_file in self.csv_table_mapping.keys():
-            csv_path = Path(data_dir) / csv_file
-            if not csv_path.exists():
-                missing_files.append(csv_file)
+        for table_name in self.table_order:
+            if find_source_file(data_dir, table_name) is None:
+                missing_files.append(f"{table_name}.csv")
         
         if missing_files:
-            print(f"ERROR: Missing CSV files: {missing_files}")
+            print(f"ERROR: Missing source files: {missing_files}")
             return False
             
-        print("SUCCESS: All required CSV files found")
+        print("SUCCESS: All required source files found")
         return True
 
-    def get_table_info(self, table_name):
-        """Get column information for a table"""
+    def get_table_info(self, table_name, connection=None):
+        """
+        Get column names and types for a table, cached after the first lookup
+
+        Args:
+            table_name: Table name, optionally schema-qualified (default schema ods)
+            connection: Connection to query on (defaults to the loader's own)
+
+        Returns:
+            List of (column_name, data_type) tuples in column order
+        """
+        if table_name in self.table_info:
+            return self.table_info[table_name]
+        schema, _, name = table_name.rpartition('.')
+        connection = connection or self.connection
         try:
-            self.cursor.execute(f"""
-                SELECT column_name, data_type 
-                FROM information_schema.columns 
-                WHERE table_schema = 'ods' AND table_name = '{table_name}'
-                ORDER BY ordinal_position
-            """)
-            return self.cursor.fetchall()
+            with connection.cursor() as cursor:
+                cursor.execute("""
+                    SELECT column_name, data_type 
+                    FROM information_schema.columns 
+                    WHERE table_schema = %s AND table_name = %s
+                    ORDER BY ordinal_position
+                """, (schema or 'ods', name))
+                columns = cursor.fetchall()
         except psycopg2.Error as e:
             print(f"ERROR: Error getting table info for {table_name}: {e}")
+            connection.rollback()
             return []
+        self.table_info[table_name] = columns
+        return columns
 
-    def load_csv_to_table(self, csv_path, table_name):
-        """Load CSV file directly into PostgreSQL table using COPY command"""
+    def chunk_cleaner(self, table_name, connection=None):
+        """Picklable chunk transform coercing CSV columns to the table's column types"""
+        return SchemaCoercer(dict(self.get_table_info(table_name, connection)))
+
+    def load_csv_to_table(self, csv_path, table_name, engine=None):
+        """Stream a CSV (or Parquet/Arrow) file into PostgreSQL table using COPY FROM STDIN"""
+        engine = engine or self.copy_engine
         try:
-            # Read CSV to get column names
-            df = pd.read_csv(csv_path)
-            
-            print(f"INFO: Loading {csv_path.name} -> {table_name} ({len(df)} records)")
-            
-            # Create a temporary CSV for PostgreSQL COPY (handles data types properly)
-            temp_csv = csv_path.parent / f"temp_{csv_path.name}"
-            
-            # Clean data for PostgreSQL
-            df_clean = df.copy()
-            
-            # Handle NaN values - but preserve data types
-            
-            # Convert datetime columns to proper format if they exist
-            datetime_columns = ['last_modified', 'join_date', 'hire_date', 'purchase_date', 
-                              'warranty_expiry', 'date_of_birth', 'enrollment_date', 'class_date',
-                              'usage_date']
-            
-            for col in datetime_columns:
-                if col in df_clean.columns:
-                    df_clean[col] = pd.to_datetime(df_clean[col], errors='coerce')
-            
-            # Handle integer columns that might have become floats due to NaN handling
-            integer_columns = ['instructor_rating', 'member_satisfaction_score', 'intensity_level',
-                             'duration_minutes', 'late_arrival_minutes', 'early_departure_minutes',
-                             'max_participants', 'capacity', 'equipment_count', 'square_footage']
-            
-            for col in integer_columns:
-                if col in df_clean.columns:
-                    # Convert floats like 4.0 back to integers, use NULL marker for empty values
-                    df_clean[col] = df_clean[col].apply(lambda x: '\\N' if pd.isna(x) or x == '' else int(float(x)))
+            print(f"INFO: Loading {csv_path.name} -> {table_name}")
             
-            # Handle TIME columns - empty strings should be NULL
-            time_columns = ['start_time', 'end_time', 'actual_start_time', 'actual_end_time',
-                          'scheduled_start_time', 'scheduled_end_time', 'checkin_time', 'checkout_time']
-            
-            for col in time_columns:
-                if col in df_clean.columns:
-                    # Replace empty strings with NULL marker for time columns
-                    df_clean[col] = df_clean[col].apply(lambda x: '\\N' if pd.isna(x) or x == '' else x)
-            
-            # Handle remaining NaN values (but after time column processing)
-            df_clean = df_clean.fillna('')
-            
-            # Save cleaned CSV
-            df_clean.to_csv(temp_csv, index=False, na_rep='\\N')
-            
-            # Use COPY command for fast bulk insert
-            with open(temp_csv, 'r') as f:
-                self.cursor.copy_expert(
-                    f"COPY {table_name} FROM STDIN WITH CSV HEADER NULL '\\N'",
-                    f
-                )
-            
-            self.connection.commit()
+            partitions = PartitionManager(engine.connection)
+            clean_chunk = self.chunk_cleaner(table_name, engine.connection)
+            period_load = self.period is not None and partitions.partition_key(table_name) is not None
+            if period_load and is_columnar(csv_path):
+                raise ValueError("--period needs CSV input")
+            if period_load:
+                # Load the month into a standalone table and swap it in as a partition
+                stats = partitions.load_period(engine, table_name, csv_path, self.period,
+                                               transform=clean_chunk)
+                action = 'Replaced' if stats['replaced'] else 'Attached'
+                print(f"   INFO: {action} partition {stats['partition']} "
+                      f"({stats['rows']} of {stats['rows_read']} rows in {self.period})")
+            else:
+                created = partitions.ensure_for_file(table_name, csv_path, self.chunk_rows)
+                if created:
+                    print(f"   INFO: Created partitions for {', '.join(map(str, created))}")
+                
+                # Typed Parquet/Arrow columns need no cleaning: binary COPY
+                if is_columnar(csv_path):
+                    stats = copy_columnar_file(engine, table_name, csv_path)
+                # Clean and encode each chunk in memory - no temporary file
+                elif self.copy_processes > 1 and csv_path.stat().st_size >= self.parallel_copy_mb * 1024 * 1024:
+                    stats = parallel_copy_file(engine, self.connection_params, table_name, csv_path,
+                                               self.copy_processes, transform=clean_chunk)
+                else:
+                    stats = engine.copy_file(table_name, csv_path, transform=clean_chunk)
             
-            # Clean up temporary file
-            temp_csv.unlink()
+            peak_rss = f"{stats['peak_rss_mb']:.1f} MB" if stats['peak_rss_mb'] is not None else "n/a"
+            print(f"   INFO: Streamed {stats['rows']} records in {stats['seconds']:.2f}s "
+                  f"({stats['rows_per_sec']:,.0f} rows/s, peak RSS {peak_rss})")
+            print(f"   INFO: Phases: {format_phases(stats['phases'])}")
+            self.metrics.record(table_name, stats)
             
-            # Verify record count
-            self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            count = self.cursor.fetchone()[0]
+            # Row accounting from the COPY itself - no COUNT(*) scan of the table
+            count = stats['inserted']
+            self.loaded_counts[table_name] = count
             print(f"   SUCCESS: Loaded {count} records successfully")
             
             return count
             
         except Exception as e:
             print(f"   ERROR: Error loading {csv_path.name}: {e}")
-            self.connection.rollback()
+            engine.connection.rollback()
             raise
 
-    def load_all_data(self, data_dir):
-        """Load all CSV files in correct dependency order"""
-        data_path = Path(data_dir)
+    def table_dependencies(self, deferral=None):
+        """Foreign key dependencies between ODS tables, read from the catalog
+        and from the definitions a constraint deferral dropped"""
+        try:
+            dependencies = fetch_fk_dependencies(self.cursor, schema='ods')
+            self.connection.commit()
+        except psycopg2.Error as e:
+            print(f"WARNING: Could not read foreign keys from catalog: {e}")
+            self.connection.rollback()
+            dependencies = {}
         
-        if not self.validate_csv_files(data_path):
-            return False
+        if deferral is not None:
+            # Deferred foreign keys are gone from the catalog until restored
+            for table_name, parents in deferral.fk_dependencies().items():
+                dependencies.setdefault(table_name, set()).update(parents)
         
-        total_records = 0
-        loading_summary = []
+        if not dependencies:
+            # No catalog information - keep the configured serial order
+            print("WARNING: No foreign keys found, loading tables in configured order")
+            dependencies = chain_dependencies(self.table_order)
+        return dependencies
+
+    def load_tables_parallel(self, data_path, workers, deferral=None):
+        """Load tables concurrently over a connection pool, following the FK DAG"""
+        dependencies = self.table_dependencies(deferral)
+        pool = ThreadedConnectionPool(1, workers, **self.connection_params)
+        print(f"INFO: Loading {len(self.table_order)} tables with {workers} workers")
         
-        print(f"\nINFO: Loading data from: {data_path}")
-        print("=" * 60)
+        def load_table(table_name):
+            source_path = Path(find_source_file(data_path, table_name))
+            connection = pool.getconn()
+            try:
+                engine = CopyEngine(connection, self.chunk_rows, self.commit_chunks)
+                return self.load_csv_to_table(source_path, self.csv_table_mapping[f"{table_name}.csv"],
+                                              engine)
+            finally:
+                pool.putconn(connection)
         
+        try:
+            return run_in_dependency_order(self.table_order, dependencies, load_table, workers)
+        finally:
+            pool.closeall()
+
+    def load_tables(self, data_path, workers, loading_summary, deferral=None):
+        """Load every table, serially or in parallel; returns record counts or None on failure"""
+        if workers > 1:
+            try:
+                record_counts = self.load_tables_parallel(data_path, workers, deferral)
+            except Exception as e:
+                print(f"ERROR: Parallel load failed: {e}")
+                return None
+            
+            for table_name in self.table_order:
+                loading_summary.append({
+                    'table': self.csv_table_mapping[f"{table_name}.csv"],
+                    'records': record_counts[table_name],
+                    'status': 'SUCCESS'
+                })
+            return record_counts
+        
+        record_counts = {}
         for table_name in self.table_order:
             csv_file = f"{table_name}.csv"
-            csv_path = data_path / csv_file
+            csv_path = Path(find_source_file(data_path, table_name))
             full_table_name = self.csv_table_mapping[csv_file]
             
             try:
                 record_count = self.load_csv_to_table(csv_path, full_table_name)
-                total_records += record_count
+                record_counts[table_name] = record_count
                 loading_summary.append({
                     'table': full_table_name,
                     'records': record_count,
@@ -241,7 +316,52 @@ class FitnessCenterDBLoader:
                     'status': f'FAILED: {e}'
                 })
                 print(f"ERROR: Failed to load {table_name}: {e}")
+                return None
+        return record_counts
+
+    def restore_constraints(self, deferral=None):
+        """Rebuild deferred indexes and constraints (all pending ones by default)"""
+        deferral = deferral or ConstraintDeferral(self.connection, None, self.connection_params)
+        try:
+            result = deferral.restore()
+        except Exception as e:
+            print(f"ERROR: {e}")
+            return False
+        steps = ', '.join(f"{step} {seconds:.2f}s" for step, seconds in result['steps'].items())
+        print(f"INFO: Restored {result['restored']} indexes and constraints ({steps})")
+        return True
+
+    def load_all_data(self, data_dir, workers=1):
+        """Load all source files (CSV, Parquet or Arrow) in correct dependency order"""
+        data_path = Path(data_dir)
+        
+        if not self.validate_csv_files(data_path):
+            return False
+        
+        loading_summary = []
+        
+        print(f"\nINFO: Loading data from: {data_path}")
+        print("=" * 60)
+        
+        deferral = None
+        if self.defer_constraints:
+            deferral = ConstraintDeferral(self.connection, list(self.csv_table_mapping.values()),
+                                          self.connection_params, max(workers, DEFAULT_REBUILD_WORKERS))
+            try:
+                dropped = deferral.drop()
+            except psycopg2.Error as e:
+                print(f"ERROR: Could not defer indexes and constraints: {e}")
                 return False
+            print(f"INFO: Deferred {dropped} indexes and constraints until the load finishes")
+        
+        record_counts = self.load_tables(data_path, workers, loading_summary, deferral)
+        
+        # Definitions are restored whether or not the load succeeded
+        if deferral is not None and not self.restore_constraints(deferral):
+            return False
+        if record_counts is None:
+            return False
+        total_records = sum(record_counts.values())
         
         print("=" * 60)
         print(f"SUCCESS: Data loading completed! Total records loaded: {total_records:,}")
@@ -254,47 +374,32 @@ class FitnessCenterDBLoader:
         
         return True
 
+    def write_metrics(self, metrics_file=DEFAULT_METRICS_FILE, prometheus_file=None):
+        """Append per-table metrics as JSON lines and optionally export them for Prometheus"""
+        if not self.metrics.records:
+            return
+        self.metrics.write_jsonl(metrics_file)
+        print(f"INFO: Load metrics appended to {metrics_file}")
+        if prometheus_file:
+            self.metrics.write_prometheus(prometheus_file)
+            print(f"INFO: Prometheus metrics written to {prometheus_file}")
+
     def validate_data_integrity(self):
-        """Validate foreign key relationships and data quality"""
+        """Check every ODS foreign key for orphans, concurrently, plus data quality rules"""
         print("\nINFO: Validating data integrity...")
         
-        validation_queries = [
-            {
-                'name': 'Facility Areas → Facilities',
-                'query': """
-                    SELECT COUNT(*) FROM ods.facility_areas fa 
-                    LEFT JOIN ods.facilities f ON fa.facility_id = f.facility_id 
-                    WHERE f.facility_id IS NULL
-                """,
-                'expected': 0
-            },
-            {
-                'name': 'Equipment → Facilities',
-                'query': """
-                    SELECT COUNT(*) FROM ods.equipment e 
-                    LEFT JOIN ods.facilities f ON e.facility_id = f.facility_id 
-                    WHERE f.facility_id IS NULL
-                """,
-                'expected': 0
-            },
-            {
-                'name': 'Class Enrollments → Members',
-                'query': """
-                    SELECT COUNT(*) FROM ods.class_enrollments ce 
-                    LEFT JOIN ods.members m ON ce.member_id = m.member_id 
-                    WHERE m.member_id IS NULL
-                """,
-                'expected': 0
-            },
-            {
-                'name': 'Equipment Usage → Members',
-                'query': """
-                    SELECT COUNT(*) FROM ods.equipment_usage eu 
-                    LEFT JOIN ods.members m ON eu.member_id = m.member_id 
-                    WHERE m.member_id IS NULL
-                """,
-                'expected': 0
-            },
+        checker = IntegrityChecker(self.connection, self.connection_params, schema='ods')
+        results = checker.run()
+        all_passed = True
+        
+        for result in results:
+            if result.get('error') or result['violations']:
+                print(f"   ERROR: {format_result(result)}")
+                all_passed = False
+            else:
+                print(f"   SUCCESS: {format_result(result)}")
+        
+        quality_checks = [
             {
                 'name': 'Members with Valid Birth Dates',
                 'query': """
@@ -305,9 +410,7 @@ class FitnessCenterDBLoader:
             }
         ]
         
-        all_passed = True
-        
-        for validation in validation_queries:
+        for validation in quality_checks:
             try:
                 self.cursor.execute(validation['query'])
                 result = self.cursor.fetchone()[0]
@@ -320,45 +423,58 @@ class FitnessCenterDBLoader:
                     
             except psycopg2.Error as e:
                 print(f"   ERROR: {validation['name']}: ERROR - {e}")
+                self.connection.rollback()
                 all_passed = False
         
         return all_passed
 
-    def generate_summary_report(self):
-        """Generate data summary report"""
+    def generate_summary_report(self, exact_counts=False):
+        """
+        Generate data summary report without scanning the tables
+        
+        Tables reloaded after --clear are counted from the loader's own row
+        accounting, others from planner statistics (or COUNT(*) run in
+        parallel with ``exact_counts``). Date ranges come from indexes,
+        partition bounds or column statistics.
+        """
         print("\nINFO: Data Summary Report:")
         print("=" * 50)
         
-        summary_queries = [
-            ("Total Facilities", "SELECT COUNT(*) FROM ods.facilities"),
-            ("Total Members", "SELECT COUNT(*) FROM ods.members"),
-            ("Total Staff", "SELECT COUNT(*) FROM ods.staff"),
-            ("Total Equipment", "SELECT COUNT(*) FROM ods.equipment"),
-            ("Total Class Enrollments", "SELECT COUNT(*) FROM ods.class_enrollments"),
-            ("Total Equipment Usage", "SELECT COUNT(*) FROM ods.equipment_usage"),
-            ("Date Range (Enrollments)", """
-                SELECT MIN(class_date)::text || ' to ' || MAX(class_date)::text 
-                FROM ods.class_enrollments
-            """),
-            ("Date Range (Equipment Usage)", """
-                SELECT MIN(usage_date)::text || ' to ' || MAX(usage_date)::text 
-                FROM ods.equipment_usage
-            """)
+        count_rows = [
+            ("Total Facilities", 'ods.facilities'),
+            ("Total Members", 'ods.members'),
+            ("Total Staff", 'ods.staff'),
+            ("Total Equipment", 'ods.equipment'),
+            ("Total Class Enrollments", 'ods.class_enrollments'),
+            ("Total Equipment Usage", 'ods.equipment_usage')
+        ]
+        range_rows = [
+            ("Date Range (Enrollments)", ('ods.class_enrollments', 'class_date')),
+            ("Date Range (Equipment Usage)", ('ods.equipment_usage', 'usage_date'))
         ]
         
-        for description, query in summary_queries:
-            try:
-                self.cursor.execute(query)
-                result = self.cursor.fetchone()[0]
-                print(f"{description:<25}: {result}")
-            except psycopg2.Error as e:
-                print(f"{description:<25}: ERROR - {e}")
+        summary = TableSummary(self.connection, self.connection_params)
+        try:
+            loaded = self.loaded_counts if self.cleared else {}
+            counts = summary.row_counts([table for _, table in count_rows], loaded, exact_counts)
+            ranges = summary.date_ranges([column for _, column in range_rows])
+        except psycopg2.Error as e:
+            print(f"ERROR: Could not read table statistics: {e}")
+            self.connection.rollback()
+            return
+        
+        for description, table in count_rows:
+            print(f"{description:<25}: {format_count(*counts[table])}")
+        for description, column in range_rows:
+            print(f"{description:<25}: {format_range(*ranges[column])}")
+        if any(source == 'estimate' for _, source in counts.values()):
+            print("(~ planner statistics estimate)")
 
 
 def main():
     parser = argparse.ArgumentParser(description='Load fitness center CSV data into PostgreSQL')
     parser.add_argument('--data-dir', default='ods_sample_data', 
-                       help='Directory containing CSV files (default: ods_sample_data)')
+                       help='Directory containing CSV, Parquet or Arrow files (default: ods_sample_data)')
     parser.add_argument('--host', default='localhost', 
                        help='PostgreSQL host (default: localhost)')
     parser.add_argument('--port', type=int, default=5432,
@@ -373,8 +489,37 @@ def main():
                        help='Clear existing data before loading')
     parser.add_argument('--validate-only', action='store_true',
                        help='Only run data validation, do not load')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                       help=f'Rows read and loaded per chunk (default: {DEFAULT_CHUNK_ROWS})')
+    parser.add_argument('--commit-chunks', type=int, default=DEFAULT_COMMIT_CHUNKS,
+                       help='Commit after this many chunks (default: once per table)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Tables loaded in parallel over a connection pool (default: 1)')
+    parser.add_argument('--copy-processes', type=int, default=1,
+                       help='Processes used to COPY a single large CSV file (default: 1)')
+    parser.add_argument('--parallel-copy-mb', type=int, default=DEFAULT_PARALLEL_COPY_MB,
+                       help=f'Minimum file size for a parallel COPY (default: {DEFAULT_PARALLEL_COPY_MB} MB)')
+    parser.add_argument('--defer-constraints', action='store_true',
+                       help='With --clear: drop indexes and constraints during the load, '
+                            'then rebuild indexes in parallel and validate constraints')
+    parser.add_argument('--restore-constraints', action='store_true',
+                       help='Only rebuild indexes and constraints left over by a failed deferred load')
+    parser.add_argument('--period', type=parse_month, metavar='YYYY-MM',
+                       help='Reload one month of partitioned tables by attaching a freshly '
+                            'loaded partition; other tables are loaded as usual')
+    parser.add_argument('--exact-counts', action='store_true',
+                       help='COUNT(*) tables not reloaded by this run in the summary report '
+                            '(default: statistics estimates)')
+    parser.add_argument('--metrics-file', default=DEFAULT_METRICS_FILE,
+                       help=f'JSON-lines file per-table load metrics are appended to (default: {DEFAULT_METRICS_FILE})')
+    parser.add_argument('--prometheus-file',
+                       help='Also write metrics to this Prometheus textfile-collector file (*.prom)')
     
     args = parser.parse_args()
+    if args.defer_constraints and not args.clear:
+        parser.error("--defer-constraints is only supported together with --clear")
+    if args.period and args.clear:
+        parser.error("--period cannot be combined with --clear")
     
     # Prompt for password if not provided
     if not args.password:
@@ -387,7 +532,13 @@ def main():
         port=args.port,
         database=args.database,
         user=args.user,
-        password=args.password
+        password=args.password,
+        chunk_rows=args.chunk_rows,
+        commit_chunks=args.commit_chunks,
+        copy_processes=args.copy_processes,
+        parallel_copy_mb=args.parallel_copy_mb,
+        defer_constraints=args.defer_constraints,
+        period=args.period
     )
     
     # Connect to database
@@ -398,14 +549,22 @@ def main():
         if args.validate_only:
             # Just validate existing data
             loader.validate_data_integrity()
-            loader.generate_summary_report()
+            loader.generate_summary_report(args.exact_counts)
+        elif args.restore_constraints:
+            if not loader.restore_constraints():
+                sys.exit(1)
         else:
             # Clear data if requested
             if args.clear:
                 loader.clear_tables()
             
             # Load data
-            if loader.load_all_data(args.data_dir):
+            try:
+                loaded = loader.load_all_data(args.data_dir, args.workers)
+            finally:
+                loader.write_metrics(args.metrics_file, args.prometheus_file)
+            
+            if loaded:
                 # Validate loaded data
                 if loader.validate_data_integrity():
                     print("\nSUCCESS: All data validation checks passed!")
@@ -413,7 +572,7 @@ def main():
                     print("\nWARNING: Some data validation checks failed. Please review.")
                 
                 # Generate summary report
-                loader.generate_summary_report()
+                loader.generate_summary_report(args.exact_counts)
             else:
                 print("\nERROR: Data loading failed!")
                 sys.exit(1)
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Asynchronous Pipelined Loader Backend
+
+asyncio variant of ``database_loader.py`` with the same command line. Table
+data is COPYed over an asyncpg connection pool; independent tables load
+concurrently as asyncio tasks following the FK DAG.
+
+Within a table the load is a two-stage pipeline: a producer thread parses
+and encodes chunk N+1 while the event loop streams chunk N into
+``COPY ... FROM STDIN``. The stages are joined by a bounded queue, so a
+slow database stalls the producer instead of letting encoded chunks pile
+up in memory (at most ``pipeline_depth`` chunks are buffered per table).
+
+Rows go through a temporary staging table per connection and are merged with
+``ON CONFLICT DO NOTHING`` once per commit batch, in the same transaction
+as the batch's load journal checkpoint, exactly as on the synchronous path.
+Control work - truncation, partitions, journal setup, deferred constraints,
+integrity checks and the summary report - stays on the loader's psycopg2
+connection. Incremental, changed-only, quarantine, period and multi-process
+COPY loads, loads maintaining the summary tables, and Parquet/Arrow inputs
+(already binary COPY), are not pipelined and run on the synchronous path.
+
+Requires the asyncpg driver (``pip install asyncpg``).
+
+Author: Fitness Center Analytics Team
+"""
+
+import io
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+from copy_engine import CopyEngine, NULL_MARKER, encode_csv_chunk, peak_rss_mb
+from database_loader import FitnessCenterDatabaseLoader, logger, main as loader_main
+from load_graph import run_in_dependency_order_async
+from load_journal import JOURNAL_TABLE, file_checksum
+from load_metrics import PhaseTimer
+from partitions import PartitionManager
+from columnar import is_columnar
+
+# Encoded chunks buffered between the producer thread and COPY, per table
+DEFAULT_PIPELINE_DEPTH = 4
+
+# Errors after which a pooled connection is replaced and the table continued
+CONNECTION_ERRORS = (OSError,) + ((asyncpg.InterfaceError, asyncpg.PostgresConnectionError)
+                                  if asyncpg is not None else ())
+
+
+def produce_chunks(csv_path, columns, start_offset, chunk_rows, queue, loop, stop, timer):
+    """
+    Producer thread: parse and encode a CSV file into ``queue``
+
+    Puts one (source rows, COPY bytes) item per chunk, then None. An error is
+    put on the queue instead of being raised. ``queue.put`` blocks while the
+    queue is full, which is what applies backpressure.
+
+    Args:
+        csv_path: Source CSV file with a header row
+        columns: Its column names
+        start_offset: Byte offset of the first data line (0 = after the header)
+        chunk_rows: Rows per chunk
+        queue: Bounded asyncio.Queue owned by ``loop``
+        loop: Event loop running the consumer
+        stop: threading.Event set by the consumer when it gives up
+        timer: PhaseTimer charged with parse and encode
+    """
+    def put(item):
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    try:
+        with open(csv_path, 'rb') as source:
+            source.seek(start_offset)
+            text = io.TextIOWrapper(source, encoding='utf-8')
+            if start_offset:
+                reader = pd.read_csv(text, header=None, names=columns, chunksize=chunk_rows)
+            else:
+                reader = pd.read_csv(text, chunksize=chunk_rows)
+            for chunk in timer.timed(reader, 'parse'):
+                if stop.is_set():
+                    return
+                with timer.phase('encode'):
+                    data = encode_csv_chunk(chunk).encode('utf-8')
+                put((len(chunk), data))
+        put(None)
+    except Exception as e:
+        if not stop.is_set():
+            put(e)
+
+
+class AsyncFitnessCenterLoader(FitnessCenterDatabaseLoader):
+    """Loads generated data into PostgreSQL with pipelined COPY over an asyncpg pool"""
+
+    def __init__(self, *args, pipeline_depth=DEFAULT_PIPELINE_DEPTH, **kwargs):
+        """
+        Initialize the asynchronous loader
+
+        Args:
+            *args, **kwargs: As for FitnessCenterDatabaseLoader
+            pipeline_depth: Encoded chunks buffered ahead of COPY per table
+        """
+        super().__init__(*args, **kwargs)
+        self.pipeline_depth = max(1, pipeline_depth)
+        self.producers = None
+
+    def load_tables(self, csv_files, workers):
+        """Load tables with pipelined COPY, or synchronously for modes it does not cover"""
+        if (self.incremental or self.changed_only or self.quarantine or
+                self.period is not None or self.copy_processes > 1 or self.aggregates or
+                any(is_columnar(path) for path in csv_files.values())):
+            logger.info("Load mode is not pipelined; using the synchronous load path")
+            return super().load_tables(csv_files, workers)
+        if asyncpg is None:
+            raise RuntimeError("The async loader requires asyncpg: pip install asyncpg")
+        return asyncio.run(self.load_tables_async(csv_files, workers))
+
+    async def load_tables_async(self, csv_files, workers):
+        """Load tables as asyncio tasks over a connection pool, following the FK DAG"""
+        dependencies = self.table_dependencies()
+        workers = max(1, workers)
+        pool = await asyncpg.create_pool(self.database_url, min_size=1, max_size=workers)
+        # Serializes use of the synchronous control connection between tasks
+        control = asyncio.Lock()
+        # Producer threads block on full queues, so they get threads of their own
+        self.producers = ThreadPoolExecutor(max_workers=workers)
+        logger.info(f"Loading {len(csv_files)} tables with {workers} async workers, "
+                    f"pipeline depth {self.pipeline_depth}")
+
+        async def load_table(table_name):
+            return await self.load_table_async(pool, control, table_name, csv_files[table_name])
+
+        try:
+            return await run_in_dependency_order_async(list(csv_files), dependencies,
+                                                       load_table, workers)
+        finally:
+            await pool.close()
+            self.producers.shutdown()
+
+    async def load_table_async(self, pool, control, table_name, csv_file):
+        """
+        Load one CSV file, logging the outcome; returns records loaded
+
+        A dropped connection is replaced from the pool and the table continued
+        from its last journaled commit, up to ``reconnect_retries`` times.
+        """
+        resume = self.resume
+        try:
+            for attempt in range(self.reconnect_retries + 1):
+                try:
+                    async with pool.acquire() as connection:
+                        stats = await self.copy_table_async(connection, control, table_name,
+                                                            csv_file, resume)
+                    break
+                except CONNECTION_ERRORS as e:
+                    if attempt == self.reconnect_retries:
+                        raise
+                    logger.warning(f"{table_name}: connection lost ({str(e).strip()}), "
+                                   f"reconnecting to continue from the last commit")
+                    resume = True
+        except Exception as e:
+            logger.error(f"Error loading {table_name}: {e}")
+            raise
+
+        self.record_table_stats(table_name, stats)
+        if stats['rows'] == 0:
+            logger.warning(f"No data in {csv_file}")
+        else:
+            logger.info(f"Loaded {stats['rows']:,} records into {table_name}")
+        return stats['rows']
+
+    async def copy_table_async(self, connection, control, table_name, csv_file, resume):
+        """Prepare partitions and the journal, then pipeline the file into the table"""
+        checksum = await asyncio.to_thread(file_checksum, csv_file)
+        async with control:
+            checkpoint = await asyncio.to_thread(self.prepare_table, table_name, csv_file,
+                                                 resume, checksum)
+
+        stats = await self.copy_file_async(connection, table_name, csv_file, checkpoint)
+
+        async with control:
+            await asyncio.to_thread(self.complete_table, checkpoint)
+        return stats
+
+    def prepare_table(self, table_name, csv_file, resume, checksum):
+        """Create the partitions a file needs and journal the table's start (control connection)"""
+        created = PartitionManager(self.connection).ensure_for_file(table_name, csv_file, self.chunk_rows)
+        if created:
+            logger.info(f"{table_name}: created partitions for {', '.join(map(str, created))}")
+        return self.start_journal(self.connection, table_name, csv_file, resume, checksum)
+
+    def complete_table(self, checkpoint):
+        """Mark a table complete in the journal (control connection)"""
+        checkpoint.journal.complete(checkpoint.table_name)
+        self.connection.commit()
+
+    async def copy_file_async(self, connection, table_name, csv_file, checkpoint):
+        """
+        Stream a CSV file into a table, overlapping parse/encode with COPY
+
+        A transaction is committed after every ``commit_chunks`` chunks (or
+        once at the end); each one COPYs its chunks into the staging table,
+        merges them and advances the table's journal row.
+
+        Returns:
+            Dict with the same keys as CopyEngine.copy_file; the parse/encode
+            and copy/merge/commit phases overlap, so they can add up to more
+            than ``seconds``
+        """
+        start = time.perf_counter()
+        producer_timer = PhaseTimer()
+        timer = PhaseTimer()
+        columns = list(pd.read_csv(csv_file, nrows=0).columns)
+        column_list = ', '.join(columns)
+        staging_table = CopyEngine.staging_table_name(table_name)
+        # Emptied by every batch's commit, as on the synchronous path
+        await connection.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging_table} "
+                                 f"(LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS")
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.pipeline_depth)
+        stop = threading.Event()
+        start_offset = checkpoint.start_offset
+        producer = loop.run_in_executor(self.producers, produce_chunks, csv_file, columns,
+                                        start_offset, self.chunk_rows, queue, loop,
+                                        stop, producer_timer)
+
+        async def next_item():
+            item = await queue.get()
+            if isinstance(item, Exception):
+                raise item
+            return item
+
+        stats = {'rows': 0, 'inserted': 0, 'chunks': 0, 'bytes': 0, 'commits': 0}
+        read = {'rows': 0, 'chunks': 0}
+        try:
+            pending = await next_item()
+            while pending is not None:
+                batch_chunks = 0
+
+                async def batch():
+                    nonlocal pending, batch_chunks
+                    while pending is not None:
+                        rows, data = pending
+                        read['rows'] += rows
+                        read['chunks'] += 1
+                        stats['bytes'] += len(data)
+                        batch_chunks += 1
+                        yield data
+                        pending = await next_item()
+                        if self.commit_chunks and batch_chunks >= self.commit_chunks:
+                            return
+
+                transaction = connection.transaction()
+                await transaction.start()
+                try:
+                    with timer.phase('copy'):
+                        await connection.copy_to_table(staging_table, source=batch(), columns=columns,
+                                                       format='csv', null=NULL_MARKER)
+                    with timer.phase('merge'):
+                        status = await connection.execute(f"""
+                            INSERT INTO {table_name} ({column_list})
+                            SELECT {column_list} FROM {staging_table}
+                            ON CONFLICT DO NOTHING
+                        """)
+                        await connection.execute(f"TRUNCATE TABLE {staging_table}")
+                    # Locating the byte offset reads the source file; keep it off the loop
+                    progress = await asyncio.to_thread(checkpoint.advance, read['rows'], read['chunks'])
+                    await connection.execute(f"""
+                        UPDATE {JOURNAL_TABLE}
+                        SET chunks_committed = $1, rows_committed = $2, byte_offset = $3,
+                            updated_at = CURRENT_TIMESTAMP
+                        WHERE run_id = $4 AND table_name = $5
+                    """, *progress, self.run_id, table_name)
+                    with timer.phase('commit'):
+                        await transaction.commit()
+                except BaseException:
+                    if not connection.is_closed():
+                        await transaction.rollback()
+                    raise
+
+                stats['rows'] = read['rows']
+                stats['inserted'] += int(status.split()[-1])
+                stats['chunks'] += batch_chunks
+                stats['commits'] += 1
+        finally:
+            # Unblock and retire the producer if COPY stopped early
+            stop.set()
+            while not producer.done():
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.wait([producer], timeout=0.1)
+
+        timer.merge(producer_timer.seconds)
+        stats['seconds'] = time.perf_counter() - start
+        stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+        stats['peak_rss_mb'] = peak_rss_mb()
+        stats['phases'] = timer.summary()
+        return stats
+
+
+def main():
+    """Main execution function"""
+    loader_main(AsyncFitnessCenterLoader)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Row Conversion Microbenchmark
+
+Compares the original per-cell ``df.iterrows()`` conversion used by
+``FitnessCenterDatabaseLoader.load_table_data`` with the column-wise
+conversion in ``row_conversion``. Each CSV in the data directory is scaled
+up by repeating its rows, both paths are timed, and their output is checked
+for equality. No database connection is needed.
+
+Usage:
+    python benchmark_row_conversion.py --data-dir generated_data_complete --scale 100
+
+Author: Fitness Center Analytics Team
+"""
+
+import os
+import sys
+import time
+import argparse
+import pandas as pd
+from datetime import datetime
+
+from row_conversion import dataframe_to_rows
+
+
+def legacy_dataframe_to_rows(df):
+    """Original per-cell conversion from load_table_data"""
+    data_tuples = []
+    for _, row in df.iterrows():
+        row_data = []
+        for value in row:
+            if pd.isna(value):
+                row_data.append(None)
+            elif isinstance(value, (pd.Timestamp, datetime)):
+                row_data.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+            else:
+                row_data.append(value)
+        data_tuples.append(tuple(row_data))
+    return data_tuples
+
+
+def time_call(func, df):
+    """Run func(df) and return (result, elapsed seconds)"""
+    start = time.perf_counter()
+    result = func(df)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Benchmark DataFrame to row conversion')
+    parser.add_argument('--data-dir', default='generated_data_complete',
+                       help='Directory containing CSV files')
+    parser.add_argument('--scale', type=int, default=100,
+                       help='Number of times each CSV is repeated (default: 100)')
+    parser.add_argument('--tables', nargs='*',
+                       help='Only benchmark these tables (default: all CSVs)')
+    parser.add_argument('--skip-legacy', action='store_true',
+                       help='Only time the column-wise conversion')
+
+    args = parser.parse_args()
+
+    csv_files = sorted(f for f in os.listdir(args.data_dir) if f.endswith('.csv'))
+    if args.tables:
+        csv_files = [f for f in csv_files if f[:-4] in args.tables]
+
+    if not csv_files:
+        print(f"ERROR: No CSV files found in {args.data_dir}")
+        sys.exit(1)
+
+    print(f"Scale factor: {args.scale}x")
+    print(f"{'Table':25} {'Rows':>10} {'Legacy (s)':>12} {'Columnar (s)':>13} {'Speedup':>8}")
+    print("-" * 72)
+
+    total_legacy = 0.0
+    total_columnar = 0.0
+
+    for csv_file in csv_files:
+        table_name = csv_file[:-4]
+        base = pd.read_csv(os.path.join(args.data_dir, csv_file))
+        df = pd.concat([base] * args.scale, ignore_index=True)
+
+        rows, columnar_seconds = time_call(dataframe_to_rows, df)
+        total_columnar += columnar_seconds
+
+        if args.skip_legacy:
+            print(f"{table_name:25} {len(df):>10,} {'-':>12} {columnar_seconds:>13.3f} {'-':>8}")
+            continue
+
+        legacy_rows, legacy_seconds = time_call(legacy_dataframe_to_rows, df)
+        total_legacy += legacy_seconds
+
+        if rows != legacy_rows:
+            print(f"ERROR: Row mismatch for {table_name}")
+            sys.exit(1)
+
+        speedup = legacy_seconds / columnar_seconds if columnar_seconds else float('inf')
+        print(f"{table_name:25} {len(df):>10,} {legacy_seconds:>12.3f} "
+              f"{columnar_seconds:>13.3f} {speedup:>7.1f}x")
+
+    print("-" * 72)
+    if args.skip_legacy:
+        print(f"{'TOTAL':25} {'':>10} {'-':>12} {total_columnar:>13.3f}")
+    else:
+        speedup = total_legacy / total_columnar if total_columnar else float('inf')
+        print(f"{'TOTAL':25} {'':>10} {total_legacy:>12.3f} {total_columnar:>13.3f} {speedup:>7.1f}x")
+        print("SUCCESS: Column-wise conversion produced identical rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Columnar (Parquet / Arrow IPC) Input
+
+Loads ``<table>.parquet`` and ``<table>.arrow`` / ``.feather`` / ``.ipc``
+extracts with PostgreSQL binary COPY. Arrow record batches are encoded into
+COPY tuples directly from their column buffers with vectorized numpy
+scatters - no text parsing, type inference or pandas object columns.
+
+Each column is sent in the binary wire format of its target column when the
+Arrow type maps onto it (integers, floats, booleans, dates, timestamps and
+text). Any other combination - e.g. a decimal into NUMERIC, or a string into
+a DATE - is sent as text into a ``text`` column of a temporary staging table
+and cast by the ``INSERT ... SELECT`` that merges the batch.
+
+Requires pyarrow (``pip install pyarrow``).
+
+Author: Fitness Center Analytics Team
+"""
+
+import os
+import time
+import struct
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from copy_engine import ChunkedCopyStream, commit_batches, peak_rss_mb
+from load_metrics import PhaseTimer
+
+# Source file extensions in lookup order; the first one found is loaded
+SOURCE_EXTENSIONS = ('.parquet', '.arrow', '.feather', '.ipc', '.csv')
+
+# Extensions read with pyarrow
+PARQUET_EXTENSIONS = ('.parquet',)
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+# Binary COPY framing: signature, flags and header extension length, then
+# the end-of-data marker
+PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+PGCOPY_TRAILER = struct.pack('>h', -1)
+
+# PostgreSQL dates and timestamps count from 2000-01-01
+PG_EPOCH_DAYS = 10957
+PG_EPOCH_MICROS = PG_EPOCH_DAYS * 86400 * 1000000
+
+# Fixed-width binary wire types and their big-endian numpy dtypes
+FIXED_WIRE_TYPES = {
+    'int2': '>i2', 'int4': '>i4', 'int8': '>i8',
+    'float4': '>f4', 'float8': '>f8', 'bool': 'u1',
+    'date': '>i4', 'timestamp': '>i8', 'timestamptz': '>i8',
+}
+
+# PostgreSQL types whose binary form is the UTF-8 text itself
+TEXT_WIRE_TYPES = ('text', 'varchar', 'bpchar', 'name')
+
+
+def is_columnar(path):
+    """True if ``path`` is a Parquet or Arrow IPC file"""
+    return os.path.splitext(str(path))[1].lower() in PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+
+
+def find_source_file(data_dir, table_name):
+    """Path of the first ``<table>.<ext>`` in SOURCE_EXTENSIONS order, or None"""
+    for extension in SOURCE_EXTENSIONS:
+        path = os.path.join(str(data_dir), f"{table_name}{extension}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Parquet/Arrow input requires pyarrow: pip install pyarrow")
+
+
+def source_schema(path):
+    """Arrow schema of a Parquet or Arrow IPC file, read from its metadata"""
+    _require_pyarrow()
+    if str(path).lower().endswith(PARQUET_EXTENSIONS):
+        return pq.read_schema(path)
+    with pa.memory_map(str(path)) as source:
+        try:
+            return pa.ipc.open_file(source).schema
+        except pa.ArrowInvalid:
+            source.seek(0)
+            return pa.ipc.open_stream(source).schema
+
+
+def read_batches(path, batch_rows, columns=None, skip_rows=0):
+    """
+    Iterate over a Parquet or Arrow IPC file in record batches
+
+    Arrow IPC files are memory-mapped and sliced without copying. Parquet
+    row groups lying entirely within ``skip_rows`` are not read at all.
+
+    Args:
+        path: Source file
+        batch_rows: Maximum rows per batch
+        columns: Columns to read (default: all)
+        skip_rows: Leading rows to leave out (e.g. already loaded)
+    """
+    _require_pyarrow()
+    if str(path).lower().endswith(PARQUET_EXTENSIONS):
+        parquet = pq.ParquetFile(path)
+        row_groups = []
+        for index in range(parquet.num_row_groups):
+            group_rows = parquet.metadata.row_group(index).num_rows
+            if not row_groups and skip_rows >= group_rows:
+                skip_rows -= group_rows
+                continue
+            row_groups.append(index)
+        if not row_groups:
+            return
+        batches = parquet.iter_batches(batch_size=batch_rows, row_groups=row_groups, columns=columns)
+        yield from _skip(batches, skip_rows)
+        return
+
+    with pa.memory_map(str(path)) as source:
+        try:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            source.seek(0)
+            batches = pa.ipc.open_stream(source)
+        for batch in _skip(batches, skip_rows):
+            if columns is not None:
+                batch = batch.select(columns)
+            for offset in range(0, batch.num_rows, batch_rows):
+                yield batch.slice(offset, batch_rows)
+
+
+def _skip(batches, rows):
+    """Drop the first ``rows`` rows of a batch iterator"""
+    for batch in batches:
+        if rows >= batch.num_rows:
+            rows -= batch.num_rows
+            continue
+        if rows:
+            batch = batch.slice(rows)
+            rows = 0
+        yield batch
+
+
+def read_column(path, column, batch_rows):
+    """Iterate over one column as pandas Series (dates and timestamps as datetime64)"""
+    for batch in read_batches(path, batch_rows, columns=[column]):
+        values = batch.column(0)
+        if pa.types.is_date(values.type) or pa.types.is_timestamp(values.type):
+            values = pc.cast(values, pa.timestamp('us'), safe=False)
+        yield values.to_pandas()
+
+
+def column_types(cursor, table_name):
+    """{column: (type name, formatted type)} of a table from the catalog"""
+    cursor.execute("""
+        SELECT a.attname, t.typname, format_type(a.atttypid, a.atttypmod)
+        FROM pg_attribute a
+        JOIN pg_type t ON t.oid = a.atttypid
+        WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+    """, (table_name,))
+    return {name: (type_name, formatted) for name, type_name, formatted in cursor.fetchall()}
+
+
+def wire_type(arrow_type, type_name):
+    """
+    Binary wire type used to send an Arrow column into a PostgreSQL column
+
+    Returns:
+        A FIXED_WIRE_TYPES key, or 'text' for UTF-8 text (cast by the merge
+        unless the target is itself a text type)
+    """
+    types = pa.types
+    if type_name in ('int2', 'int4', 'int8') and (types.is_integer(arrow_type) or
+                                                   types.is_floating(arrow_type)):
+        return type_name
+    if type_name in ('float4', 'float8') and (types.is_integer(arrow_type) or
+                                               types.is_floating(arrow_type)):
+        return type_name
+    if type_name == 'bool' and types.is_boolean(arrow_type):
+        return type_name
+    if type_name == 'date' and types.is_date(arrow_type):
+        return type_name
+    if type_name == 'timestamp' and (types.is_date(arrow_type) or
+                                     (types.is_timestamp(arrow_type) and arrow_type.tz is None)):
+        return type_name
+    if type_name == 'timestamptz' and types.is_timestamp(arrow_type) and arrow_type.tz is not None:
+        return type_name
+    return 'text'
+
+
+def _fixed_values(array, wire):
+    """Column values as a big-endian numpy array of the wire type (nulls as 0)"""
+    if wire == 'date':
+        values = pc.cast(pc.cast(array, pa.date32()), pa.int32())
+    elif wire in ('timestamp', 'timestamptz'):
+        values = pc.cast(pc.cast(array, pa.timestamp('us', getattr(array.type, 'tz', None)), safe=False),
+                         pa.int64())
+    elif wire == 'bool':
+        values = array
+    else:
+        storage = {'int2': pa.int16(), 'int4': pa.int32(), 'int8': pa.int64(),
+                   'float4': pa.float32(), 'float8': pa.float64()}[wire]
+        values = pc.cast(array, storage)
+
+    values = values.fill_null(False if wire == 'bool' else 0).to_numpy(zero_copy_only=False)
+    if wire == 'date':
+        values = values.astype(np.int64) - PG_EPOCH_DAYS
+    elif wire in ('timestamp', 'timestamptz'):
+        values = values - PG_EPOCH_MICROS
+    return np.ascontiguousarray(values.astype(FIXED_WIRE_TYPES[wire]))
+
+
+def _scatter(out, positions, values):
+    """Write fixed-width values (already in wire byte order) at byte positions of ``out``"""
+    width = values.dtype.itemsize
+    out[positions[:, None] + np.arange(width)] = values.view(np.uint8).reshape(-1, width)
+
+
+def encode_binary_batch(batch, wires):
+    """
+    Encode a record batch as binary COPY tuples (without header or trailer)
+
+    Args:
+        batch: pyarrow RecordBatch whose columns are in COPY column order
+        wires: Wire type of every column, as returned by wire_type()
+
+    Returns:
+        bytes holding one tuple per row
+    """
+    rows = batch.num_rows
+    if rows == 0:
+        return b''
+
+    fields = []
+    for array, wire in zip(batch.columns, wires):
+        nulls = array.is_null().to_numpy(zero_copy_only=False)
+        if wire == 'text':
+            array = pc.cast(array, pa.large_string())
+            buffers = array.buffers()
+            offsets = np.frombuffer(buffers[1], dtype=np.int64)[array.offset:array.offset + rows + 1]
+            data = (np.frombuffer(buffers[2], dtype=np.uint8) if buffers[2] is not None
+                    else np.empty(0, dtype=np.uint8))
+            lengths = np.where(nulls, -1, np.diff(offsets))
+            fields.append((lengths, None, offsets[:-1], data))
+        else:
+            values = _fixed_values(array, wire)
+            lengths = np.where(nulls, -1, values.dtype.itemsize)
+            fields.append((lengths, values, None, None))
+
+    sizes = np.full(rows, 2, dtype=np.int64)
+    for lengths, _, _, _ in fields:
+        sizes += 4 + np.maximum(lengths, 0)
+    starts = np.zeros(rows, dtype=np.int64)
+    np.cumsum(sizes[:-1], out=starts[1:])
+
+    out = np.empty(int(sizes.sum()), dtype=np.uint8)
+    _scatter(out, starts, np.full(rows, len(fields), dtype='>i2'))
+    positions = starts + 2
+    for lengths, values, offsets, data in fields:
+        _scatter(out, positions, lengths.astype('>i4'))
+        positions += 4
+        present = lengths > 0
+        if values is not None:
+            _scatter(out, positions[present], values[present])
+        else:
+            # Copy every string's bytes to its slot with one gather/scatter
+            sizes_present = lengths[present]
+            total = int(sizes_present.sum())
+            if total:
+                sources = offsets[present]
+                first = np.cumsum(sizes_present) - sizes_present
+                source_index = np.repeat(sources - first, sizes_present) + np.arange(total)
+                shift = np.repeat(positions[present] - sources, sizes_present)
+                out[source_index + shift] = data[source_index]
+        positions += np.maximum(lengths, 0)
+    return out.tobytes()
+
+
+class ColumnarSource:
+    """Plan for binary COPY of one Parquet/Arrow file into one table"""
+
+    def __init__(self, cursor, table_name, path):
+        """
+        Args:
+            cursor: Cursor used to read the target's column types
+            table_name: Target table
+            path: Parquet or Arrow IPC file whose column names match table columns
+        """
+        schema = source_schema(path)
+        targets = column_types(cursor, table_name)
+        missing = [name for name in schema.names if name not in targets]
+        if missing:
+            raise ValueError(f"{path}: columns not in {table_name}: {', '.join(missing)}")
+
+        self.path = path
+        self.table_name = table_name
+        self.columns = list(schema.names)
+        self.wires = [wire_type(schema.field(name).type, targets[name][0]) for name in self.columns]
+        self.casts = [wire == 'text' and targets[name][0] not in TEXT_WIRE_TYPES
+                      for name, wire in zip(self.columns, self.wires)]
+        self.staging_table = f"{table_name.replace('.', '_')}__staging_columnar"
+        self.staging_columns = [f"{name} {'text' if cast else targets[name][1]}"
+                                for name, cast in zip(self.columns, self.casts)]
+        # SELECT list of the merge, casting text columns to their target types
+        self.expressions = [f"{name}::{targets[name][1]}" if cast else name
+                            for name, cast in zip(self.columns, self.casts)]
+
+    @property
+    def direct(self):
+        """True if every column can be COPYed straight into the target"""
+        return not any(self.casts)
+
+    def prepare_staging(self, cursor):
+        """(Re)create the session's staging table with the wire column types"""
+        cursor.execute(f"DROP TABLE IF EXISTS pg_temp.{self.staging_table}")
+        cursor.execute(f"CREATE TEMP TABLE {self.staging_table} ({', '.join(self.staging_columns)}) "
+                       f"ON COMMIT DELETE ROWS")
+
+    def batches(self, batch_rows, skip_rows=0):
+        """Record batches of the file, in column order"""
+        return read_batches(self.path, batch_rows, columns=self.columns, skip_rows=skip_rows)
+
+    def encode(self, batch):
+        """Binary COPY tuples of one record batch"""
+        return encode_binary_batch(batch, self.wires)
+
+
+def copy_columnar_file(engine, table_name, path, on_conflict=None, checkpoint=None, skip_rows=0):
+    """
+    Load a Parquet or Arrow IPC file with binary COPY in bounded batches
+
+    Commits follow the engine's ``commit_chunks`` like CopyEngine.copy_file.
+    Batches are COPYed straight into the table when no column needs a cast
+    and ``on_conflict`` is None; otherwise through the columnar staging table
+    and ``merge_staging``.
+
+    Args:
+        engine: CopyEngine whose connection, chunk size and timer are used
+        table_name: Target table
+        path: Source file
+        on_conflict: None, 'nothing' or 'update', as for CopyEngine.copy_file
+        checkpoint: Optional ``checkpoint(rows_read, chunks_read)`` called
+                    before each commit, as for CopyEngine.copy_file
+        skip_rows: Leading source rows to leave out (already loaded)
+
+    Returns:
+        Dict with the same keys as CopyEngine.copy_file
+    """
+    start = time.perf_counter()
+    engine.timer = PhaseTimer()
+    with engine.connection.cursor() as cursor:
+        source = ColumnarSource(cursor, table_name, path)
+        direct = source.direct and on_conflict is None and table_name not in engine.merge_hooks
+        if not direct:
+            source.prepare_staging(cursor)
+    engine.commit()
+
+    read = {'rows': 0, 'chunks': 0}
+
+    def counted(batches):
+        for batch in batches:
+            read['rows'] += batch.num_rows
+            read['chunks'] += 1
+            yield batch
+
+    batches = engine.timer.timed(counted(source.batches(engine.chunk_rows, skip_rows)), 'parse')
+    column_list = ', '.join(source.columns)
+    target = table_name if direct else source.staging_table
+
+    stats = {'rows': 0, 'inserted': 0, 'chunks': 0, 'bytes': 0, 'commits': 0}
+    for batch in commit_batches(batches, engine.commit_chunks):
+        stream = ChunkedCopyStream(batch, encoder=source.encode, timer=engine.timer,
+                                   prefix=PGCOPY_HEADER, suffix=PGCOPY_TRAILER)
+        with engine.connection.cursor() as cursor:
+            with engine.timer.phase('copy'):
+                cursor.copy_expert(f"COPY {target} ({column_list}) FROM STDIN WITH (FORMAT binary)",
+                                   stream)
+            inserted = stream.rows
+            if not direct:
+                inserted = engine.merge_staging(cursor, table_name, source.staging_table,
+                                                source.columns, on_conflict, source.expressions)
+        if checkpoint is not None:
+            checkpoint(read['rows'], read['chunks'])
+        engine.commit()
+        stats['rows'] += stream.rows
+        stats['inserted'] += inserted
+        stats['chunks'] += stream.chunks
+        stats['bytes'] += stream.bytes
+        stats['commits'] += 1
+
+    stats['seconds'] = time.perf_counter() - start
+    stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+    stats['peak_rss_mb'] = peak_rss_mb()
+    stats['phases'] = engine.timer.summary()
+    return stats
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Index and Constraint Deferral for Bulk Loads
+
+On a full refresh every PRIMARY KEY, UNIQUE, CHECK and FOREIGN KEY of the
+target tables is otherwise checked row by row while COPY runs, and every
+index is maintained one tuple at a time. For the truncate path the
+definitions are captured from the catalog, saved to a control table and
+dropped; after the load indexes are rebuilt in parallel on pooled
+connections, PK/UNIQUE constraints are attached to their rebuilt indexes,
+and CHECKs and FKs are re-added ``NOT VALID`` and then validated in
+parallel with ``VALIDATE CONSTRAINT``.
+
+Definitions stay in the control table until their object is fully
+restored, so a failed rebuild (or a crashed run) can be finished later with
+``restore()``.
+
+Author: Fitness Center Analytics Team
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2.extensions import quote_ident
+from psycopg2.pool import ThreadedConnectionPool
+
+# Control table holding dropped definitions until they are restored
+DEFERRAL_TABLE = 'etl_deferred_constraints'
+
+# Minimum connections used to rebuild indexes and validate constraints
+DEFAULT_REBUILD_WORKERS = 4
+
+# Order in which captured objects are dropped (dependents first)
+DROP_ORDER = ('foreign_key', 'check', 'primary_key', 'unique', 'index')
+
+_CONSTRAINT_KINDS = {'f': 'foreign_key', 'c': 'check', 'p': 'primary_key', 'u': 'unique'}
+
+
+def _if_not_exists(index_definition):
+    """Make a pg_get_indexdef() statement idempotent"""
+    return re.sub(r'^CREATE (UNIQUE )?INDEX ', r'CREATE \1INDEX IF NOT EXISTS ', index_definition)
+
+
+class ConstraintDeferral:
+    """Drops and rebuilds the indexes and constraints of a set of tables"""
+
+    def __init__(self, connection, tables, connect_kwargs, workers=DEFAULT_REBUILD_WORKERS,
+                 control_table=DEFERRAL_TABLE):
+        """
+        Args:
+            connection: Open psycopg2 connection used for catalog reads and DDL
+            tables: Tables being bulk loaded (may be schema-qualified); None
+                    restores every saved definition
+            connect_kwargs: psycopg2.connect() keyword arguments for the
+                            pooled connections that rebuild in parallel
+            workers: Indexes built / constraints validated at the same time
+            control_table: Name of the control table
+        """
+        self.connection = connection
+        self.tables = list(tables) if tables is not None else None
+        self.connect_kwargs = connect_kwargs
+        self.workers = max(1, workers)
+        self.control_table = control_table
+
+    def ensure_table(self):
+        """Create the control table if it does not exist"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.control_table} (
+                    table_name TEXT NOT NULL,
+                    object_name TEXT NOT NULL,
+                    kind VARCHAR(20) NOT NULL,
+                    definition TEXT NOT NULL,
+                    index_definition TEXT,
+                    referenced_table TEXT,
+                    validate BOOLEAN NOT NULL DEFAULT TRUE,
+                    dropped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (table_name, object_name)
+                )
+            """)
+
+    def capture(self, cursor):
+        """
+        Definitions of the constraints and indexes to defer
+
+        Covers PK/UNIQUE/CHECK constraints and plain indexes of the target
+        tables, plus every FK from or to a target table (an FK pointing at a
+        target blocks dropping its primary key).
+
+        Returns:
+            List of dicts with table_name, object_name, kind, definition,
+            index_definition, referenced_table and validate
+        """
+        cursor.execute("""
+            SELECT c.conrelid::regclass::text, c.conname, c.contype,
+                   pg_get_constraintdef(c.oid),
+                   CASE WHEN c.contype IN ('p', 'u') THEN pg_get_indexdef(c.conindid) END,
+                   NULLIF(c.confrelid, 0)::regclass::text,
+                   c.convalidated
+            FROM pg_constraint c
+            WHERE c.conislocal
+              AND ((c.contype IN ('p', 'u', 'c') AND c.conrelid = ANY(%s::regclass[]))
+                   OR (c.contype = 'f' AND (c.conrelid = ANY(%s::regclass[])
+                                            OR c.confrelid = ANY(%s::regclass[]))))
+        """, (self.tables, self.tables, self.tables))
+        definitions = [{
+            'table_name': table, 'object_name': name, 'kind': _CONSTRAINT_KINDS[contype],
+            'definition': definition, 'index_definition': index_definition,
+            'referenced_table': referenced, 'validate': validated,
+        } for table, name, contype, definition, index_definition, referenced, validated in cursor.fetchall()]
+
+        cursor.execute("""
+            SELECT i.indrelid::regclass::text, i.indexrelid::regclass::text,
+                   pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            WHERE i.indrelid = ANY(%s::regclass[])
+              AND NOT EXISTS (
+                  SELECT 1 FROM pg_constraint c
+                  WHERE c.conindid = i.indexrelid AND c.conrelid = i.indrelid
+                    AND c.contype IN ('p', 'u', 'x')
+              )
+        """, (self.tables,))
+        definitions.extend({
+            'table_name': table, 'object_name': name, 'kind': 'index', 'definition': definition,
+            'index_definition': None, 'referenced_table': None, 'validate': True,
+        } for table, name, definition in cursor.fetchall())
+        return definitions
+
+    def drop(self):
+        """
+        Save and drop the deferred definitions in one transaction
+
+        Returns:
+            Number of indexes and constraints dropped
+        """
+        self.ensure_table()
+        try:
+            with self.connection.cursor() as cursor:
+                definitions = self.capture(cursor)
+                for item in definitions:
+                    cursor.execute(f"""
+                        INSERT INTO {self.control_table}
+                            (table_name, object_name, kind, definition, index_definition,
+                             referenced_table, validate)
+                        VALUES (%(table_name)s, %(object_name)s, %(kind)s, %(definition)s,
+                                %(index_definition)s, %(referenced_table)s, %(validate)s)
+                        ON CONFLICT (table_name, object_name) DO NOTHING
+                    """, item)
+
+                for kind in DROP_ORDER:
+                    for item in definitions:
+                        if item['kind'] != kind:
+                            continue
+                        if kind == 'index':
+                            cursor.execute(f"DROP INDEX {item['object_name']}")
+                        else:
+                            cursor.execute(f"ALTER TABLE {item['table_name']} DROP CONSTRAINT "
+                                           f"{quote_ident(item['object_name'], cursor)}")
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+        return len(definitions)
+
+    def pending(self):
+        """Saved definitions not yet restored for the target tables"""
+        self.ensure_table()
+        with self.connection.cursor() as cursor:
+            if self.tables is None:
+                cursor.execute(f"""
+                    SELECT table_name, object_name, kind, definition, index_definition,
+                           referenced_table, validate
+                    FROM {self.control_table}
+                """)
+            else:
+                cursor.execute(f"""
+                    SELECT table_name, object_name, kind, definition, index_definition,
+                           referenced_table, validate
+                    FROM {self.control_table}
+                    WHERE table_name = ANY(ARRAY(SELECT unnest(%s::regclass[])::text))
+                       OR referenced_table = ANY(ARRAY(SELECT unnest(%s::regclass[])::text))
+                """, (self.tables, self.tables))
+            columns = [col[0] for col in cursor.description]
+            pending = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        self.connection.commit()
+        return pending
+
+    def fk_dependencies(self):
+        """
+        Foreign key dependencies held by the saved definitions
+
+        Once the foreign keys are dropped the catalog no longer has them, so
+        a load graph built during a deferred load must take them from here.
+
+        Returns:
+            Dict mapping lower-case table name (without schema) to the set
+            of tables it references, as load_graph.fetch_fk_dependencies
+        """
+        dependencies = {}
+        for item in self.pending():
+            if item['kind'] == 'foreign_key':
+                child = item['table_name'].rpartition('.')[2].strip('"').lower()
+                parent = item['referenced_table'].rpartition('.')[2].strip('"').lower()
+                dependencies.setdefault(child, set()).add(parent)
+        return dependencies
+
+    def _partitioned_tables(self):
+        """Names (as regclass text) of the partitioned tables in the database"""
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT partrelid::regclass::text FROM pg_partitioned_table")
+            partitioned = {row[0] for row in cursor.fetchall()}
+        self.connection.commit()
+        return partitioned
+
+    def _constraint_exists(self, cursor, item):
+        cursor.execute("SELECT 1 FROM pg_constraint WHERE conrelid = %s::regclass AND conname = %s",
+                       (item['table_name'], item['object_name']))
+        return cursor.fetchone() is not None
+
+    def _forget(self, cursor, item):
+        cursor.execute(f"DELETE FROM {self.control_table} WHERE table_name = %s AND object_name = %s",
+                       (item['table_name'], item['object_name']))
+
+    def _run_parallel(self, pool, items, action):
+        """Run ``action(cursor, item)`` on pooled connections, one item per transaction"""
+        def run(item):
+            connection = pool.getconn()
+            try:
+                with connection.cursor() as cursor:
+                    action(cursor, item)
+                connection.commit()
+                return None
+            except Exception as e:
+                connection.rollback()
+                return (item, e)
+            finally:
+                pool.putconn(connection)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return [error for error in executor.map(run, items) if error is not None]
+
+    def _run_serial(self, items, action):
+        """Run ``action(cursor, item)`` on the main connection, one item per transaction"""
+        errors = []
+        for item in items:
+            try:
+                with self.connection.cursor() as cursor:
+                    action(cursor, item)
+                self.connection.commit()
+            except Exception as e:
+                self.connection.rollback()
+                errors.append((item, e))
+        return errors
+
+    def restore(self):
+        """
+        Rebuild every pending definition of the target tables
+
+        Indexes (including those backing PK/UNIQUE constraints) are built in
+        parallel, PK/UNIQUE constraints are attached to them, CHECKs and FKs
+        are added NOT VALID and then validated in parallel. Each object's
+        saved definition is removed once it is fully restored.
+
+        Returns:
+            Dict with restored count and seconds per step
+
+        Raises:
+            RuntimeError: If any object could not be restored; its definition
+                          is kept in the control table for a later restore()
+        """
+        pending = self.pending()
+        timings = {}
+        errors = []
+        if not pending:
+            return {'restored': 0, 'steps': timings}
+
+        keys = [item for item in pending if item['kind'] in ('primary_key', 'unique')]
+        partitioned = self._partitioned_tables()
+        # DEFERRABLE constraints and keys of partitioned tables cannot adopt an existing index
+        attachable = [item for item in keys if 'DEFERRABLE' not in item['definition']
+                      and item['table_name'] not in partitioned]
+        indexes = [item for item in pending if item['kind'] == 'index'] + attachable
+        deferred = [item for item in pending if item['kind'] in ('check', 'foreign_key')]
+
+        def build_index(cursor, item):
+            cursor.execute(_if_not_exists(item['index_definition'] or item['definition']))
+            if item['kind'] == 'index':
+                self._forget(cursor, item)
+
+        def attach_key(cursor, item):
+            if not self._constraint_exists(cursor, item):
+                name = quote_ident(item['object_name'], cursor)
+                if item in attachable:
+                    kind = 'PRIMARY KEY' if item['kind'] == 'primary_key' else 'UNIQUE'
+                    cursor.execute(f"ALTER TABLE {item['table_name']} ADD CONSTRAINT {name} "
+                                   f"{kind} USING INDEX {name}")
+                else:
+                    cursor.execute(f"ALTER TABLE {item['table_name']} ADD CONSTRAINT {name} "
+                                   f"{item['definition']}")
+            self._forget(cursor, item)
+
+        def add_not_valid(cursor, item):
+            if not self._constraint_exists(cursor, item):
+                definition = item['definition']
+                if 'NOT VALID' not in definition:
+                    definition += ' NOT VALID'
+                cursor.execute(f"ALTER TABLE {item['table_name']} ADD CONSTRAINT "
+                               f"{quote_ident(item['object_name'], cursor)} {definition}")
+            if not item['validate']:
+                self._forget(cursor, item)
+
+        def validate(cursor, item):
+            cursor.execute(f"ALTER TABLE {item['table_name']} VALIDATE CONSTRAINT "
+                           f"{quote_ident(item['object_name'], cursor)}")
+            self._forget(cursor, item)
+
+        pool = ThreadedConnectionPool(1, self.workers, **self.connect_kwargs)
+        try:
+            start = time.perf_counter()
+            errors += self._run_parallel(pool, indexes, build_index)
+            timings['build_indexes'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            errors += self._run_serial(keys, attach_key)
+            timings['attach_keys'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            errors += self._run_serial(deferred, add_not_valid)
+            timings['add_constraints'] = time.perf_counter() - start
+
+            failed = {(item['table_name'], item['object_name']) for item, _ in errors}
+            to_validate = [item for item in deferred if item['validate']
+                           and (item['table_name'], item['object_name']) not in failed]
+            start = time.perf_counter()
+            errors += self._run_parallel(pool, to_validate, validate)
+            timings['validate_constraints'] = time.perf_counter() - start
+        finally:
+            pool.closeall()
+
+        if errors:
+            details = '; '.join(f"{item['object_name']} on {item['table_name']}: "
+                                f"{str(e).strip().splitlines()[0]}" for item, e in errors)
+            raise RuntimeError(f"{len(errors)} of {len(pending)} deferred objects not restored "
+                               f"(kept in {self.control_table}): {details}")
+        return {'restored': len(pending), 'steps': timings}
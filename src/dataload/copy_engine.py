@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Streaming COPY Engine
+
+Shared bulk-load path for the Fitness Center loaders. DataFrame chunks are
+cleaned and encoded into an in-memory CSV buffer one bounded chunk at a
+time and streamed straight into ``COPY ... FROM STDIN``; no intermediate
+file is written and a whole source file is never held in memory.
+
+Tables that need idempotent reloads are COPYed into a per-session
+temporary staging table and merged with a single ``INSERT ... SELECT ... ON CONFLICT``.
+A merge hook registered for a table sees the rows each merge writes and
+replaces, in the merge's transaction (see ``aggregates.py``).
+
+Author: Fitness Center Analytics Team
+"""
+
+import io
+import csv
+import sys
+import time
+import itertools
+import numpy as np
+import pandas as pd
+import psycopg2
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from row_conversion import convert_column
+from load_metrics import PhaseTimer
+
+# Rows per DataFrame chunk read from a source file
+DEFAULT_CHUNK_ROWS = 50000
+
+# Chunks COPYed per transaction when streaming a file (0 = one per file)
+DEFAULT_COMMIT_CHUNKS = 0
+
+# NULL marker used in the COPY CSV stream
+NULL_MARKER = '\\N'
+
+# Supported ways of merging staged rows into an existing table
+CONFLICT_MODES = (None, 'nothing', 'update')
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def primary_key_columns(cursor, table_name):
+    """Primary key column names of ``table_name`` in key order"""
+    cursor.execute("""
+        SELECT a.attname
+        FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+        WHERE i.indrelid = %s::regclass AND i.indisprimary
+        ORDER BY array_position(i.indkey::int2[], a.attnum)
+    """, (table_name,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def column_data_types(cursor, table_name):
+    """{column: data type} of ``table_name``, named as information_schema names them"""
+    cursor.execute("""
+        SELECT a.attname, format_type(a.atttypid, NULL)
+        FROM pg_attribute a
+        WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+    """, (table_name,))
+    return dict(cursor.fetchall())
+
+
+def commit_batches(chunks, chunks_per_commit):
+    """
+    Group a chunk iterator into lazy batches of ``chunks_per_commit`` chunks
+
+    Each batch must be fully consumed before the next one is requested.
+    A ``chunks_per_commit`` of 0 yields everything as a single batch.
+    """
+    chunks = iter(chunks)
+    if chunks_per_commit <= 0:
+        yield chunks
+        return
+    for first in chunks:
+        yield itertools.chain([first], itertools.islice(chunks, chunks_per_commit - 1))
+
+
+def normalize_chunk(df):
+    """
+    Restore integer columns that pandas widened to float because of NaNs
+
+    A column such as ``4.0, NaN, 3.0`` would otherwise be written as ``4.0``
+    and rejected by INT columns. Columns whose non-null values are all whole
+    numbers are converted to the nullable ``Int64`` dtype.
+    """
+    whole_columns = []
+    for i in range(len(df.columns)):
+        series = df.iloc[:, i]
+        if series.dtype.kind != 'f':
+            continue
+        values = series.to_numpy()
+        present = values[~np.isnan(values)]
+        if len(present) and np.array_equal(present, np.floor(present)) and np.abs(present).max() < 2**53:
+            whole_columns.append(i)
+
+    if not whole_columns:
+        return df
+
+    # Shallow copy so the caller's DataFrame is left untouched
+    df = df.copy(deep=False)
+    for i in whole_columns:
+        df.isetitem(i, df.iloc[:, i].astype('Int64'))
+    return df
+
+
+def encode_csv_chunk(df):
+    """
+    Encode a DataFrame chunk as COPY CSV text
+
+    Args:
+        df: Chunk whose columns are in COPY column order
+
+    Returns:
+        CSV text without a header, using NULL_MARKER for missing values
+    """
+    if len(df) == 0:
+        return ''
+
+    df = normalize_chunk(df)
+    columns = [convert_column(df.iloc[:, i], null=NULL_MARKER) for i in range(len(df.columns))]
+
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(zip(*columns))
+    return buffer.getvalue()
+
+
+class ChunkedCopyStream:
+    """File-like object that encodes chunks lazily as COPY reads from it"""
+
+    def __init__(self, chunks, encoder=encode_csv_chunk, timer=None, prefix=b'', suffix=b''):
+        """
+        Args:
+            chunks: Iterable of DataFrame chunks (or anything ``encoder`` takes
+                    that has a len())
+            encoder: Function turning a chunk into COPY text or bytes
+            timer: PhaseTimer charged with the encode phase
+            prefix: Bytes sent before the first chunk (e.g. a binary COPY header)
+            suffix: Bytes sent after the last chunk (e.g. a binary COPY trailer)
+        """
+        self._chunks = iter(chunks)
+        self._encoder = encoder
+        self._timer = timer or PhaseTimer()
+        self._buffer = prefix
+        self._suffix = suffix
+        self._pos = 0
+        self.rows = 0
+        self.bytes = len(prefix)
+        self.chunks = 0
+
+    def _next_chunk(self):
+        """Encode the next chunk into the buffer; False when exhausted"""
+        for chunk in self._chunks:
+            with self._timer.phase('encode'):
+                data = self._encoder(chunk)
+                self._buffer = data.encode('utf-8') if isinstance(data, str) else data
+            self._pos = 0
+            self.rows += len(chunk)
+            self.bytes += len(self._buffer)
+            self.chunks += 1
+            return True
+        if self._suffix:
+            self._buffer, self._suffix = self._suffix, b''
+            self._pos = 0
+            self.bytes += len(self._buffer)
+            return True
+        return False
+
+    def read(self, size=-1):
+        """Return up to ``size`` bytes of encoded COPY data (b'' at the end)"""
+        if size is None or size < 0:
+            parts = [self._buffer[self._pos:]]
+            self._pos = len(self._buffer)
+            while self._next_chunk():
+                parts.append(self._buffer)
+                self._pos = len(self._buffer)
+            return b''.join(parts)
+
+        while self._pos >= len(self._buffer):
+            if not self._next_chunk():
+                return b''
+
+        data = self._buffer[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
+
+
+class CopyEngine:
+    """Streams DataFrame chunks into PostgreSQL with COPY FROM STDIN"""
+
+    def __init__(self, connection, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 commit_chunks=DEFAULT_COMMIT_CHUNKS):
+        """
+        Initialize COPY engine
+
+        Args:
+            connection: Open psycopg2 connection; the caller owns commits
+                        except in copy_file
+            chunk_rows: Rows per chunk when reading source files
+            commit_chunks: Chunks per transaction in copy_file (0 = whole file)
+        """
+        self.connection = connection
+        self.chunk_rows = chunk_rows
+        self.commit_chunks = commit_chunks
+        self.timer = PhaseTimer()
+        # {table_name: hook} notified of every merge into the table; rows
+        # for a hooked table always go through its staging table
+        self.merge_hooks = {}
+
+    @staticmethod
+    def staging_table_name(table_name):
+        """Name of the staging table used for ``table_name`` (temporary, so never schema-qualified)"""
+        return f"{table_name.replace('.', '_')}__staging"
+
+    def read_csv_chunks(self, csv_path, **read_csv_kwargs):
+        """Iterate over a CSV file in chunks of ``chunk_rows`` rows"""
+        return pd.read_csv(csv_path, chunksize=self.chunk_rows, **read_csv_kwargs)
+
+    def timed_chunks(self, chunks, transform=None):
+        """Charge chunk parsing, and ``transform`` if given, to the engine's timer"""
+        chunks = self.timer.timed(chunks, 'parse')
+        if transform is not None:
+            chunks = self.timer.timed((transform(chunk) for chunk in chunks), 'transform')
+        return chunks
+
+    def commit(self):
+        """Commit the engine's connection, timing the commit phase"""
+        with self.timer.phase('commit'):
+            self.connection.commit()
+
+    def copy_stream(self, cursor, table_name, columns, chunks):
+        """
+        COPY encoded chunks into ``table_name`` in one COPY statement
+
+        Returns:
+            The ChunkedCopyStream used, carrying row/byte/chunk counters
+        """
+        stream = ChunkedCopyStream(chunks, timer=self.timer)
+        with self.timer.phase('copy'):
+            cursor.copy_expert(
+                f"COPY {table_name} ({', '.join(columns)}) "
+                f"FROM STDIN WITH (FORMAT csv, NULL '{NULL_MARKER}')",
+                stream
+            )
+        return stream
+
+    def prepare_staging(self, cursor, table_name):
+        """
+        Create (if needed) and empty the session's staging table
+
+        The staging table is temporary, so it takes the target's current
+        columns in every session and concurrent loaders never share it.
+        ``ON COMMIT DELETE ROWS`` empties it at every commit.
+        """
+        staging_table = self.staging_table_name(table_name)
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {staging_table} "
+            f"(LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.execute(f"TRUNCATE TABLE {staging_table}")
+        return staging_table
+
+    def merge_staging(self, cursor, table_name, staging_table, columns, on_conflict='nothing',
+                      expressions=None):
+        """
+        Move staged rows into the target in one INSERT ... SELECT
+
+        ``on_conflict`` None inserts every row, 'nothing' skips existing keys
+        and 'update' upserts on the primary key (the last staged version of a
+        key wins). ``expressions`` optionally replaces the selected staging
+        columns, one per target column (e.g. casts).
+
+        A merge hook for ``table_name`` is called with ``before_merge(cursor,
+        table_name, staging_table, keys)`` (``keys`` is None unless upserting),
+        its ``capture(table_name, relation)`` statement receives the written rows from
+        ``INSERT ... RETURNING *``, and ``after_merge(cursor, table_name,
+        on_conflict)`` runs last, all in the caller's transaction.
+        """
+        if on_conflict not in CONFLICT_MODES:
+            raise ValueError(f"Unsupported on_conflict mode: {on_conflict}")
+
+        column_list = ', '.join(columns)
+        select_list = ', '.join(expressions or columns)
+        select = f"SELECT {select_list} FROM {staging_table}"
+        conflict_clause = "ON CONFLICT DO NOTHING" if on_conflict == 'nothing' else ""
+
+        keys = None
+        if on_conflict == 'update':
+            keys = primary_key_columns(cursor, table_name)
+            if not keys:
+                raise ValueError(f"Table {table_name} has no primary key to upsert on")
+            key_list = ', '.join(keys)
+            updates = ', '.join(f"{col} = EXCLUDED.{col}" for col in columns if col not in keys)
+            # A key may appear twice in one batch; keep the row staged last
+            select = (f"SELECT DISTINCT ON ({key_list}) {select_list} FROM {staging_table} "
+                      f"ORDER BY {key_list}, ctid DESC")
+            conflict_clause = (f"ON CONFLICT ({key_list}) DO UPDATE SET {updates}" if updates
+                               else f"ON CONFLICT ({key_list}) DO NOTHING")
+
+        insert = f"""
+                INSERT INTO {table_name} ({column_list})
+                {select}
+                {conflict_clause}
+            """
+        hook = self.merge_hooks.get(table_name)
+        with self.timer.phase('merge'):
+            if hook is not None:
+                hook.before_merge(cursor, table_name, staging_table, keys)
+                # The capture statement writes as many rows as the merge did
+                insert = f"WITH merged AS ({insert} RETURNING *) {hook.capture(table_name, 'merged')}"
+            cursor.execute(insert)
+            inserted = cursor.rowcount
+            if hook is not None:
+                hook.after_merge(cursor, table_name, on_conflict)
+            cursor.execute(f"TRUNCATE TABLE {staging_table}")
+        return inserted
+
+    def copy_chunks(self, table_name, columns, chunks, on_conflict=None):
+        """
+        Load DataFrame chunks into a table
+
+        Args:
+            table_name: Target table
+            columns: Column names, in the order of the chunk columns
+            chunks: Iterable of DataFrames (e.g. pd.read_csv(..., chunksize=N))
+            on_conflict: None for a plain COPY into the target, 'nothing'
+                         to COPY into a staging table and merge with
+                         ON CONFLICT DO NOTHING, or 'update' to merge with
+                         ON CONFLICT (primary key) DO UPDATE
+
+        Returns:
+            Tuple of (rows read from the chunks, rows written to the target)
+        """
+        rows, inserted, _ = self._copy_batch(table_name, list(columns), chunks, on_conflict)
+        return rows, inserted
+
+    def copy_file(self, table_name, csv_path, transform=None, on_conflict=None,
+                  checkpoint=None, start_offset=0):
+        """
+        Stream a CSV file into a table in bounded chunks
+
+        Only ``chunk_rows`` rows are held in memory at a time. A commit is
+        issued after every ``commit_chunks`` chunks (or once at the end), so
+        earlier batches stay loaded if a later one fails.
+
+        Args:
+            table_name: Target table
+            csv_path: Source CSV file with a header row matching table columns
+            transform: Optional function applied to each DataFrame chunk
+            on_conflict: Passed through to copy_chunks
+            checkpoint: Optional function called as ``checkpoint(rows_read,
+                        chunks_read)`` with the source rows and chunks read so
+                        far, inside each batch's transaction just before it
+                        commits
+            start_offset: Byte offset of the first data line to load (0 = the
+                          line after the header), e.g. to resume a load
+
+        Returns:
+            Dict with rows, inserted, chunks, bytes, commits, seconds,
+            rows_per_sec, peak_rss_mb and per-phase seconds for the file
+        """
+        start = time.perf_counter()
+        self.timer = PhaseTimer()
+        columns = list(pd.read_csv(csv_path, nrows=0).columns)
+        source = None
+        if start_offset:
+            source = open(csv_path, 'rb')
+            source.seek(start_offset)
+            reader = self.read_csv_chunks(io.TextIOWrapper(source, encoding='utf-8'),
+                                          header=None, names=columns)
+        else:
+            reader = self.read_csv_chunks(csv_path)
+
+        read = {'rows': 0, 'chunks': 0}
+
+        def counted(chunks):
+            for chunk in chunks:
+                read['rows'] += len(chunk)
+                read['chunks'] += 1
+                yield chunk
+
+        chunks = self.timed_chunks(counted(reader), transform)
+
+        stats = {'rows': 0, 'inserted': 0, 'chunks': 0, 'bytes': 0, 'commits': 0}
+        try:
+            for batch in commit_batches(chunks, self.commit_chunks):
+                rows, inserted, stream = self._copy_batch(table_name, columns, batch, on_conflict)
+                if checkpoint is not None:
+                    checkpoint(read['rows'], read['chunks'])
+                self.commit()
+                stats['rows'] += rows
+                stats['inserted'] += inserted
+                stats['chunks'] += stream.chunks
+                stats['bytes'] += stream.bytes
+                stats['commits'] += 1
+        finally:
+            if source is not None:
+                source.close()
+
+        stats['seconds'] = time.perf_counter() - start
+        stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+        stats['peak_rss_mb'] = peak_rss_mb()
+        stats['phases'] = self.timer.summary()
+        return stats
+
+    def copy_file_tolerant(self, table_name, csv_path, reject, transform=None, on_conflict='nothing'):
+        """
+        Stream a CSV file into a table, isolating rows the database rejects
+
+        Each chunk is COPYed through the staging table and merged under a
+        savepoint. If that fails the chunk is split in half and each half is
+        retried, down to single rows, which are handed to ``reject`` with the
+        database error. One malformed row costs O(log chunk_rows) retries
+        instead of a full-table retry.
+
+        Args:
+            table_name: Target table
+            csv_path: Source CSV file with a header row matching table columns
+            reject: Function called with (rows DataFrame, reason) for bad rows
+            transform: Optional function applied to each DataFrame chunk
+            on_conflict: 'nothing' or 'update' (rows always go through staging)
+
+        Returns:
+            Dict with the same keys as copy_file plus rejected and retries
+        """
+        start = time.perf_counter()
+        self.timer = PhaseTimer()
+        columns = list(pd.read_csv(csv_path, nrows=0).columns)
+        chunks = self.timed_chunks(self.read_csv_chunks(csv_path), transform)
+
+        stats = {'rows': 0, 'inserted': 0, 'chunks': 0, 'bytes': 0, 'commits': 0,
+                 'rejected': 0, 'retries': 0}
+        with self.connection.cursor() as cursor:
+            staging_table = self.prepare_staging(cursor, table_name)
+            for number, chunk in enumerate(chunks, 1):
+                stats['rows'] += len(chunk)
+                stats['chunks'] += 1
+                stats['inserted'] += self.copy_chunk_isolating(
+                    cursor, table_name, staging_table, columns, chunk, on_conflict, reject, stats
+                )
+                if self.commit_chunks and number % self.commit_chunks == 0:
+                    self.commit()
+                    stats['commits'] += 1
+        self.commit()
+        stats['commits'] += 1
+
+        stats['seconds'] = time.perf_counter() - start
+        stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+        stats['peak_rss_mb'] = peak_rss_mb()
+        stats['phases'] = self.timer.summary()
+        return stats
+
+    def copy_chunk_isolating(self, cursor, table_name, staging_table, columns, df,
+                             on_conflict, reject, stats):
+        """COPY and merge one chunk under a savepoint, bisecting it on failure"""
+        if len(df) == 0:
+            return 0
+
+        cursor.execute("SAVEPOINT copy_chunk")
+        try:
+            stream = self.copy_stream(cursor, staging_table, columns, [df])
+            inserted = self.merge_staging(cursor, table_name, staging_table, columns, on_conflict)
+            cursor.execute("RELEASE SAVEPOINT copy_chunk")
+            stats['bytes'] += stream.bytes
+            return inserted
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT copy_chunk")
+            cursor.execute("RELEASE SAVEPOINT copy_chunk")
+            if len(df) == 1:
+                reject(df, str(e).strip().splitlines()[0])
+                stats['rejected'] += 1
+                return 0
+
+        stats['retries'] += 2
+        middle = len(df) // 2
+        return (self.copy_chunk_isolating(cursor, table_name, staging_table, columns, df.iloc[:middle],
+                                          on_conflict, reject, stats) +
+                self.copy_chunk_isolating(cursor, table_name, staging_table, columns, df.iloc[middle:],
+                                          on_conflict, reject, stats))
+
+    def _copy_batch(self, table_name, columns, chunks, on_conflict):
+        """copy_chunks variant that also returns the stream counters"""
+        with self.connection.cursor() as cursor:
+            if on_conflict is None and table_name not in self.merge_hooks:
+                stream = self.copy_stream(cursor, table_name, columns, chunks)
+                return stream.rows, stream.rows, stream
+
+            if on_conflict not in CONFLICT_MODES:
+                raise ValueError(f"Unsupported on_conflict mode: {on_conflict}")
+
+            staging_table = self.prepare_staging(cursor, table_name)
+            stream = self.copy_stream(cursor, staging_table, columns, chunks)
+            inserted = self.merge_staging(cursor, table_name, staging_table, columns, on_conflict)
+            return stream.rows, inserted, stream
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data Scaler
+
+Scales a directory of fixture CSVs (``generated_data_complete`` or
+``ProjectSetup/ods_sample_data``) up by an integer factor, deterministically
+for a given seed. Copy 0 is the fixture itself; every further copy k gets:
+
+- prefixed ids (``MEM000326``, ``FAC001``, ``TXN910188982``) renumbered into
+  a disjoint block per prefix, so FK columns in every table follow their
+  parent to the same copy without needing the schema
+- ``+k`` tags in e-mail addresses, keeping UNIQUE columns unique
+- every date/timestamp of a row moved back by the same seeded number of
+  days, so intra-row orderings (start <= end) still hold
+
+Reference tables (membership types, class types, certifications) are
+written once and their ids are left untouched. All other values are taken
+from the fixture rows, so CHECK enums and ranges valid in the fixtures stay
+valid at any scale.
+
+Usage:
+    python data_scaler.py generated_data_complete bench_data/x100 --factor 100
+
+Author: Fitness Center Analytics Team
+"""
+
+import os
+import sys
+import zlib
+import argparse
+import numpy as np
+import pandas as pd
+
+# Lookup tables shared by every copy instead of being multiplied
+REFERENCE_TABLES = ('membershiptypes', 'classtypes', 'instructorcertifications', 'class_types')
+
+# Default seed of the scaled datasets
+DEFAULT_SEED = 42
+
+# Copies k >= 1 move each row's dates back by up to this many days
+MAX_DATE_SHIFT_DAYS = 365
+
+ID_PATTERN = r'^([A-Z]+)(\d+)$'
+DATE_PATTERN = r'^\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?)?$'
+
+
+def _profile_column(series):
+    """
+    Classify a text column of a fixture table
+
+    Returns:
+        ('id', prefix, numbers, width), ('date', timestamps, has_time,
+        has_fraction), ('email',) or None for columns copied verbatim
+    """
+    present = series[series != '']
+    if len(present) == 0:
+        return None
+
+    ids = present.str.extract(ID_PATTERN)
+    if ids[0].notna().all() and ids[0].nunique() == 1:
+        numbers = pd.to_numeric(series.str.extract(ID_PATTERN)[1], errors='coerce')
+        return ('id', ids[0].iloc[0], numbers.to_numpy(dtype='float64'), int(ids[1].str.len().max()))
+
+    if present.str.match(DATE_PATTERN).all():
+        timestamps = pd.to_datetime(series.where(series != ''), format='ISO8601')
+        has_time = bool(present.str.len().gt(10).any())
+        return ('date', timestamps, has_time, bool(present.str.contains('.', regex=False).any()))
+
+    if 'email' in series.name.lower() and present.str.contains('@', regex=False).all():
+        return ('email',)
+    return None
+
+
+class DatasetScaler:
+    """Writes seeded, FK-consistent scaled copies of a fixture directory"""
+
+    def __init__(self, source_dir, seed=DEFAULT_SEED, reference_tables=REFERENCE_TABLES):
+        """
+        Args:
+            source_dir: Directory of <table>.csv fixture files
+            seed: Seed for the per-row date shifts
+            reference_tables: Tables written once, whose ids are never renumbered
+        """
+        self.source_dir = source_dir
+        self.seed = seed
+        self.tables = {}
+        self.profiles = {}
+
+        for csv_file in sorted(f for f in os.listdir(source_dir) if f.endswith('.csv')):
+            table_name = csv_file[:-4]
+            df = pd.read_csv(os.path.join(source_dir, csv_file), dtype=str, keep_default_na=False)
+            self.tables[table_name] = df
+            self.profiles[table_name] = {col: _profile_column(df[col]) for col in df.columns}
+
+        # Ids of reference tables keep their value in every copy
+        self.reference_tables = [t for t in self.tables if t in reference_tables]
+        fixed_prefixes = set()
+        for table_name in self.reference_tables:
+            first = self.profiles[table_name][self.tables[table_name].columns[0]]
+            if first is not None and first[0] == 'id':
+                fixed_prefixes.add(first[1])
+
+        # One block of numbers per id prefix, wide enough for every table using it
+        self.strides = {}
+        for profile in self.profiles.values():
+            for info in profile.values():
+                if info is not None and info[0] == 'id' and info[1] not in fixed_prefixes:
+                    block = int(np.nanmax(info[2])) + 1
+                    self.strides[info[1]] = max(self.strides.get(info[1], 0), block)
+
+    def scaled_copy(self, table_name, k):
+        """Copy ``k`` of a table (copy 0 is the fixture itself)"""
+        df = self.tables[table_name]
+        if k == 0:
+            return df
+
+        df = df.copy()
+        rng = np.random.default_rng([self.seed, zlib.crc32(table_name.encode()), k])
+        shift = pd.to_timedelta(rng.integers(0, MAX_DATE_SHIFT_DAYS, len(df)), unit='D')
+
+        for col, info in self.profiles[table_name].items():
+            if info is None:
+                continue
+            if info[0] == 'id':
+                _, prefix, numbers, width = info
+                if prefix not in self.strides:
+                    continue
+                renumbered = pd.Series(numbers + k * self.strides[prefix], index=df.index)
+                text = renumbered.astype('Int64').astype(str).str.zfill(width)
+                df[col] = (prefix + text).where(renumbered.notna(), df[col])
+            elif info[0] == 'date':
+                _, timestamps, has_time, has_fraction = info
+                fmt = '%Y-%m-%d %H:%M:%S.%f' if has_fraction else '%Y-%m-%d %H:%M:%S'
+                shifted = (timestamps - shift).dt.strftime(fmt if has_time else '%Y-%m-%d')
+                df[col] = shifted.fillna('')
+            else:
+                df[col] = df[col].str.replace('@', f'+{k}@', n=1, regex=False)
+        return df
+
+    def write(self, output_dir, factor):
+        """
+        Write every table scaled by ``factor`` to ``output_dir``
+
+        Returns:
+            Dict mapping table name to rows written
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        written = {}
+        for table_name in self.tables:
+            copies = 1 if table_name in self.reference_tables else factor
+            path = os.path.join(output_dir, f"{table_name}.csv")
+            with open(path, 'w', newline='') as f:
+                for k in range(copies):
+                    self.scaled_copy(table_name, k).to_csv(f, index=False, header=(k == 0))
+            written[table_name] = len(self.tables[table_name]) * copies
+        return written
+
+
+def scale_dataset(source_dir, output_dir, factor, seed=DEFAULT_SEED):
+    """Scale ``source_dir`` by ``factor`` into ``output_dir``; returns rows per table"""
+    return DatasetScaler(source_dir, seed).write(output_dir, factor)
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Scale fixture CSVs up by a factor, keeping FKs valid')
+    parser.add_argument('source_dir', help='Directory containing fixture CSV files')
+    parser.add_argument('output_dir', help='Directory the scaled CSV files are written to')
+    parser.add_argument('--factor', type=int, default=10,
+                       help='Number of copies of each non-reference table (default: 10)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                       help=f'Seed for the date shifts (default: {DEFAULT_SEED})')
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.source_dir):
+        print(f"ERROR: Source directory not found: {args.source_dir}")
+        sys.exit(1)
+
+    written = scale_dataset(args.source_dir, args.output_dir, args.factor, args.seed)
+    for table_name, rows in written.items():
+        print(f"{table_name:30} {rows:>12,}")
+    print(f"{'TOTAL':30} {sum(written.values()):>12,}")
+
+
+if __name__ == "__main__":
+    main()
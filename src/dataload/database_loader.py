@@ -14,12 +14,31 @@ import os
 import sys
 import pandas as pd
 import psycopg2
-from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import logging
 from datetime import datetime
 from decimal import Decimal
 import json
 
+from copy_engine import CopyEngine, DEFAULT_CHUNK_ROWS, DEFAULT_COMMIT_CHUNKS
+from parallel_copy import DEFAULT_PARALLEL_COPY_MB, parallel_copy_file
+from copy_engine import column_data_types, primary_key_columns
+from incremental import WATERMARK_TABLE, WatermarkStore, DeltaFilter, find_watermark_column, new_run_id
+from row_fingerprints import FINGERPRINT_TABLE, FingerprintStore, ChangeFilter
+from quarantine import (ERROR_DIR, ChunkValidator, QuarantineFilter, RejectWriter,
+                        parse_schema_constraints)
+from constraint_deferral import DEFAULT_REBUILD_WORKERS, ConstraintDeferral
+from partitions import PartitionManager, parse_month
+from integrity import DEFAULT_CHECK_WORKERS, IntegrityChecker, format_result
+from summary_stats import TableSummary, format_count
+from load_journal import (DEFAULT_RECONNECT_RETRIES, LoadJournal, TableCheckpoint, file_checksum,
+                          has_quoted_newlines)
+from columnar import SOURCE_EXTENSIONS, copy_columnar_file, find_source_file, is_columnar
+from load_metrics import DEFAULT_METRICS_FILE, LoadMetrics, format_phases
+from aggregates import AggregateMaintainer, merge_hooks
+from load_graph import (SCHEMA_FILE, fetch_fk_dependencies, parse_schema_dependencies,
+                        run_in_dependency_order)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -31,12 +50,37 @@ logger = logging.getLogger(__name__)
 class FitnessCenterDatabaseLoader:
     """Loads generated data into PostgreSQL database following dependency order"""
     
-    def __init__(self, database_url=None):
+    def __init__(self, database_url=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 commit_chunks=DEFAULT_COMMIT_CHUNKS, copy_processes=1,
+                 parallel_copy_mb=DEFAULT_PARALLEL_COPY_MB, incremental=False, run_id=None,
+                 changed_only=False, quarantine=False, error_dir=ERROR_DIR,
+                 defer_constraints=False, period=None, resume=False,
+                 reconnect_retries=DEFAULT_RECONNECT_RETRIES, aggregates=False):
         """
         Initialize database loader
         
         Args:
             database_url: PostgreSQL connection string
+            chunk_rows: Rows read, converted and COPYed per chunk
+            commit_chunks: Commit after this many chunks (0 = once per table)
+            copy_processes: Processes used to COPY one large CSV file
+            parallel_copy_mb: Minimum file size in MB for a parallel COPY
+            incremental: Upsert only rows newer than each table's watermark
+            run_id: Identifier recorded with watermarks and the load journal
+                    (default: a new run_<epoch ms>, logged when the load starts)
+            changed_only: Upsert only rows whose content fingerprint changed
+            quarantine: Divert invalid rows to bad-record files instead of failing
+            error_dir: Directory for <run_id>-<table>-badrecords.csv files
+            defer_constraints: Drop indexes and constraints of the loaded tables
+                               during the load and rebuild them afterwards
+            period: Month (pandas Period) to reload in the partitioned fact
+                    tables by attaching a freshly loaded partition
+            resume: Continue the journaled run ``run_id``: skip its completed
+                    tables and continue partial ones from their last commit
+            reconnect_retries: Times a table load reconnects and continues
+                               from its last commit after losing its connection
+            aggregates: Maintain the operational summary tables from every
+                        merged chunk (see aggregates.py)
         """
         self.database_url = database_url or os.getenv(
             'DATABASE_URL', 
@@ -44,6 +88,26 @@ class FitnessCenterDatabaseLoader:
         )
         self.connection = None
         self.cursor = None
+        self.copy_engine = None
+        self.chunk_rows = chunk_rows
+        self.commit_chunks = commit_chunks
+        self.copy_processes = copy_processes
+        self.parallel_copy_mb = parallel_copy_mb
+        self.incremental = incremental
+        self.run_id = run_id or new_run_id()
+        self.changed_only = changed_only
+        self.quarantine = quarantine
+        self.error_dir = error_dir
+        self.defer_constraints = defer_constraints
+        self.period = period
+        self.resume = resume
+        self.reconnect_retries = reconnect_retries
+        self.aggregates = aggregates
+        self.schema_constraints = None
+        self.table_stats = {}
+        self.verify_scope = {}
+        self.truncated = False
+        self.metrics = LoadMetrics(self.run_id, 'database_loader')
         
         # Define table loading order (respects foreign key dependencies)
         self.load_order = [
@@ -91,6 +155,7 @@ class FitnessCenterDatabaseLoader:
             logger.info(f"Connecting to database...")
             self.connection = psycopg2.connect(self.database_url)
             self.cursor = self.connection.cursor()
+            self.copy_engine = self.new_engine(self.connection)
             logger.info("Database connection established successfully")
             return True
             
@@ -98,6 +163,13 @@ class FitnessCenterDatabaseLoader:
             logger.error(f"Database connection failed: {e}")
             return False
     
+    def new_engine(self, connection):
+        """CopyEngine on ``connection``, maintaining the summary tables if enabled"""
+        engine = CopyEngine(connection, self.chunk_rows, self.commit_chunks)
+        if self.aggregates:
+            engine.merge_hooks = merge_hooks()
+        return engine
+    
     def disconnect(self):
         """Close database connection"""
         if self.cursor:
@@ -124,7 +196,21 @@ class FitnessCenterDatabaseLoader:
             
             # Re-enable foreign key checks
             self.cursor.execute("SET session_replication_role = DEFAULT;")
+            
+            # Watermarks and fingerprints describe rows that no longer exist
+            self.cursor.execute("SELECT to_regclass(%s), to_regclass(%s)",
+                                (WATERMARK_TABLE, FINGERPRINT_TABLE))
+            watermark_table, fingerprint_table = self.cursor.fetchone()
+            if watermark_table:
+                self.cursor.execute(f"DELETE FROM {WATERMARK_TABLE} WHERE table_name = ANY(%s)",
+                                    (self.load_order,))
+            if fingerprint_table:
+                FingerprintStore(self.connection).clear(self.load_order)
+            # So do the summaries built from them
+            AggregateMaintainer(self.connection).clear()
+            
             self.connection.commit()
+            self.truncated = True
             
             logger.info("All tables truncated successfully")
             
@@ -133,152 +219,483 @@ class FitnessCenterDatabaseLoader:
             self.connection.rollback()
             raise
     
-    def load_csv_data(self, data_dir="generated_data"):
-        """Load data from CSV files in dependency order"""
-        logger.info(f"Loading data from {data_dir}...")
+    def load_csv_data(self, data_dir="generated_data", workers=1):
+        """
+        Load data from source files in dependency order
         
-        total_records = 0
+        Args:
+            data_dir: Directory containing a <table>.parquet, .arrow, .feather,
+                      .ipc or .csv file per table (the first found is loaded)
+            workers: Tables loaded concurrently; independent tables run in
+                     parallel over a connection pool when greater than 1
+        """
+        logger.info(f"Loading data from {data_dir}...")
         
+        csv_files = {}
         for table_name in self.load_order:
-            csv_file = os.path.join(data_dir, f"{table_name}.csv")
+            csv_file = find_source_file(data_dir, table_name)
             
-            if not os.path.exists(csv_file):
-                logger.warning(f"CSV file not found: {csv_file}")
+            if csv_file is None:
+                logger.warning(f"Source file not found: {os.path.join(data_dir, table_name)}"
+                               f"{{{','.join(SOURCE_EXTENSIONS)}}}")
                 continue
             
-            try:
-                # Read CSV
-                df = pd.read_csv(csv_file)
-                
-                if len(df) == 0:
-                    logger.warning(f"No data in {csv_file}")
-                    continue
-                
-                # Load into database
-                records_loaded = self.load_table_data(table_name, df)
-                total_records += records_loaded
-                
-                logger.info(f"Loaded {records_loaded:,} records into {table_name}")
-                
-            except Exception as e:
-                logger.error(f"Error loading {table_name}: {e}")
-                raise
+            csv_files[table_name] = csv_file
         
+        journal = LoadJournal(self.connection, self.run_id)
+        journal.ensure_table()
+        if self.resume:
+            entries = journal.entries()
+            if not entries:
+                raise ValueError(f"No load journal found for run {self.run_id}")
+            completed = [table_name for table_name in csv_files
+                         if entries.get(table_name, {}).get('status') == 'complete']
+            for table_name in completed:
+                del csv_files[table_name]
+            logger.info(f"Resuming run {self.run_id}: skipping {len(completed)} completed tables")
+        else:
+            logger.info(f"Journaling run {self.run_id}; continue it with --resume {self.run_id} if it fails")
+        self.connection.commit()
+        
+        if self.incremental:
+            WatermarkStore(self.connection).ensure_table()
+            self.connection.commit()
+            logger.info(f"Incremental load {self.run_id}")
+        
+        if self.changed_only:
+            FingerprintStore(self.connection).ensure_table()
+            self.connection.commit()
+            logger.info("Loading only new and changed rows (fingerprint mode)")
+        
+        if self.aggregates:
+            AggregateMaintainer(self.connection).ensure_tables()
+            logger.info("Maintaining summary tables from each loaded chunk")
+        
+        if self.quarantine:
+            self.schema_constraints = parse_schema_constraints()
+            logger.info(f"Quarantining bad records to {os.path.abspath(self.error_dir)}")
+        
+        deferral = None
+        if self.defer_constraints and csv_files:
+            deferral = ConstraintDeferral(self.connection, list(csv_files), {'dsn': self.database_url},
+                                          max(workers, DEFAULT_REBUILD_WORKERS))
+            dropped = deferral.drop()
+            logger.info(f"Deferred {dropped} indexes and constraints until the load finishes")
+        
+        try:
+            loaded = self.load_tables(csv_files, workers)
+        except Exception:
+            if deferral is not None:
+                # Put the definitions back before reporting the load failure
+                try:
+                    self.restore_constraints(deferral)
+                except Exception as e:
+                    logger.error(f"Could not restore deferred constraints: {e}")
+            raise
+        
+        if deferral is not None:
+            self.restore_constraints(deferral)
+        
+        total_records = sum(loaded.values())
         logger.info(f"Total records loaded: {total_records:,}")
         return total_records
     
+    def load_tables(self, csv_files, workers):
+        """Load {table: csv_file} in dependency order; returns {table: records loaded}"""
+        if workers > 1:
+            return self.load_tables_parallel(csv_files, workers)
+        return {
+            table_name: self.load_table_file(table_name, csv_file)
+            for table_name, csv_file in csv_files.items()
+        }
+    
+    def restore_constraints(self, deferral=None):
+        """Rebuild deferred indexes and constraints (all pending ones by default)"""
+        deferral = deferral or ConstraintDeferral(self.connection, None, {'dsn': self.database_url},
+                                                  DEFAULT_REBUILD_WORKERS)
+        # The load may have replaced a dropped main connection
+        deferral.connection = self.connection
+        result = deferral.restore()
+        steps = ', '.join(f"{step} {seconds:.2f}s" for step, seconds in result['steps'].items())
+        logger.info(f"Restored {result['restored']} indexes and constraints ({steps})")
+        return result
+    
+    def load_table_file(self, table_name, csv_file, engine=None):
+        """
+        Load one CSV file, logging the outcome; returns records loaded
+        
+        If the connection drops, a new one is opened and the table continues
+        from its last journaled commit, up to ``reconnect_retries`` times.
+        """
+        current = engine
+        resume = None
+        try:
+            for attempt in range(self.reconnect_retries + 1):
+                try:
+                    # Stream CSV chunks straight into COPY
+                    records_loaded = self.load_csv_file(table_name, csv_file, current, resume)
+                    break
+                except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                    if not (current or self.copy_engine).connection.closed or attempt == self.reconnect_retries:
+                        raise
+                    logger.warning(f"{table_name}: connection lost ({str(e).strip()}), "
+                                   f"reconnecting to continue from the last commit")
+                    current = self.reconnect(current)
+                    resume = True
+            
+            if records_loaded == 0:
+                logger.warning(f"No data in {csv_file}")
+            else:
+                logger.info(f"Loaded {records_loaded:,} records into {table_name}")
+            return records_loaded
+            
+        except Exception as e:
+            logger.error(f"Error loading {table_name}: {e}")
+            raise
+        finally:
+            # Connections opened to replace a pooled one are not the pool's
+            if current is not engine and current is not self.copy_engine:
+                current.connection.close()
+    
+    def reconnect(self, engine=None):
+        """Replace the dropped connection of ``engine`` (default: the main one); returns the new engine"""
+        if engine is None or engine is self.copy_engine:
+            if not self.connect():
+                raise psycopg2.OperationalError("Could not reconnect to the database")
+            return None if engine is None else self.copy_engine
+        return self.new_engine(psycopg2.connect(self.database_url))
+    
+    def table_dependencies(self):
+        """Foreign key dependencies from the live catalog, else from the schema file"""
+        try:
+            dependencies = fetch_fk_dependencies(self.cursor)
+            self.connection.commit()
+        except psycopg2.Error as e:
+            logger.warning(f"Could not read foreign keys from catalog: {e}")
+            self.connection.rollback()
+            dependencies = {}
+        
+        if not dependencies:
+            logger.info(f"Using foreign keys from {SCHEMA_FILE}")
+            dependencies = parse_schema_dependencies()
+        return dependencies
+    
+    def load_tables_parallel(self, csv_files, workers):
+        """Load tables concurrently over a connection pool, following the FK DAG"""
+        dependencies = self.table_dependencies()
+        pool = ThreadedConnectionPool(1, workers, self.database_url)
+        logger.info(f"Loading {len(csv_files)} tables with {workers} workers")
+        
+        def load_table(table_name):
+            connection = pool.getconn()
+            try:
+                engine = self.new_engine(connection)
+                return self.load_table_file(table_name, csv_files[table_name], engine)
+            finally:
+                pool.putconn(connection)
+        
+        try:
+            return run_in_dependency_order(list(csv_files), dependencies, load_table, workers)
+        finally:
+            pool.closeall()
+    
+    def load_csv_file(self, table_name, csv_file, engine=None, resume=None):
+        """
+        Stream a CSV file into a table in bounded chunks, committing as configured
+        
+        Progress is journaled under the run id. With ``resume`` (default: the
+        loader's setting) a plain COPY continues from the byte offset of its
+        last journaled commit; the other load paths are atomic or upserts and
+        start the file again.
+        """
+        engine = engine or self.copy_engine
+        resume = self.resume if resume is None else resume
+        partitions = PartitionManager(engine.connection)
+        period_load = self.period is not None and partitions.partition_key(table_name) is not None
+        columnar = is_columnar(csv_file)
+        if columnar and (period_load or self.incremental or self.changed_only or self.quarantine):
+            raise ValueError(f"{table_name}: Parquet/Arrow input is only supported for plain loads; "
+                             f"use CSV for --period, --incremental, --changed-only and --quarantine")
+        # The tolerant path isolates bad rows chunk by chunk on one connection
+        parallel = (not self.quarantine and not columnar and self.copy_processes > 1 and
+                    os.path.getsize(csv_file) >= self.parallel_copy_mb * 1024 * 1024)
+        watermark_column = None
+        if self.incremental:
+            watermark_column = find_watermark_column(pd.read_csv(csv_file, nrows=0).columns)
+            if watermark_column is None:
+                logger.info(f"{table_name}: no watermark column, inserting new keys only")
+        if not period_load:
+            # Monthly partitions the file needs are created before any row is sent
+            created = partitions.ensure_for_file(table_name, csv_file, self.chunk_rows)
+            if created:
+                logger.info(f"{table_name}: created partitions for {', '.join(map(str, created))}")
+        
+        plain_copy = not (period_load or self.changed_only or watermark_column is not None or
+                          parallel or self.quarantine)
+        checkpoint = self.start_journal(engine.connection, table_name, csv_file, resume and plain_copy)
+        try:
+            if period_load:
+                stats = self.copy_csv_period(partitions, table_name, csv_file, engine)
+            elif self.changed_only:
+                stats = self.copy_csv_changes(table_name, csv_file, engine)
+            elif watermark_column is not None:
+                stats = self.copy_csv_delta(table_name, csv_file, watermark_column, engine)
+            elif parallel:
+                # Split the file into byte ranges COPYed by separate processes
+                stats = parallel_copy_file(engine, {'dsn': self.database_url}, table_name, csv_file,
+                                           self.copy_processes, on_conflict='nothing')
+                if stats['processes'] == 1:
+                    logger.info(f"{table_name}: {csv_file} has line breaks inside quoted fields; "
+                                f"loaded it from one process")
+            elif self.quarantine:
+                stats = self.copy_csv(engine, table_name, csv_file, on_conflict='nothing')
+            elif columnar:
+                # Typed columns go straight to binary COPY
+                stats = copy_columnar_file(engine, table_name, csv_file, on_conflict='nothing',
+                                           checkpoint=checkpoint,
+                                           skip_rows=checkpoint.rows)
+            else:
+                stats = engine.copy_file(table_name, csv_file, on_conflict='nothing',
+                                         checkpoint=checkpoint,
+                                         start_offset=checkpoint.start_offset)
+            checkpoint.journal.complete(table_name)
+            engine.connection.commit()
+        except Exception as e:
+            logger.error(f"Error inserting data into {table_name}: {e}")
+            if not engine.connection.closed:
+                engine.connection.rollback()
+            raise
+        
+        self.record_table_stats(table_name, stats)
+        return stats['rows']
+    
+    def start_journal(self, connection, table_name, csv_file, resume, checksum=None):
+        """
+        Journal the start of a table load and commit it
+        
+        A CSV file with line breaks inside quoted fields is journaled without
+        byte offsets and always starts again from its first row.
+        
+        Args:
+            connection: Connection the table is loaded over
+            table_name: Table being loaded
+            csv_file: Its source CSV file
+            resume: Continue from the table's last journaled commit instead
+                    of starting the file again
+            checksum: file_checksum() of ``csv_file`` if already computed
+        
+        Returns:
+            TableCheckpoint positioned after the rows already committed
+        """
+        offsets = not is_columnar(csv_file)
+        if offsets and has_quoted_newlines(csv_file):
+            offsets = False
+            if resume:
+                logger.info(f"{table_name}: {csv_file} has line breaks inside quoted fields; "
+                            f"loading it again from the start")
+            resume = False
+        journal = LoadJournal(connection, self.run_id)
+        entry = journal.start(table_name, csv_file, checksum or file_checksum(csv_file),
+                              restart=not resume)
+        connection.commit()
+        checkpoint = TableCheckpoint(journal, table_name, csv_file, entry, offsets=offsets)
+        if checkpoint.start_offset:
+            logger.info(f"{table_name}: resuming after {entry['rows_committed']:,} rows "
+                        f"({entry['chunks_committed']} chunks) committed by run {self.run_id}")
+        return checkpoint
+    
+    def record_table_stats(self, table_name, stats):
+        """Keep, log and add to the run metrics the stats of one loaded table"""
+        self.table_stats[table_name] = stats
+        peak_rss = f"{stats['peak_rss_mb']:.1f} MB" if stats['peak_rss_mb'] is not None else "n/a"
+        logger.info(
+            f"{table_name}: {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+            f"({stats['rows_per_sec']:,.0f} rows/s, {stats['chunks']} chunks, "
+            f"{stats['commits']} commits, peak RSS {peak_rss})"
+        )
+        self.metrics.record(table_name, stats)
+        if stats.get('phases'):
+            logger.info(f"{table_name} phases: {format_phases(stats['phases'])}")
+        if not self.changed_only and stats['inserted'] < stats['rows']:
+            logger.info(f"Skipped {stats['rows'] - stats['inserted']:,} existing records in {table_name}")
+        if stats.get('rejected'):
+            logger.warning(f"{table_name}: {stats['rejected']:,} bad records written to {stats['reject_file']}")
+    
+    def copy_csv(self, engine, table_name, csv_file, transform=None, on_conflict='nothing',
+                 on_reject=None):
+        """COPY a CSV file through the engine, quarantining bad rows when enabled"""
+        if not self.quarantine:
+            return engine.copy_file(table_name, csv_file, transform=transform, on_conflict=on_conflict)
+        
+        writer = RejectWriter(self.error_dir, self.run_id, table_name, on_reject)
+        validator = ChunkValidator(table_name, self.schema_constraints.get(table_name),
+                                   engine.connection)
+        if validator.constraints:
+            # Rows the delta or change filter drops are never sent; don't quarantine them
+            transform = QuarantineFilter(validator, writer, transform)
+        
+        stats = engine.copy_file_tolerant(table_name, csv_file, writer.write,
+                                          transform=transform, on_conflict=on_conflict)
+        # Rows caught by the validator never reached the engine's own count
+        stats['rejected'] = writer.rows
+        stats['reject_file'] = writer.path
+        return stats
+    
+    def copy_csv_period(self, partitions, table_name, csv_file, engine):
+        """Replace one month of a partitioned table by loading and attaching a new partition"""
+        stats = partitions.load_period(engine, table_name, csv_file, self.period)
+        action = 'Replaced' if stats['replaced'] else 'Attached'
+        logger.info(f"{action} partition {stats['partition']} with {stats['rows']:,} of "
+                    f"{stats['rows_read']:,} rows in {self.period}")
+        
+        maintainer = AggregateMaintainer(engine.connection)
+        summaries = maintainer.fed_by(table_name) if self.aggregates else []
+        if summaries:
+            # The swapped partition bypassed the merge hooks; recompute its month,
+            # plus the next day for visits running past midnight
+            drift = maintainer.reconcile(self.period.start_time.date(),
+                                         self.period.end_time.date() + pd.Timedelta(days=1),
+                                         summaries, repair=True)
+            logger.info(f"{table_name}: recomputed {sum(map(len, drift.values())):,} summary rows "
+                        f"of {self.period} in {', '.join(summaries)}")
+        return stats
+    
+    def copy_csv_delta(self, table_name, csv_file, watermark_column, engine):
+        """Upsert the rows of a CSV file newer than the table's high-water mark"""
+        store = WatermarkStore(engine.connection)
+        delta = DeltaFilter(watermark_column, store.get(table_name))
+        
+        stats = self.copy_csv(engine, table_name, csv_file, transform=delta, on_conflict='update',
+                              on_reject=delta.reject)
+        if delta.watermark is not None:
+            # Only rows from the old watermark on can have introduced orphans
+            self.verify_scope[table_name] = (watermark_column, '>=', delta.watermark.to_pydatetime())
+        # The mark covers the rows merged; rejects are replayed from their bad-record file
+        store.set(table_name, watermark_column, delta.high_water_mark, self.run_id, stats['rows'])
+        engine.connection.commit()
+        
+        logger.info(
+            f"{table_name}: {delta.rows_kept:,} of {delta.rows_seen:,} rows changed since "
+            f"{delta.watermark or 'first load'}, high-water mark now {delta.high_water_mark}"
+        )
+        return stats
+    
+    def copy_csv_changes(self, table_name, csv_file, engine):
+        """Upsert the rows of a CSV snapshot that are new or whose fingerprint changed"""
+        store = FingerprintStore(engine.connection)
+        with engine.connection.cursor() as cursor:
+            key_columns = primary_key_columns(cursor, table_name)
+            column_types = column_data_types(cursor, table_name)
+        if not key_columns:
+            raise ValueError(f"Table {table_name} has no primary key to fingerprint on")
+        
+        changes = ChangeFilter(key_columns, store.load(table_name), column_types)
+        stats = self.copy_csv(engine, table_name, csv_file, transform=changes, on_conflict='update',
+                              on_reject=changes.reject)
+        store.save(engine, changes.changed_fingerprints(table_name))
+        engine.connection.commit()
+        
+        stats.update(inserted=changes.inserted, updated=changes.updated, unchanged=changes.unchanged)
+        logger.info(
+            f"{table_name}: {changes.inserted:,} new, {changes.updated:,} changed, "
+            f"{changes.unchanged:,} unchanged"
+        )
+        return stats
+    
     def load_table_data(self, table_name, df):
         """Load DataFrame into specific table"""
         if len(df) == 0:
             return 0
         
+        return self.copy_table_chunks(table_name, list(df.columns), [df])
+    
+    def copy_table_chunks(self, table_name, columns, chunks):
+        """COPY chunks into a table via staging, skipping existing keys"""
         try:
-            # Prepare column names and placeholders
-            columns = list(df.columns)
-            placeholders = ', '.join(['%s'] * len(columns))
-            
-            # Convert DataFrame to list of tuples
-            data_tuples = []
-            for _, row in df.iterrows():
-                # Convert values to appropriate types
-                row_data = []
-                for value in row:
-                    if pd.isna(value):
-                        row_data.append(None)
-                    elif isinstance(value, (pd.Timestamp, datetime)):
-                        row_data.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
-                    else:
-                        row_data.append(value)
-                data_tuples.append(tuple(row_data))
-            
-            # Build INSERT query
-            insert_query = f"""
-                INSERT INTO {table_name} ({', '.join(columns)})
-                VALUES %s
-                ON CONFLICT DO NOTHING
-            """
-            
-            # Execute batch insert
-            execute_values(
-                self.cursor, 
-                insert_query, 
-                data_tuples,
-                template=None,
-                page_size=1000
+            rows_read, rows_inserted = self.copy_engine.copy_chunks(
+                table_name, columns, chunks, on_conflict='nothing'
             )
-            
             self.connection.commit()
-            return len(data_tuples)
+            
+            if rows_inserted < rows_read:
+                logger.info(f"Skipped {rows_read - rows_inserted:,} existing records in {table_name}")
+            return rows_read
             
         except Exception as e:
             logger.error(f"Error inserting data into {table_name}: {e}")
             self.connection.rollback()
             raise
     
-    def verify_data_integrity(self):
-        """Verify loaded data integrity and relationships"""
-        logger.info("Verifying data integrity...")
+    def verify_data_integrity(self, workers=DEFAULT_CHECK_WORKERS):
+        """
+        Check every foreign key for orphaned rows
         
-        integrity_checks = {
-            'facilities': "SELECT COUNT(*) FROM facilities WHERE isactive = true",
-            'members': "SELECT COUNT(*) FROM members WHERE memberstatus = 'Active'",
-            'staff': "SELECT COUNT(*) FROM staff WHERE status = 'Active'",
-            'member_membership_integrity': """
-                SELECT COUNT(*) FROM membermemberships mm 
-                JOIN members m ON mm.memberid = m.memberid 
-                JOIN membershiptypes mt ON mm.membershiptypeid = mt.membershiptypeid
-            """,
-            'class_enrollment_integrity': """
-                SELECT COUNT(*) FROM classenrollments ce
-                JOIN classinstances ci ON ce.instanceid = ci.instanceid
-                JOIN classschedules cs ON ci.scheduleid = cs.scheduleid
-                JOIN members m ON ce.memberid = m.memberid
-            """,
-            'payment_integrity': """
-                SELECT COUNT(*) FROM memberpayments mp
-                JOIN membermemberships mm ON mp.membershipid = mm.membershipid
-                JOIN members m ON mp.memberid = m.memberid
-            """
-        }
+        Checks are generated from the catalog and run concurrently. After a
+        load only the tables loaded in this run are checked, and after an
+        incremental load only their rows past the previous watermark.
+        
+        Returns:
+            List of per-constraint results (see IntegrityChecker.run)
+        """
+        logger.info("Verifying data integrity...")
         
-        results = {}
+        checker = IntegrityChecker(self.connection, {'dsn': self.database_url},
+                                   workers=workers, schema_file=SCHEMA_FILE)
+        tables = list(self.table_stats) or None
+        results = checker.run(tables, self.verify_scope)
         
-        for check_name, query in integrity_checks.items():
-            try:
-                self.cursor.execute(query)
-                count = self.cursor.fetchone()[0]
-                results[check_name] = count
-                logger.info(f"{check_name}: {count:,} records")
-                
-            except Exception as e:
-                logger.error(f"Integrity check failed for {check_name}: {e}")
-                results[check_name] = "ERROR"
+        for result in results:
+            if result.get('error'):
+                logger.error(f"Integrity check failed: {format_result(result)}")
+            elif result['violations']:
+                logger.warning(format_result(result))
+            else:
+                logger.info(f"{format_result(result)} ({result['seconds']:.2f}s)")
         
+        violated = sum(1 for result in results if result['violations'] or result.get('error'))
+        logger.info(f"{len(results)} foreign keys checked, {violated} with problems")
         return results
     
-    def generate_summary_report(self):
-        """Generate data loading summary report"""
+    def write_metrics(self, metrics_file=DEFAULT_METRICS_FILE, prometheus_file=None):
+        """Append per-table metrics as JSON lines and optionally export them for Prometheus"""
+        if not self.metrics.records:
+            return
+        self.metrics.write_jsonl(metrics_file)
+        logger.info(f"Load metrics appended to {metrics_file}")
+        if prometheus_file:
+            self.metrics.write_prometheus(prometheus_file)
+            logger.info(f"Prometheus metrics written to {prometheus_file}")
+    
+    def loaded_counts(self):
+        """Exact table sizes known from this run's row accounting (tables reloaded after a truncate)"""
+        if not self.truncated:
+            return {}
+        return {table_name: stats['inserted'] for table_name, stats in self.table_stats.items()}
+    
+    def generate_summary_report(self, exact_counts=False):
+        """
+        Generate data loading summary report
+        
+        Args:
+            exact_counts: COUNT(*) tables this run did not reload (concurrently)
+                          instead of using planner statistics estimates
+        """
         logger.info("Generating summary report...")
         
         try:
-            # Get record counts for all tables
-            table_counts = {}
-            
-            for table_name in self.load_order:
-                try:
-                    self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                    count = self.cursor.fetchone()[0]
-                    table_counts[table_name] = count
-                except Exception as e:
-                    logger.warning(f"Could not get count for {table_name}: {e}")
-                    table_counts[table_name] = 0
+            # Exact sizes from the run's own accounting, estimates for the rest
+            summary = TableSummary(self.connection, {'dsn': self.database_url})
+            counts = summary.row_counts(self.load_order, self.loaded_counts(), exact_counts)
+            table_counts = {table_name: count or 0 for table_name, (count, _) in counts.items()}
             
             # Generate report
             report = {
                 'load_date': datetime.now().isoformat(),
                 'database_url': self.database_url.replace(self.database_url.split('@')[0].split('//')[1], '***'),
                 'table_counts': table_counts,
+                'count_sources': {table_name: source for table_name, (_, source) in counts.items()},
                 'total_records': sum(table_counts.values()),
+                'load_stats': self.table_stats,
                 'integrity_checks': self.verify_data_integrity()
             }
             
@@ -298,12 +715,14 @@ class FitnessCenterDatabaseLoader:
             print("\nTable Record Counts:")
             print("-"*30)
             
-            for table, count in table_counts.items():
-                if count > 0:
-                    print(f"{table:25}: {count:>8,}")
+            for table, (count, source) in counts.items():
+                if count:
+                    print(f"{table:25}: {format_count(count, source):>9}")
             
             print("-"*30)
-            print(f"{'TOTAL':25}: {report['total_records']:>8,}")
+            print(f"{'TOTAL':25}: {report['total_records']:>9,}")
+            if 'estimate' in report['count_sources'].values():
+                print("(~ planner statistics estimate)")
             print("="*50)
             
             return report
@@ -313,24 +732,93 @@ class FitnessCenterDatabaseLoader:
             return None
 
 
-def main():
-    """Main execution function"""
+def main(loader_class=FitnessCenterDatabaseLoader):
+    """
+    Main execution function
+    
+    Args:
+        loader_class: Loader backend driven by the command line
+    """
     import argparse
     
     parser = argparse.ArgumentParser(description='Load fitness center data into PostgreSQL')
     parser.add_argument('--data-dir', default='generated_data', 
-                       help='Directory containing CSV files')
+                       help='Directory containing <table>.csv, .parquet or .arrow files')
     parser.add_argument('--database-url', 
                        help='PostgreSQL connection string')
     parser.add_argument('--truncate', action='store_true',
                        help='Truncate tables before loading')
     parser.add_argument('--verify-only', action='store_true',
                        help='Only verify data integrity, do not load')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                       help=f'Rows read and loaded per chunk (default: {DEFAULT_CHUNK_ROWS})')
+    parser.add_argument('--commit-chunks', type=int, default=DEFAULT_COMMIT_CHUNKS,
+                       help='Commit after this many chunks (default: once per table)')
+    change_mode = parser.add_mutually_exclusive_group()
+    change_mode.add_argument('--incremental', action='store_true',
+                       help='Upsert only rows newer than each table\'s stored lastmodified watermark')
+    change_mode.add_argument('--changed-only', action='store_true',
+                       help='Upsert only rows whose content fingerprint is new or changed')
+    parser.add_argument('--run-id',
+                       help='Run identifier recorded with watermarks and the load journal '
+                            '(default: run_<epoch ms>, logged at startup for --resume)')
+    parser.add_argument('--resume', metavar='RUN_ID',
+                       help='Continue a failed run: skip its completed tables and continue a '
+                            'partially loaded table from its last committed chunk')
+    parser.add_argument('--reconnect-retries', type=int, default=DEFAULT_RECONNECT_RETRIES,
+                       help='Times a table load reconnects and continues after losing its '
+                            f'connection (default: {DEFAULT_RECONNECT_RETRIES})')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Tables loaded in parallel over a connection pool (default: 1)')
+    parser.add_argument('--copy-processes', type=int, default=1,
+                       help='Processes used to COPY a single large CSV file (default: 1)')
+    parser.add_argument('--parallel-copy-mb', type=int, default=DEFAULT_PARALLEL_COPY_MB,
+                       help=f'Minimum file size for a parallel COPY (default: {DEFAULT_PARALLEL_COPY_MB} MB)')
+    parser.add_argument('--quarantine', action='store_true',
+                       help='Write rows that fail validation to bad-record files and load the rest')
+    parser.add_argument('--error-dir', default=ERROR_DIR,
+                       help='Directory for bad-record files (default: etl/loads/error)')
+    parser.add_argument('--defer-constraints', action='store_true',
+                       help='With --truncate: drop indexes and constraints during the load, '
+                            'then rebuild indexes in parallel and validate constraints')
+    parser.add_argument('--restore-constraints', action='store_true',
+                       help='Only rebuild indexes and constraints left over by a failed deferred load')
+    parser.add_argument('--period', type=parse_month, metavar='YYYY-MM',
+                       help='Reload one month of the partitioned fact tables by attaching a freshly '
+                            'loaded partition; other tables are loaded as usual')
+    parser.add_argument('--aggregates', action='store_true',
+                       help='Maintain the occupancy, class fill and equipment utilization summary '
+                            'tables from each loaded chunk (see aggregates.py)')
+    parser.add_argument('--exact-counts', action='store_true',
+                       help='COUNT(*) tables not reloaded by this run in the summary report '
+                            '(default: statistics estimates)')
+    parser.add_argument('--metrics-file', default=DEFAULT_METRICS_FILE,
+                       help=f'JSON-lines file per-table load metrics are appended to (default: {DEFAULT_METRICS_FILE})')
+    parser.add_argument('--prometheus-file',
+                       help='Also write metrics to this Prometheus textfile-collector file (*.prom)')
     
     args = parser.parse_args()
+    if args.defer_constraints and not args.truncate:
+        parser.error("--defer-constraints is only supported together with --truncate")
+    if args.defer_constraints and (args.incremental or args.changed_only):
+        parser.error("--defer-constraints cannot be combined with upserting load modes")
+    if args.period and (args.truncate or args.incremental or args.changed_only or args.quarantine):
+        parser.error("--period cannot be combined with --truncate, --incremental, --changed-only "
+                     "or --quarantine")
+    if args.resume and args.truncate:
+        parser.error("--resume cannot be combined with --truncate")
+    if args.resume and args.run_id and args.run_id != args.resume:
+        parser.error("--resume already sets the run id")
     
     # Initialize loader
-    loader = FitnessCenterDatabaseLoader(args.database_url)
+    loader = loader_class(args.database_url, args.chunk_rows, args.commit_chunks,
+                          args.copy_processes, args.parallel_copy_mb,
+                          args.incremental, args.resume or args.run_id,
+                          args.changed_only, args.quarantine, args.error_dir,
+                          args.defer_constraints, args.period,
+                          resume=bool(args.resume),
+                          reconnect_retries=args.reconnect_retries,
+                          aggregates=args.aggregates)
     
     try:
         # Connect to database
@@ -338,9 +826,10 @@ def main():
             sys.exit(1)
         
         if args.verify_only:
-            # Only run verification
-            loader.verify_data_integrity()
-            loader.generate_summary_report()
+            # Only run verification (the summary report runs the integrity checks)
+            loader.generate_summary_report(args.exact_counts)
+        elif args.restore_constraints:
+            loader.restore_constraints()
         else:
             # Truncate if requested
             if args.truncate:
@@ -352,10 +841,13 @@ def main():
                     sys.exit(0)
             
             # Load data
-            loader.load_csv_data(args.data_dir)
+            try:
+                loader.load_csv_data(args.data_dir, args.workers)
+            finally:
+                loader.write_metrics(args.metrics_file, args.prometheus_file)
             
             # Generate report
-            loader.generate_summary_report()
+            loader.generate_summary_report(args.exact_counts)
         
     except KeyboardInterrupt:
         logger.info("Loading cancelled by user")
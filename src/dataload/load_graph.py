@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Foreign Key Dependency Graph
+
+Builds the table dependency DAG from the live catalog (``pg_constraint``)
+or from ``src/sql/FitnessCenter_ODS_Schema.sql`` and runs table loads
+concurrently (on threads, or as asyncio tasks), starting each table as soon
+as every table it references has finished loading.
+
+Author: Fitness Center Analytics Team
+"""
+
+import os
+import re
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# ODS schema shipped with the repository
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           '..', 'sql', 'FitnessCenter_ODS_Schema.sql')
+
+
+def fetch_fk_dependencies(cursor, schema='public'):
+    """
+    Read foreign key dependencies for one schema from pg_constraint
+
+    Returns:
+        Dict mapping lower-case table name to the set of tables it references
+    """
+    cursor.execute("""
+        SELECT child.relname, parent.relname
+        FROM pg_constraint con
+        JOIN pg_class child ON child.oid = con.conrelid
+        JOIN pg_class parent ON parent.oid = con.confrelid
+        JOIN pg_namespace ns ON ns.oid = child.relnamespace
+        WHERE con.contype = 'f' AND ns.nspname = %s
+    """, (schema,))
+
+    dependencies = {}
+    for child, parent in cursor.fetchall():
+        dependencies.setdefault(child.lower(), set()).add(parent.lower())
+    return dependencies
+
+
+def parse_schema_dependencies(schema_file=SCHEMA_FILE):
+    """
+    Read foreign key dependencies from the CREATE TABLE statements of a schema file
+
+    Returns:
+        Dict mapping lower-case table name to the set of tables it references
+    """
+    with open(schema_file) as f:
+        sql = re.sub(r'--[^\n]*', '', f.read())
+
+    dependencies = {}
+    for match in re.finditer(r'CREATE\s+TABLE\s+(\w+)\s*\((.*?)\n\);', sql, re.IGNORECASE | re.DOTALL):
+        table_name = match.group(1).lower()
+        parents = {p.lower() for p in re.findall(r'REFERENCES\s+(\w+)', match.group(2), re.IGNORECASE)}
+        dependencies[table_name] = parents
+    return dependencies
+
+
+def chain_dependencies(tables):
+    """Dependencies that make each table wait for the one before it (serial order)"""
+    return {table: {previous} for previous, table in zip(tables, tables[1:])}
+
+
+def run_in_dependency_order(tables, dependencies, load_table, workers):
+    """
+    Call ``load_table(table)`` for every table, concurrently where the DAG allows
+
+    A table starts once all tables it depends on that are also in ``tables``
+    have finished; dependencies outside ``tables`` are treated as satisfied.
+    Self-references are ignored. Ties are broken by the order of ``tables``.
+    On the first failure no new tables are started, running loads are
+    allowed to finish and the error is re-raised.
+
+    Args:
+        tables: Tables to load, in preferred order
+        dependencies: Dict mapping table to the set of tables it references
+        load_table: Function called with a table name; its result is collected
+        workers: Maximum number of tables loaded at the same time
+
+    Returns:
+        Dict mapping table name to the value returned by load_table
+    """
+    pending = list(tables)
+    wanted = set(pending)
+    waiting_on = {
+        table: (set(dependencies.get(table, ())) & wanted) - {table}
+        for table in pending
+    }
+    results = {}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while pending or running:
+            ready = [t for t in pending if not waiting_on[t]]
+            for table in ready[:max(1, workers) - len(running)]:
+                pending.remove(table)
+                running[executor.submit(load_table, table)] = table
+
+            if not running:
+                raise ValueError(f"Circular foreign key dependencies among: {', '.join(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    pending.clear()
+                    wait(running)
+                    raise error
+                results[table] = future.result()
+                for remaining in pending:
+                    waiting_on[remaining].discard(table)
+
+    return results
+
+
+async def run_in_dependency_order_async(tables, dependencies, load_table, workers):
+    """
+    Await ``load_table(table)`` for every table, concurrently where the DAG allows
+
+    The asyncio counterpart of run_in_dependency_order, with the same
+    ordering and failure semantics.
+
+    Args:
+        tables: Tables to load, in preferred order
+        dependencies: Dict mapping table to the set of tables it references
+        load_table: Coroutine function called with a table name
+        workers: Maximum number of tables loaded at the same time
+
+    Returns:
+        Dict mapping table name to the value returned by load_table
+    """
+    pending = list(tables)
+    wanted = set(pending)
+    waiting_on = {
+        table: (set(dependencies.get(table, ())) & wanted) - {table}
+        for table in pending
+    }
+    results = {}
+    running = {}
+
+    while pending or running:
+        ready = [t for t in pending if not waiting_on[t]]
+        for table in ready[:max(1, workers) - len(running)]:
+            pending.remove(table)
+            running[asyncio.ensure_future(load_table(table))] = table
+
+        if not running:
+            raise ValueError(f"Circular foreign key dependencies among: {', '.join(pending)}")
+
+        done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            table = running.pop(task)
+            error = task.exception()
+            if error is not None:
+                pending.clear()
+                if running:
+                    await asyncio.wait(running)
+                raise error
+            results[table] = task.result()
+            for remaining in pending:
+                waiting_on[remaining].discard(table)
+
+    return results
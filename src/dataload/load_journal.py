@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Resumable Load Journal
+
+Records the progress of every table a run loads in a control table: the
+source file and its checksum, and the chunks, rows and byte offset
+committed so far. The journal row of a chunk batch is written in the same
+transaction as the batch itself, so the journal never claims more (or
+less) than what is actually in the table.
+
+A run started again with ``--resume <run_id>`` skips the tables the journal
+marks complete and continues a partially loaded table by seeking its source
+file to the last committed byte offset.
+
+Offsets are found by counting newlines, which only works while every data
+row is on a single line (true for every generated and ODS extract file). A
+CSV file with line breaks inside quoted fields is journaled without offsets
+and loaded again from its start when resumed.
+
+Author: Fitness Center Analytics Team
+"""
+
+import hashlib
+
+import numpy as np
+
+# Control table holding one progress row per run and table
+JOURNAL_TABLE = 'etl_load_journal'
+
+# Bytes read at a time when hashing files and locating line offsets
+READ_BLOCK_BYTES = 16 * 1024 * 1024
+
+# Times a table load reconnects and resumes after losing its connection
+DEFAULT_RECONNECT_RETRIES = 3
+
+
+def file_checksum(path):
+    """SHA-256 hex digest of a file, read in bounded blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def line_offset(path, lines, start=0):
+    """
+    Byte offset just past ``lines`` newline-terminated lines from ``start``
+
+    Args:
+        path: Text file
+        lines: Number of lines to skip
+        start: Byte offset of the first line to skip
+
+    Returns:
+        Offset of the line following them (the file size if it ends first)
+    """
+    if lines <= 0:
+        return start
+    offset = start
+    with open(path, 'rb') as f:
+        f.seek(start)
+        for block in iter(lambda: f.read(READ_BLOCK_BYTES), b''):
+            found = block.count(b'\n')
+            if found >= lines:
+                newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n'))
+                return offset + int(newlines[lines - 1]) + 1
+            lines -= found
+            offset += len(block)
+    return offset
+
+
+def has_quoted_newlines(path):
+    """
+    True if a line break occurs inside a quoted field of a CSV file
+
+    Rows of such a file can span several lines, so newline counts are not
+    row counts and line_offset() (or split_byte_ranges()) can land inside a
+    row. Quote parity is tracked with a vectorized XOR scan per block.
+    """
+    quote, newline = ord('"'), ord('\n')
+    inside = False
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_BYTES), b''):
+            if b'"' not in block:
+                if inside and b'\n' in block:
+                    return True
+                continue
+            data = np.frombuffer(block, dtype=np.uint8)
+            # True where an odd number of quotes precedes the byte ("" escapes cancel out)
+            parity = np.bitwise_xor.accumulate(data == quote) ^ inside
+            if parity[data == newline].any():
+                return True
+            inside = bool(parity[-1])
+    return False
+
+
+class LoadJournal:
+    """Reads and writes a run's per-table load progress in a control table"""
+
+    def __init__(self, connection, run_id, control_table=JOURNAL_TABLE):
+        """
+        Args:
+            connection: Open psycopg2 connection; the caller owns commits
+            run_id: Run whose progress is journaled
+            control_table: Name of the control table (may be schema-qualified)
+        """
+        self.connection = connection
+        self.run_id = run_id
+        self.control_table = control_table
+
+    def ensure_table(self):
+        """Create the control table if it does not exist"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.control_table} (
+                    run_id VARCHAR(50) NOT NULL,
+                    table_name VARCHAR(100) NOT NULL,
+                    source_file TEXT NOT NULL,
+                    file_checksum CHAR(64) NOT NULL,
+                    status VARCHAR(20) NOT NULL DEFAULT 'loading',
+                    chunks_committed INT NOT NULL DEFAULT 0,
+                    rows_committed BIGINT NOT NULL DEFAULT 0,
+                    byte_offset BIGINT NOT NULL DEFAULT 0,
+                    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (run_id, table_name)
+                )
+            """)
+
+    def entries(self):
+        """Journal rows of the run as {table: dict}"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT table_name, source_file, file_checksum, status,
+                       chunks_committed, rows_committed, byte_offset
+                FROM {self.control_table}
+                WHERE run_id = %s
+            """, (self.run_id,))
+            columns = [desc[0] for desc in cursor.description]
+            return {row[0]: dict(zip(columns, row)) for row in cursor.fetchall()}
+
+    def start(self, table_name, source_file, checksum, restart=False):
+        """
+        Begin (or continue) journaling a table
+
+        Args:
+            table_name: Table being loaded
+            source_file: Path of its source file
+            checksum: file_checksum() of the source file
+            restart: Discard any progress already recorded for the table
+                     (its rows will be loaded again from the start)
+
+        Returns:
+            The table's journal row as a dict
+
+        Raises:
+            ValueError: If the run journaled a different version of the file
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {self.control_table} (run_id, table_name, source_file, file_checksum)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (run_id, table_name) DO NOTHING
+            """, (self.run_id, table_name, source_file, checksum))
+        entry = self.entries()[table_name]
+
+        if restart:
+            with self.connection.cursor() as cursor:
+                cursor.execute(f"""
+                    UPDATE {self.control_table}
+                    SET source_file = %s, file_checksum = %s, status = 'loading',
+                        chunks_committed = 0, rows_committed = 0, byte_offset = 0,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE run_id = %s AND table_name = %s
+                """, (source_file, checksum, self.run_id, table_name))
+            entry.update(source_file=source_file, file_checksum=checksum, status='loading',
+                         chunks_committed=0, rows_committed=0, byte_offset=0)
+        elif entry['file_checksum'] != checksum:
+            raise ValueError(
+                f"{source_file} changed since run {self.run_id} loaded part of it into "
+                f"{table_name}; start a new run instead of resuming"
+            )
+        return entry
+
+    def checkpoint(self, table_name, chunks, rows, byte_offset):
+        """Record committed progress; call inside the transaction that loaded it"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {self.control_table}
+                SET chunks_committed = %s, rows_committed = %s, byte_offset = %s,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE run_id = %s AND table_name = %s
+            """, (chunks, rows, byte_offset, self.run_id, table_name))
+
+    def complete(self, table_name):
+        """Mark a table as fully loaded"""
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {self.control_table}
+                SET status = 'complete', updated_at = CURRENT_TIMESTAMP
+                WHERE run_id = %s AND table_name = %s
+            """, (self.run_id, table_name))
+
+
+class TableCheckpoint:
+    """CopyEngine checkpoint callback that advances a table's journal row"""
+
+    def __init__(self, journal, table_name, csv_path, entry, offsets=True):
+        """
+        Args:
+            journal: LoadJournal on the connection the rows are loaded over
+            table_name: Table being loaded
+            csv_path: Its source file
+            entry: The table's journal row, as returned by LoadJournal.start
+            offsets: Track byte offsets (CSV); columnar sources resume by
+                     skipping ``rows`` rows instead
+        """
+        self.journal = journal
+        self.table_name = table_name
+        self.csv_path = csv_path
+        self.offsets = offsets
+        self.chunks = entry['chunks_committed']
+        self.rows = entry['rows_committed']
+        # Offset 0 means nothing committed yet: data starts after the header
+        self.start_offset = entry['byte_offset'] if offsets else 0
+        self._offset = (self.start_offset or line_offset(csv_path, 1)) if offsets else 0
+        self._rows_read = 0
+
+    def __call__(self, rows_read, chunks_read):
+        """
+        Journal progress before the engine commits a batch
+
+        Args:
+            rows_read: Source rows read since start_offset, committed batches included
+            chunks_read: Source chunks read since start_offset
+        """
+        self.journal.checkpoint(self.table_name, *self.advance(rows_read, chunks_read))
+
+    def advance(self, rows_read, chunks_read):
+        """Move past newly read rows; returns the (chunks, rows, byte_offset) to journal"""
+        if self.offsets:
+            self._offset = line_offset(self.csv_path, rows_read - self._rows_read, self._offset)
+        self._rows_read = rows_read
+        return self.chunks + chunks_read, self.rows + rows_read, self._offset
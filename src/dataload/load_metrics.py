@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Load Instrumentation and Run Metrics
+
+Per-table, per-phase timers for the COPY loaders and writers for their
+results. Phases are timed exclusively, so nested work is charged to the
+innermost phase only:
+
+    parse      pandas CSV parsing
+    transform  chunk cleaning / filtering / validation
+    encode     type conversion and COPY CSV encoding
+    copy       network transfer and server-side COPY ingest
+    merge      staging INSERT ... SELECT (constraint and index checks)
+    commit     transaction commit
+
+Every loaded table becomes one JSON-lines record appended to a metrics file,
+and optionally a gauge set in a Prometheus textfile-collector file.
+
+Author: Fitness Center Analytics Team
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Load phases in pipeline order
+PHASES = ('parse', 'transform', 'encode', 'copy', 'merge', 'commit')
+
+# Default JSON-lines metrics file, appended to on every run
+DEFAULT_METRICS_FILE = 'load_metrics.jsonl'
+
+# Prefix of every exported Prometheus metric
+PROMETHEUS_PREFIX = 'fitness_load'
+
+# Per-table counters copied from loader stats into metric records
+COUNTERS = ('rows', 'inserted', 'bytes', 'chunks', 'commits', 'retries', 'rejected')
+
+
+class PhaseTimer:
+    """Accumulates exclusive wall time per load phase"""
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self._stack = []
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block; time spent in nested phases is charged to them instead"""
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed - frame[1]
+            if self._stack:
+                self._stack[-1][1] += elapsed
+
+    def timed(self, iterable, name):
+        """Wrap an iterator so producing each item is charged to ``name``"""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def merge(self, seconds):
+        """Add phase seconds reported by another timer (e.g. a worker process)"""
+        for name, value in seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + value
+
+    def summary(self):
+        """Phase seconds rounded for reporting"""
+        return {name: round(value, 6) for name, value in self.seconds.items()}
+
+
+class LoadMetrics:
+    """Collects per-table load statistics for one run and writes them out"""
+
+    def __init__(self, run_id, loader):
+        """
+        Args:
+            run_id: Identifier of the load run
+            loader: Name of the loader producing the metrics
+        """
+        self.run_id = run_id
+        self.loader = loader
+        self.records = []
+
+    def record(self, table_name, stats):
+        """Add one table's stats dict (as returned by CopyEngine.copy_file)"""
+        record = {
+            'timestamp': datetime.now().isoformat(),
+            'run_id': self.run_id,
+            'loader': self.loader,
+            'table': table_name,
+        }
+        for name in COUNTERS:
+            record[name] = stats.get(name, 0)
+        record['seconds'] = round(stats.get('seconds', 0.0), 6)
+        record['rows_per_sec'] = round(stats.get('rows_per_sec', 0.0), 1)
+        record['peak_rss_mb'] = stats.get('peak_rss_mb')
+        record['processes'] = stats.get('processes', 1)
+        record['phases'] = stats.get('phases', {})
+        self.records.append(record)
+        return record
+
+    def write_jsonl(self, path=DEFAULT_METRICS_FILE):
+        """Append one JSON line per recorded table"""
+        with open(path, 'a') as f:
+            for record in self.records:
+                f.write(json.dumps(record) + '\n')
+        return path
+
+    def prometheus_text(self):
+        """Records in Prometheus text exposition format"""
+        gauges = {
+            'rows': ('Rows read from the source file', []),
+            'inserted': ('Rows written to the target table', []),
+            'bytes': ('COPY bytes sent', []),
+            'chunks': ('Chunks streamed', []),
+            'commits': ('Transactions committed', []),
+            'retries': ('Chunk retries while isolating bad rows', []),
+            'rejected': ('Rows rejected to bad-record files', []),
+            'seconds': ('Wall time of the table load', []),
+            'rows_per_sec': ('Load throughput', []),
+            'peak_rss_bytes': ('Peak resident set size', []),
+            'phase_seconds': ('Exclusive wall time per load phase', []),
+        }
+        for record in self.records:
+            labels = f'loader="{self.loader}",table="{record["table"]}"'
+            for name in COUNTERS + ('seconds', 'rows_per_sec'):
+                gauges[name][1].append((labels, record[name]))
+            if record['peak_rss_mb'] is not None:
+                gauges['peak_rss_bytes'][1].append((labels, int(record['peak_rss_mb'] * 1024 * 1024)))
+            for phase, seconds in record['phases'].items():
+                gauges['phase_seconds'][1].append((f'{labels},phase="{phase}"', seconds))
+
+        lines = []
+        for name, (help_text, samples) in gauges.items():
+            metric = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            lines.extend(f"{metric}{{{labels}}} {value}" for labels, value in samples)
+        metric = f"{PROMETHEUS_PREFIX}_last_run_timestamp_seconds"
+        lines.append(f"# HELP {metric} Completion time of the last load run")
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f'{metric}{{loader="{self.loader}"}} {time.time():.0f}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Replace a textfile-collector file atomically (write then rename)"""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
+        return path
+
+
+def format_phases(phases):
+    """One-line ``phase=seconds`` summary of the phases that took any time"""
+    return ', '.join(f"{name} {seconds:.2f}s" for name, seconds in phases.items() if seconds >= 0.005)
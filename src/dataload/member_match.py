@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Member De-duplication and Match Engine
+
+Finds members entered more than once (e.g. MEM000008 and MEM000508 in
+``etl/loads/output/members-run_1762728487224.csv``: same name, date of
+birth, phone and email, different address) before ``members`` is loaded.
+
+1. Blocking - candidate pairs are only generated between members sharing a
+   blocking key (normalized email, phone digits, or name + date of birth),
+   with a hash join per key instead of comparing every pair of members.
+2. Scoring - every candidate pair is scored at once with NumPy comparisons
+   of the normalized fields; pairs scoring at least the threshold match.
+3. Clustering - matched pairs are merged into clusters (connected
+   components found by vectorized label propagation).
+4. Survivorship - each cluster keeps the member with the earliest join date
+   (lowest member id on ties) as the surviving id. Its attributes are the
+   most recently modified non-empty values in the cluster.
+
+The result is one golden row per cluster and a cross-reference mapping
+every source member id to its survivor.
+
+Works with the generated (``memberid``, ``dateofbirth``, ...), ODS
+(``member_id``, ``date_of_birth``, ...) and ETL snapshot column names.
+
+Author: Fitness Center Analytics Team
+"""
+
+import os
+import sys
+import time
+import logging
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Field -> accepted source column names
+FIELD_COLUMNS = {
+    'member_id': ('member_id', 'memberid'),
+    'first_name': ('first_name', 'firstname'),
+    'last_name': ('last_name', 'lastname'),
+    'email': ('email',),
+    'phone': ('phone',),
+    'date_of_birth': ('date_of_birth', 'dateofbirth'),
+    'join_date': ('join_date', 'joindate'),
+    'last_modified': ('last_modified', 'lastmodified'),
+}
+
+# Weight of each agreeing field in a pair's score (they sum to 1)
+MATCH_WEIGHTS = {
+    'email': 0.35,
+    'phone': 0.25,
+    'date_of_birth': 0.20,
+    'first_name': 0.10,
+    'last_name': 0.10,
+}
+
+# Blocking keys: members sharing one of these become candidate pairs
+BLOCKING_KEYS = ('email', 'phone', 'name_dob')
+
+# Minimum score of a matching pair
+DEFAULT_THRESHOLD = 0.75
+
+# Blocks larger than this (e.g. a shared front-desk phone) are not paired
+DEFAULT_MAX_BLOCK_SIZE = 50
+
+# Digits of a phone number that are compared (drops the +1 country code)
+PHONE_DIGITS = 10
+
+
+def find_columns(columns):
+    """
+    Map match fields to the source columns that hold them
+
+    Raises:
+        ValueError: If there is no member id column
+    """
+    lowered = {column.lower(): column for column in columns}
+    found = {}
+    for field, names in FIELD_COLUMNS.items():
+        for name in names:
+            if name in lowered:
+                found[field] = lowered[name]
+                break
+    if 'member_id' not in found:
+        raise ValueError("No member id column (member_id or memberid) found")
+    return found
+
+
+def parse_dates(series):
+    """Parse ISO (yyyy-mm-dd ...) or ETL (dd-mm-yyyy) dates; NaT if neither"""
+    iso = pd.to_datetime(series, errors='coerce', format='ISO8601')
+    day_first = pd.to_datetime(series, errors='coerce', format='%d-%m-%Y')
+    return iso.fillna(day_first)
+
+
+def normalize(members, columns):
+    """
+    Normalized match fields of every member
+
+    Returns:
+        DataFrame with a column per available match field plus ``name_dob``;
+        empty values are NA
+    """
+    def text(field):
+        if field not in columns:
+            return pd.Series(pd.NA, index=members.index, dtype=object)
+        return members[columns[field]].astype('string').str.strip().str.lower().replace('', pd.NA)
+
+    fields = pd.DataFrame(index=members.index)
+    fields['email'] = text('email')
+    digits = text('phone').str.replace(r'\D', '', regex=True).str[-PHONE_DIGITS:]
+    fields['phone'] = digits.where(digits.str.len() >= 7)
+    fields['first_name'] = text('first_name').str.replace(r'[^a-z]', '', regex=True).replace('', pd.NA)
+    fields['last_name'] = text('last_name').str.replace(r'[^a-z]', '', regex=True).replace('', pd.NA)
+    if 'date_of_birth' in columns:
+        fields['date_of_birth'] = parse_dates(members[columns['date_of_birth']]).dt.strftime('%Y-%m-%d')
+    else:
+        fields['date_of_birth'] = pd.NA
+    fields['name_dob'] = fields['first_name'] + '|' + fields['last_name'] + '|' + fields['date_of_birth']
+    return fields.astype(object).where(fields.notna(), None)
+
+
+def block_pairs(keys, max_block_size=DEFAULT_MAX_BLOCK_SIZE):
+    """
+    Candidate pairs of rows sharing a blocking key value
+
+    Args:
+        keys: Blocking key per row (None = no key)
+        max_block_size: Blocks with more rows are skipped
+
+    Returns:
+        Tuple of (left rows, right rows, blocks skipped); left < right
+    """
+    codes, _ = pd.factorize(np.asarray(keys, dtype=object), use_na_sentinel=True)
+    rows = np.flatnonzero(codes >= 0)
+    codes = codes[rows]
+    sizes = np.bincount(codes) if len(codes) else np.zeros(0, dtype=np.int64)
+    keep = (sizes[codes] >= 2) & (sizes[codes] <= max_block_size)
+
+    block = pd.DataFrame({'code': codes[keep], 'row': rows[keep]})
+    pairs = block.merge(block, on='code')
+    pairs = pairs[pairs['row_x'] < pairs['row_y']]
+    return pairs['row_x'].to_numpy(), pairs['row_y'].to_numpy(), int((sizes > max_block_size).sum())
+
+
+def connected_components(count, left, right):
+    """Component label (smallest row in the component) of each of ``count`` rows"""
+    labels = np.arange(count)
+    while True:
+        low = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, low)
+        np.minimum.at(updated, right, low)
+        # Pointer jumping shortens chains between passes
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+class MemberMatcher:
+    """Blocks, scores, clusters and merges duplicate member records"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, max_block_size=DEFAULT_MAX_BLOCK_SIZE,
+                 weights=MATCH_WEIGHTS, blocking_keys=BLOCKING_KEYS):
+        """
+        Initialize the matcher
+
+        Args:
+            threshold: Minimum pair score for a match
+            max_block_size: Largest block paired exhaustively
+            weights: Score weight per agreeing field
+            blocking_keys: Normalized fields used to generate candidates
+        """
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self.weights = weights
+        self.blocking_keys = blocking_keys
+
+    def candidates(self, fields):
+        """Unique candidate pairs over all blocking keys as (left, right) row arrays"""
+        lefts, rights = [], []
+        for key in self.blocking_keys:
+            left, right, skipped = block_pairs(fields[key].to_numpy(), self.max_block_size)
+            if skipped:
+                logger.warning(f"Skipped {skipped} {key} blocks larger than {self.max_block_size} members")
+            lefts.append(left)
+            rights.append(right)
+        pair_ids = np.unique(np.concatenate(lefts).astype(np.int64) * len(fields) +
+                             np.concatenate(rights))
+        return pair_ids // len(fields), pair_ids % len(fields)
+
+    def score(self, fields, left, right):
+        """Score of each candidate pair: sum of the weights of the fields both members share"""
+        scores = np.zeros(len(left))
+        for field, weight in self.weights.items():
+            values = fields[field].to_numpy()
+            a, b = values[left], values[right]
+            scores += weight * (pd.notna(a) & (a == b))
+        return scores
+
+    def survivorship(self, members, columns, labels):
+        """
+        Surviving member id and golden attributes of every cluster
+
+        Returns:
+            Tuple of (survivor id per row, golden DataFrame in source columns)
+        """
+        id_column = columns['member_id']
+        order = pd.DataFrame({
+            'label': labels,
+            'join': (parse_dates(members[columns['join_date']]) if 'join_date' in columns
+                     else pd.Series(pd.NaT, index=members.index)).to_numpy(),
+            'member_id': members[id_column].astype(str).to_numpy(),
+        })
+        # Earliest join date (then lowest id) keeps its member id
+        first = order.sort_values(['label', 'join', 'member_id'], na_position='last').drop_duplicates('label')
+        survivor_of = pd.Series(first['member_id'].to_numpy(), index=first['label'].to_numpy())
+        survivor_ids = survivor_of.reindex(labels).to_numpy()
+
+        # Attributes: most recently modified non-empty value in the cluster
+        modified = (parse_dates(members[columns['last_modified']]) if 'last_modified' in columns
+                    else pd.Series(pd.NaT, index=members.index))
+        recent = members.assign(_label=labels, _modified=modified.to_numpy(), _row=np.arange(len(members)))
+        recent = recent.sort_values(['_label', '_modified', '_row'], na_position='first')
+        golden = recent.replace('', None).groupby('_label', sort=True).last()
+        golden[id_column] = survivor_of.reindex(golden.index).to_numpy()
+        golden = golden[list(members.columns)].reset_index(drop=True)
+        return survivor_ids, golden
+
+    def match(self, members):
+        """
+        De-duplicate a members DataFrame
+
+        Returns:
+            Dict with ``golden`` (one row per cluster, source columns),
+            ``xref`` (member_id, survivor_id, is_survivor, match_score),
+            ``pairs`` (scored candidate pairs) and counts
+        """
+        start = time.perf_counter()
+        members = members.reset_index(drop=True)
+        columns = find_columns(members.columns)
+        fields = normalize(members, columns)
+
+        left, right = self.candidates(fields)
+        scores = self.score(fields, left, right)
+        matched = scores >= self.threshold
+        labels = connected_components(len(members), left[matched], right[matched])
+        survivor_ids, golden = self.survivorship(members, columns, labels)
+
+        member_ids = members[columns['member_id']].astype(str).to_numpy()
+        best = np.zeros(len(members))
+        np.maximum.at(best, left[matched], scores[matched])
+        np.maximum.at(best, right[matched], scores[matched])
+        xref = pd.DataFrame({
+            'member_id': member_ids,
+            'survivor_id': survivor_ids,
+            'is_survivor': member_ids == survivor_ids,
+            'match_score': best.round(3),
+        })
+        pairs = pd.DataFrame({
+            'member_id': member_ids[left],
+            'candidate_id': member_ids[right],
+            'score': scores.round(3),
+            'matched': matched,
+        })
+
+        result = {
+            'golden': golden,
+            'xref': xref,
+            'pairs': pairs,
+            'members': len(members),
+            'candidates': len(pairs),
+            'duplicates': int((~xref['is_survivor']).sum()),
+            'seconds': time.perf_counter() - start,
+        }
+        logger.info(f"Matched {result['members']:,} members: {result['candidates']:,} candidate pairs, "
+                    f"{int(matched.sum()):,} matches, {result['duplicates']:,} duplicates merged "
+                    f"into {len(golden):,} golden records in {result['seconds']:.2f}s")
+        return result
+
+
+def main():
+    """Main execution function"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='De-duplicate a members file before it is loaded')
+    parser.add_argument('members_file', help='Members CSV (generated, ODS or ETL snapshot layout)')
+    parser.add_argument('--output-dir',
+                       help='Directory for <name>-golden.csv, <name>-xref.csv and '
+                            '<name>-pairs.csv (default: next to the input)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help=f'Minimum pair score for a match (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--max-block-size', type=int, default=DEFAULT_MAX_BLOCK_SIZE,
+                       help=f'Largest blocking group paired (default: {DEFAULT_MAX_BLOCK_SIZE})')
+
+    args = parser.parse_args()
+
+    try:
+        members = pd.read_csv(args.members_file, dtype=str, keep_default_na=False)
+        result = MemberMatcher(args.threshold, args.max_block_size).match(members)
+
+        output_dir = args.output_dir or os.path.dirname(os.path.abspath(args.members_file))
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(args.members_file))[0]
+        for name in ('golden', 'xref', 'pairs'):
+            path = os.path.join(output_dir, f"{stem}-{name}.csv")
+            result[name].to_csv(path, index=False)
+            logger.info(f"Wrote {path}")
+    except Exception as e:
+        logger.error(f"Member matching failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Intra-table Parallel COPY
+
+Splits one large CSV file into line-aligned byte ranges (found through
+mmap, so the file is never re-read to locate boundaries) and COPYs every
+range from its own process over its own connection. Workers only write to
+an unlogged staging table created for the load (a temporary table would not
+be visible to their sessions) and dropped after it; the target table is
+touched once, by a single ``INSERT ... SELECT`` finalize step on the
+coordinating connection, so the load is all-or-nothing.
+
+Ranges are aligned on newlines, which only matches row boundaries while no
+quoted field contains a line break (true for every generated and ODS
+extract file). Files with such fields are COPYed by the calling process
+instead.
+
+Author: Fitness Center Analytics Team
+"""
+
+import io
+import os
+import mmap
+import time
+import uuid
+import multiprocessing
+import psycopg2
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from copy_engine import CopyEngine, peak_rss_mb
+from load_journal import has_quoted_newlines
+from load_metrics import PhaseTimer
+
+# Files at least this large are split across processes
+DEFAULT_PARALLEL_COPY_MB = 64
+
+
+class _MmapRange(io.RawIOBase):
+    """Read-only raw stream over ``[start, end)`` of a memory-mapped file"""
+
+    def __init__(self, mm, start, end):
+        self._mm = mm
+        self._pos = start
+        self._end = end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._end - self._pos)
+        if size <= 0:
+            return 0
+        buffer[:size] = self._mm[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+
+def split_byte_ranges(csv_path, parts):
+    """
+    Split a CSV file into up to ``parts`` line-aligned byte ranges
+
+    Args:
+        csv_path: CSV file with a header line
+        parts: Desired number of ranges
+
+    Returns:
+        List of (start, end) offsets covering every data line exactly once;
+        the header line is excluded
+    """
+    with open(csv_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return []
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end = mm.find(b'\n') + 1
+            if header_end == 0:
+                return []
+
+            bounds = [header_end]
+            step = (size - header_end) / max(1, parts)
+            for i in range(1, parts):
+                pos = mm.find(b'\n', max(bounds[-1], int(header_end + step * i)))
+                if pos == -1 or pos + 1 >= size:
+                    break
+                bounds.append(pos + 1)
+            bounds.append(size)
+
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def create_load_staging(cursor, table_name):
+    """
+    Create an unlogged staging table shared by one load's workers
+
+    The name is unique per load, so concurrent loads of the same table
+    never share or truncate each other's staging table.
+
+    Returns:
+        Name of the new staging table
+    """
+    staging_table = f"{table_name}__staging_{uuid.uuid4().hex[:8]}"
+    cursor.execute(f"CREATE UNLOGGED TABLE {staging_table} (LIKE {table_name} INCLUDING DEFAULTS)")
+    return staging_table
+
+
+def copy_byte_range(connect_kwargs, staging_table, columns, csv_path, start, end,
+                    chunk_rows, transform=None):
+    """
+    Process worker: COPY one byte range of a CSV file into the staging table
+
+    Returns:
+        Dict with rows, chunks, bytes, peak_rss_mb and phases for the range
+    """
+    connection = psycopg2.connect(**connect_kwargs)
+    try:
+        with open(csv_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = io.TextIOWrapper(io.BufferedReader(_MmapRange(mm, start, end)), encoding='utf-8')
+            engine = CopyEngine(connection, chunk_rows)
+            chunks = engine.timed_chunks(
+                pd.read_csv(text, header=None, names=columns, chunksize=chunk_rows), transform
+            )
+            with connection.cursor() as cursor:
+                stream = engine.copy_stream(cursor, staging_table, columns, chunks)
+            engine.commit()
+
+        return {
+            'rows': stream.rows,
+            'chunks': stream.chunks,
+            'bytes': stream.bytes,
+            'peak_rss_mb': peak_rss_mb(),
+            'phases': engine.timer.seconds,
+        }
+    finally:
+        connection.close()
+
+
+def parallel_copy_file(engine, connect_kwargs, table_name, csv_path, processes,
+                       transform=None, on_conflict=None):
+    """
+    COPY a large CSV file into a table using several processes
+
+    Phase one fills a staging table created for the load from ``processes``
+    workers in parallel. Phase two, run only if every worker succeeded, moves
+    the staged rows into the target in one transaction on
+    ``engine.connection``. The staging table is dropped either way; on any
+    failure the target is left untouched. A file with line breaks inside
+    quoted fields cannot be split on newlines and is loaded with
+    ``engine.copy_file`` instead.
+
+    Args:
+        engine: CopyEngine of the coordinating connection
+        connect_kwargs: psycopg2.connect() keyword arguments for workers
+        table_name: Target table
+        csv_path: Source CSV file with a header row matching table columns
+        processes: Number of byte ranges / worker processes
+        transform: Optional picklable function applied to each DataFrame chunk
+        on_conflict: None to insert every row, or 'nothing' to skip existing keys
+
+    Returns:
+        Dict with the same keys as CopyEngine.copy_file plus processes; phase
+        seconds are summed over the workers
+    """
+    if has_quoted_newlines(csv_path):
+        stats = engine.copy_file(table_name, csv_path, transform=transform, on_conflict=on_conflict)
+        stats['processes'] = 1
+        return stats
+
+    start_time = time.perf_counter()
+    engine.timer = PhaseTimer()
+    columns = list(pd.read_csv(csv_path, nrows=0).columns)
+    ranges = split_byte_ranges(csv_path, processes)
+
+    with engine.connection.cursor() as cursor:
+        staging_table = create_load_staging(cursor, table_name)
+    engine.connection.commit()
+
+    try:
+        # Workers are spawned, not forked: the caller may run in a thread pool
+        # whose other threads hold libpq, logging or pandas locks
+        with ProcessPoolExecutor(max_workers=max(1, len(ranges)),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [
+                executor.submit(copy_byte_range, connect_kwargs, staging_table, columns,
+                                csv_path, start, end, engine.chunk_rows, transform)
+                for start, end in ranges
+            ]
+            parts = [future.result() for future in futures]
+
+        with engine.connection.cursor() as cursor:
+            inserted = engine.merge_staging(cursor, table_name, staging_table, columns, on_conflict)
+        engine.commit()
+
+    except Exception:
+        engine.connection.rollback()
+        raise
+
+    finally:
+        with engine.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {staging_table}")
+        engine.connection.commit()
+
+    for part in parts:
+        engine.timer.merge(part['phases'])
+    rows = sum(part['rows'] for part in parts)
+    seconds = time.perf_counter() - start_time
+    worker_peaks = [part['peak_rss_mb'] for part in parts if part['peak_rss_mb'] is not None]
+    return {
+        'rows': rows,
+        'inserted': inserted,
+        'chunks': sum(part['chunks'] for part in parts),
+        'bytes': sum(part['bytes'] for part in parts),
+        'commits': len(parts) + 1,
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds else 0.0,
+        'peak_rss_mb': max(worker_peaks + [peak_rss_mb() or 0.0]) if worker_peaks else peak_rss_mb(),
+        'processes': len(parts),
+        'phases': engine.timer.summary(),
+    }
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Bad-record Quarantine
+
+Error-tolerant loading that keeps bulk speed. Every chunk is validated in
+vectorized form against the column types, NOT NULL, CHECK enums/ranges and
+foreign keys declared in ``src/sql/FitnessCenter_ODS_Schema.sql``; rows that
+fail are written to ``etl/loads/error/<run>-<table>-badrecords.csv`` with a
+``reject_reason`` column and the rest are COPYed. Anything the validator
+cannot see (e.g. table-level CHECKs) is caught by CopyEngine bisecting a
+failed chunk until the offending rows are isolated.
+
+Author: Fitness Center Analytics Team
+"""
+
+import os
+import re
+import numpy as np
+import pandas as pd
+
+from load_graph import SCHEMA_FILE
+
+# Default quarantine directory used by the ETL jobs
+ERROR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         '..', '..', 'etl', 'loads', 'error')
+
+# Column holding the rejection reason in bad-record files
+REASON_COLUMN = 'reject_reason'
+
+# Text values PostgreSQL accepts for BOOLEAN
+BOOLEAN_TEXT = {'t', 'f', 'true', 'false', 'y', 'n', 'yes', 'no', 'on', 'off', '1', '0'}
+
+_QUOTED = r"'((?:[^'\\]|\\.|'')*)'"
+
+
+def _split_top_level(body):
+    """Split a CREATE TABLE body on commas outside parentheses and quotes"""
+    parts, depth, current, quoted = [], 0, [], False
+    i = 0
+    while i < len(body):
+        ch = body[i]
+        if ch == '\\' and quoted:
+            current.append(body[i:i + 2])
+            i += 2
+            continue
+        if ch == "'":
+            quoted = not quoted
+        elif not quoted and ch == '(':
+            depth += 1
+        elif not quoted and ch == ')':
+            depth -= 1
+        elif not quoted and ch == ',' and depth == 0:
+            parts.append(''.join(current).strip())
+            current = []
+            i += 1
+            continue
+        current.append(ch)
+        i += 1
+    if ''.join(current).strip():
+        parts.append(''.join(current).strip())
+    return parts
+
+
+def _unquote(values):
+    """Values of a comma separated list of SQL string literals"""
+    return [v.replace("\\'", "'").replace("''", "'") for v in re.findall(_QUOTED, values)]
+
+
+def parse_schema_constraints(schema_file=SCHEMA_FILE):
+    """
+    Read column-level constraints from the CREATE TABLE statements of a schema file
+
+    Returns:
+        Dict mapping lower-case table name to a dict with ``columns``
+        ({column: (type, length, precision, scale, not_null)}), ``enums``
+        ({column: set}), ``ranges`` ({column: (low, high)}) and
+        ``foreign_keys`` ([(columns, parent_table, parent_columns)])
+    """
+    with open(schema_file) as f:
+        sql = re.sub(r'--[^\n]*', '', f.read())
+
+    tables = {}
+    for match in re.finditer(r'CREATE\s+TABLE\s+(\w+)\s*\((.*?)\n\);', sql, re.IGNORECASE | re.DOTALL):
+        table = {'columns': {}, 'enums': {}, 'ranges': {}, 'foreign_keys': []}
+        tables[match.group(1).lower()] = table
+
+        for part in _split_top_level(match.group(2)):
+            fk = re.match(r'FOREIGN\s+KEY\s*\(([^)]*)\)\s*REFERENCES\s+(\w+)\s*\(([^)]*)\)', part, re.I)
+            if fk:
+                table['foreign_keys'].append((
+                    [c.strip().lower() for c in fk.group(1).split(',')],
+                    fk.group(2).lower(),
+                    [c.strip().lower() for c in fk.group(3).split(',')],
+                ))
+                continue
+            if re.match(r'(PRIMARY\s+KEY|CONSTRAINT|UNIQUE|CHECK)\b', part, re.I):
+                continue
+
+            col = re.match(r'(\w+)\s+(\w+)(?:\s*\((\d+)(?:\s*,\s*(\d+))?\))?', part)
+            if not col:
+                continue
+            name, col_type = col.group(1).lower(), col.group(2).upper()
+            size = int(col.group(3)) if col.group(3) else None
+            scale = int(col.group(4)) if col.group(4) else 0
+            not_null = bool(re.search(r'NOT\s+NULL|PRIMARY\s+KEY', part, re.I))
+            table['columns'][name] = (col_type, size if col_type in ('VARCHAR', 'CHAR') else None,
+                                      size if col_type in ('DECIMAL', 'NUMERIC') else None, scale, not_null)
+
+            enum = re.search(r'CHECK\s*\(\s*\w+\s+IN\s*\((.*?)\)\s*\)', part, re.I | re.S)
+            if enum:
+                table['enums'][name] = set(_unquote(enum.group(1)))
+            between = re.search(r'CHECK\s*\(\s*\w+\s+BETWEEN\s+(-?[\d.]+)\s+AND\s+(-?[\d.]+)\s*\)', part, re.I)
+            if between:
+                table['ranges'][name] = (float(between.group(1)), float(between.group(2)))
+
+            inline_fk = re.search(r'REFERENCES\s+(\w+)\s*\((\w+)\)', part, re.I)
+            if inline_fk:
+                table['foreign_keys'].append(([name], inline_fk.group(1).lower(), [inline_fk.group(2).lower()]))
+    return tables
+
+
+def _key_strings(df, columns):
+    """Composite key values as strings, None where any part is NULL"""
+    parts = [df[col] for col in columns]
+    missing = np.zeros(len(df), dtype=bool)
+    for part in parts:
+        missing |= part.isna().to_numpy()
+    keys = parts[0].astype(str)
+    for part in parts[1:]:
+        keys = keys + '|' + part.astype(str)
+    return keys.to_numpy(dtype=object), missing
+
+
+class ChunkValidator:
+    """Vectorized per-chunk validation against schema constraints"""
+
+    def __init__(self, table_name, constraints, connection=None):
+        """
+        Args:
+            table_name: Target table (lower-case, as in the schema file)
+            constraints: Entry of parse_schema_constraints() for the table
+            connection: Connection used to fetch parent keys for FK checks
+                        (None skips FK existence checks)
+        """
+        self.table_name = table_name
+        self.constraints = constraints
+        self.connection = connection
+        self._parent_keys = {}
+
+    def parent_keys(self, parent_table, parent_columns):
+        """Set of existing parent key strings, fetched once per parent"""
+        cache_key = (parent_table, tuple(parent_columns))
+        if cache_key not in self._parent_keys:
+            with self.connection.cursor() as cursor:
+                cursor.execute(f"SELECT DISTINCT {', '.join(parent_columns)} FROM {parent_table}")
+                keys = pd.DataFrame(cursor.fetchall(), columns=parent_columns)
+            values = _key_strings(keys, parent_columns)[0] if len(keys) else []
+            self._parent_keys[cache_key] = pd.Index(values)
+        return self._parent_keys[cache_key]
+
+    def _type_failures(self, series, col_type, length, precision, scale):
+        """Mask of present values that do not fit the column type"""
+        present = series.notna().to_numpy()
+        if col_type in ('VARCHAR', 'CHAR') and length:
+            return present & (series.astype(str).str.len().to_numpy() > length)
+        if col_type in ('INT', 'INTEGER', 'BIGINT', 'SMALLINT'):
+            numbers = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            return present & (np.isnan(numbers) | (np.floor(numbers) != numbers) | (np.abs(numbers) >= 2**31))
+        if col_type in ('DECIMAL', 'NUMERIC'):
+            numbers = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            bad = np.isnan(numbers)
+            if precision:
+                bad |= np.abs(np.nan_to_num(numbers)) >= 10.0 ** (precision - scale)
+            return present & bad
+        if col_type in ('DATE', 'TIMESTAMP'):
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                return np.zeros(len(series), dtype=bool)
+            parsed = pd.to_datetime(series, errors='coerce', format='ISO8601')
+            retry = parsed.isna().to_numpy() & present
+            if retry.any():
+                parsed[retry] = pd.to_datetime(series[retry], errors='coerce', format='mixed')
+            return present & parsed.isna().to_numpy()
+        if col_type == 'BOOLEAN':
+            if series.dtype == bool:
+                return np.zeros(len(series), dtype=bool)
+            return present & ~series.astype(str).str.strip().str.lower().isin(BOOLEAN_TEXT).to_numpy()
+        return np.zeros(len(series), dtype=bool)
+
+    def validate(self, df):
+        """
+        Split a chunk into valid rows and rejects
+
+        Returns:
+            Tuple of (valid DataFrame, rejected DataFrame with REASON_COLUMN)
+        """
+        reasons = np.full(len(df), '', dtype=object)
+        columns = {str(col).lower(): col for col in df.columns}
+
+        def flag(mask, message):
+            if mask.any():
+                reasons[mask] = reasons[mask] + (message + '; ')
+
+        for name, (col_type, length, precision, scale, not_null) in self.constraints['columns'].items():
+            if name not in columns:
+                continue
+            series = df[columns[name]]
+            if not_null:
+                flag(series.isna().to_numpy(), f"{name}: NULL not allowed")
+            flag(self._type_failures(series, col_type, length, precision, scale),
+                 f"{name}: invalid {col_type.lower()}")
+
+        for name, allowed in self.constraints['enums'].items():
+            if name in columns:
+                series = df[columns[name]]
+                flag((series.notna() & ~series.astype(str).isin(allowed)).to_numpy(),
+                     f"{name}: value not allowed by CHECK")
+
+        for name, (low, high) in self.constraints['ranges'].items():
+            if name in columns:
+                numbers = pd.to_numeric(df[columns[name]], errors='coerce')
+                flag((numbers.notna() & ((numbers < low) | (numbers > high))).to_numpy(),
+                     f"{name}: outside {low:g}..{high:g}")
+
+        if self.connection is not None:
+            for fk_columns, parent_table, parent_columns in self.constraints['foreign_keys']:
+                if parent_table == self.table_name or not all(c in columns for c in fk_columns):
+                    continue
+                keys, missing = _key_strings(df, [columns[c] for c in fk_columns])
+                parents = self.parent_keys(parent_table, parent_columns)
+                flag(~missing & ~pd.Index(keys).isin(parents),
+                     f"{', '.join(fk_columns)}: no matching {parent_table}")
+
+        bad = reasons != ''
+        rejected = df[bad].copy()
+        rejected[REASON_COLUMN] = [r[:-2] for r in reasons[bad]]
+        return df[~bad], rejected
+
+
+class RejectWriter:
+    """Appends rejected rows to ``<error_dir>/<run>-<table>-badrecords.csv``"""
+
+    def __init__(self, error_dir, run_id, table_name, on_reject=None):
+        """
+        Args:
+            error_dir: Directory of the bad-record files
+            run_id: Run the rejects belong to
+            table_name: Target table
+            on_reject: Optional function called with every rejected DataFrame,
+                       e.g. to keep change tracking from recording its rows
+        """
+        self.path = os.path.join(error_dir, f"{run_id}-{table_name}-badrecords.csv")
+        self.on_reject = on_reject
+        self.rows = 0
+
+    def write(self, rejected, reason=None):
+        """Append rejected rows; ``reason`` fills REASON_COLUMN when given"""
+        if len(rejected) == 0:
+            return
+        if reason is not None:
+            rejected = rejected.assign(**{REASON_COLUMN: reason})
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        rejected.to_csv(self.path, mode='a', index=False, header=not os.path.exists(self.path))
+        self.rows += len(rejected)
+        if self.on_reject is not None:
+            self.on_reject(rejected)
+
+
+class QuarantineFilter:
+    """Chunk transform that diverts invalid rows to a RejectWriter"""
+
+    def __init__(self, validator, writer, transform=None):
+        """
+        Args:
+            validator: ChunkValidator of the target table
+            writer: RejectWriter receiving the invalid rows
+            transform: Optional chunk transform applied first, so only the
+                       rows it keeps (e.g. a delta) are validated
+        """
+        self.validator = validator
+        self.writer = writer
+        self.transform = transform
+
+    def __call__(self, df):
+        if self.transform is not None:
+            df = self.transform(df)
+        valid, rejected = self.validator.validate(df)
+        self.writer.write(rejected)
+        return valid
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Fast Table Summary Statistics
+
+Row counts and date ranges for the loaders' summary reports without
+scanning the tables:
+
+- tables a run reloaded after a truncate are counted from the loader's own
+  row accounting (exact)
+- other tables use ``pg_stat_user_tables.n_live_tup`` or
+  ``pg_class.reltuples``, summed over partitions (estimates)
+- date ranges come from an index leading with the column (min/max are read
+  from the index ends), from the bounds of non-empty partitions, or from
+  the column's ``pg_stats`` histogram
+
+The only queries that touch table data - indexed min/max, and COUNT(*) when
+exact counts are asked for - run concurrently on pooled connections.
+
+Author: Fitness Center Analytics Team
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2.pool import ThreadedConnectionPool
+
+from partitions import parse_bounds
+
+# Connections used for the remaining exact queries
+DEFAULT_SUMMARY_WORKERS = 4
+
+
+class TableSummary:
+    """Cheap row counts and date ranges for summary reports"""
+
+    def __init__(self, connection, connect_kwargs, workers=DEFAULT_SUMMARY_WORKERS):
+        """
+        Args:
+            connection: Open psycopg2 connection for catalog and statistics reads
+            connect_kwargs: psycopg2.connect() keyword arguments for the
+                            pooled connections running exact queries
+            workers: Exact queries run at the same time (1 = serially on ``connection``)
+        """
+        self.connection = connection
+        self.connect_kwargs = connect_kwargs
+        self.workers = max(1, workers)
+
+    def _fetch(self, sql, params):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        self.connection.commit()
+        return rows
+
+    def run_queries(self, queries):
+        """
+        Run ``{key: (sql, params)}`` queries concurrently
+
+        Returns:
+            Dict mapping key to the first result row, or to the exception raised
+        """
+        def run(connection, sql, params):
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    return cursor.fetchone()
+            except Exception as e:
+                return e
+            finally:
+                connection.rollback()
+
+        if self.workers == 1 or len(queries) <= 1:
+            return {key: run(self.connection, sql, params) for key, (sql, params) in queries.items()}
+
+        pool = ThreadedConnectionPool(1, min(self.workers, len(queries)), **self.connect_kwargs)
+
+        def run_pooled(item):
+            key, (sql, params) = item
+            connection = pool.getconn()
+            try:
+                return key, run(connection, sql, params)
+            finally:
+                pool.putconn(connection)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                return dict(executor.map(run_pooled, queries.items()))
+        finally:
+            pool.closeall()
+
+    def estimated_counts(self, tables):
+        """
+        Row estimates from the statistics collector and planner statistics
+
+        Partitioned tables are summed over their leaf partitions. Tables that
+        do not exist are left out.
+        """
+        rows = self._fetch("""
+            SELECT t.name,
+                   sum(COALESCE(NULLIF(s.n_live_tup, 0), GREATEST(c.reltuples, 0)))::bigint
+            FROM unnest(%s::text[]) AS t(name)
+            CROSS JOIN LATERAL pg_partition_tree(to_regclass(t.name)) AS tree
+            JOIN pg_class c ON c.oid = tree.relid
+            LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+            WHERE tree.isleaf
+            GROUP BY t.name
+        """, (list(tables),))
+        return dict(rows)
+
+    def row_counts(self, tables, loaded=None, exact=False):
+        """
+        Row count of every table
+
+        Args:
+            tables: Tables to count
+            loaded: Dict of exact row counts the loader already knows (e.g.
+                    rows inserted into a table it truncated first)
+            exact: COUNT(*) the remaining tables, concurrently, instead of
+                   estimating them
+
+        Returns:
+            Dict mapping table to (count, source), source being 'loaded',
+            'exact' or 'estimate'; count is None if the table is missing
+        """
+        loaded = loaded or {}
+        counts = {table: (loaded[table], 'loaded') for table in tables if table in loaded}
+        remaining = [table for table in tables if table not in counts]
+
+        if exact:
+            results = self.run_queries({table: (f"SELECT COUNT(*) FROM {table}", None)
+                                        for table in remaining})
+            for table in remaining:
+                result = results[table]
+                counts[table] = (None, 'error') if isinstance(result, Exception) else (result[0], 'exact')
+        else:
+            estimates = self.estimated_counts(remaining)
+            for table in remaining:
+                counts[table] = (estimates.get(table), 'estimate')
+        return {table: counts[table] for table in tables}
+
+    def _leading_index(self, table, column):
+        """True if an index on ``table`` (or its partitioned parent index) leads with ``column``"""
+        rows = self._fetch("""
+            SELECT 1
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+            WHERE i.indrelid = to_regclass(%s) AND a.attname = %s
+            LIMIT 1
+        """, (table, column))
+        return bool(rows)
+
+    def _partition_range(self, table, column):
+        """(low, high) from the bounds of non-empty partitions keyed on ``column``, else None"""
+        rows = self._fetch("""
+            SELECT pg_get_expr(c.relpartbound, c.oid),
+                   COALESCE(NULLIF(s.n_live_tup, 0), GREATEST(c.reltuples, 0))
+            FROM pg_partitioned_table p
+            JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+            JOIN pg_inherits i ON i.inhparent = p.partrelid
+            JOIN pg_class c ON c.oid = i.inhrelid
+            LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+            WHERE p.partrelid = to_regclass(%s) AND p.partstrat = 'r' AND a.attname = %s
+        """, (table, column))
+        if not rows:
+            return None
+        bounds = [parse_bounds(bound) for bound, rows_estimate in rows if rows_estimate > 0]
+        bounds = [bound for bound in bounds if bound]
+        if not bounds:
+            return (None, None)
+        return min(lower for lower, _ in bounds), max(upper for _, upper in bounds)
+
+    def _histogram_range(self, table, column):
+        """(low, high) from the first and last pg_stats histogram bounds, else None"""
+        rows = self._fetch("""
+            SELECT (s.histogram_bounds::text::text[])[1],
+                   (s.histogram_bounds::text::text[])[array_length(s.histogram_bounds::text::text[], 1)]
+            FROM pg_stats s
+            JOIN pg_namespace n ON n.nspname = s.schemaname
+            JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = s.tablename
+            WHERE c.oid = to_regclass(%s) AND s.attname = %s AND s.histogram_bounds IS NOT NULL
+            ORDER BY s.inherited DESC
+            LIMIT 1
+        """, (table, column))
+        return tuple(rows[0]) if rows else None
+
+    def date_ranges(self, columns):
+        """
+        Min and max of date columns without scanning their tables
+
+        Args:
+            columns: Iterable of (table, column) pairs
+
+        Returns:
+            Dict mapping (table, column) to (low, high, source), source being
+            'index' (exact), 'partitions' (month bounds, upper exclusive),
+            'statistics' (histogram estimate), 'error' or 'unavailable'
+        """
+        ranges = {}
+        indexed = {}
+        for table, column in columns:
+            if self._leading_index(table, column):
+                indexed[(table, column)] = (f"SELECT MIN({column})::text, MAX({column})::text FROM {table}", None)
+                continue
+            partition_range = self._partition_range(table, column)
+            if partition_range is not None:
+                ranges[(table, column)] = partition_range + ('partitions',)
+                continue
+            histogram_range = self._histogram_range(table, column)
+            ranges[(table, column)] = (histogram_range + ('statistics',) if histogram_range
+                                       else (None, None, 'unavailable'))
+
+        for key, result in self.run_queries(indexed).items():
+            ranges[key] = (None, None, 'error') if isinstance(result, Exception) else tuple(result) + ('index',)
+        return {key: ranges[key] for key in columns}
+
+
+def format_count(count, source):
+    """Count for display; estimates are prefixed with '~'"""
+    if count is None:
+        return 'n/a'
+    return f"~{count:,}" if source == 'estimate' else f"{count:,}"
+
+
+def format_range(low, high, source):
+    """Date range for display, noting how it was obtained"""
+    if low is None:
+        return 'n/a'
+    if source == 'partitions':
+        return f"{low} to before {high} (partition bounds)"
+    if source == 'statistics':
+        return f"~{low} to ~{high} (statistics)"
+    return f"{low} to {high}"
@@ -0,0 +1,134 @@
+-- Fitness Center Operational Data Store (ODS) - Partitioned Fact Tables
+-- Time-partitioned variant of the five high-volume event tables
+--
+-- Run after FitnessCenter_ODS_Schema.sql (PostgreSQL 12 or later). The
+-- tables below replace their single-heap versions with tables that are
+-- range partitioned by month on their event date. Column definitions are
+-- unchanged, except that:
+--   * the partition key is NOT NULL and part of the primary key (a unique
+--     constraint on a partitioned table must include the partition key)
+--   * no partitions are created here - the loaders create the monthly
+--     partitions (<table>_pYYYYMM) their data needs, and
+--     src/dataload/partitions.py pre-creates or drops them
+--
+-- Retention and month reloads then become partition operations:
+--   python partitions.py --drop-before 2023-01
+--   python database_loader.py --data-dir generated_data_complete --period 2025-09
+
+-- ================================================
+-- DROP EXISTING TABLES (for refresh)
+-- ================================================
+-- No other table references these, so they can be replaced in any order
+DROP TABLE IF EXISTS StaffTimeTracking CASCADE;
+DROP TABLE IF EXISTS EquipmentUsage CASCADE;
+DROP TABLE IF EXISTS ClassEnrollments CASCADE;
+DROP TABLE IF EXISTS MemberAccess CASCADE;
+DROP TABLE IF EXISTS MemberPayments CASCADE;
+
+-- ================================================
+-- 1. MEMBER MANAGEMENT SYSTEM TABLES
+-- ================================================
+
+-- Member payments, partitioned by payment month
+CREATE TABLE MemberPayments (
+    PaymentID VARCHAR(20) NOT NULL,
+    MemberID VARCHAR(20) NOT NULL,
+    PaymentDate DATE NOT NULL,
+    Amount DECIMAL(10,2) NOT NULL,
+    PaymentType VARCHAR(50) CHECK (PaymentType IN ('Monthly Fee', 'Registration', 'Late Fee', 'Personal Training', 'Other', 'Monthly Membership', 'Membership + Registration')),
+    PaymentMethod VARCHAR(20) CHECK (PaymentMethod IN ('Credit Card', 'Debit Card', 'Bank Transfer', 'Cash', 'Check')),
+    Status VARCHAR(20) DEFAULT 'Completed' CHECK (Status IN ('Completed', 'Pending', 'Failed', 'Refunded')),
+    PRIMARY KEY (PaymentID, PaymentDate),
+    FOREIGN KEY (MemberID) REFERENCES Members(MemberID)
+) PARTITION BY RANGE (PaymentDate);
+
+-- ================================================
+-- 2. FACILITY ACCESS SYSTEM TABLES
+-- ================================================
+
+-- Member check-in/check-out logs, partitioned by check-in month
+CREATE TABLE MemberAccess (
+    AccessID VARCHAR(20) NOT NULL,
+    MemberID VARCHAR(20) NOT NULL,
+    FacilityID VARCHAR(20) NOT NULL,
+    AreaID VARCHAR(20),
+    CheckInTime TIMESTAMP NOT NULL,
+    CheckOutTime TIMESTAMP,
+    AccessMethod VARCHAR(20) CHECK (AccessMethod IN ('Key Card', 'Mobile App', 'Front Desk', 'Biometric', 'Card Scan')),
+    Duration INT, -- calculated in minutes
+    PRIMARY KEY (AccessID, CheckInTime),
+    FOREIGN KEY (MemberID) REFERENCES Members(MemberID),
+    FOREIGN KEY (FacilityID) REFERENCES Facilities(FacilityID),
+    FOREIGN KEY (FacilityID, AreaID) REFERENCES FacilityAreas(FacilityID, AreaID)
+) PARTITION BY RANGE (CheckInTime);
+
+-- ================================================
+-- 3. CLASS BOOKING SYSTEM TABLES
+-- ================================================
+
+-- Class enrollments, partitioned by enrollment month
+CREATE TABLE ClassEnrollments (
+    EnrollmentID VARCHAR(20) NOT NULL,
+    MemberID VARCHAR(20) NOT NULL,
+    InstanceID VARCHAR(20) NOT NULL,
+    EnrollmentDate TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    EnrollmentStatus VARCHAR(20) DEFAULT 'Enrolled' CHECK (EnrollmentStatus IN ('Enrolled', 'Attended', 'No Show', 'Cancelled', 'Waitlisted')),
+    PaymentAmount DECIMAL(8,2) DEFAULT 0,
+    CheckInTime TIMESTAMP,
+    CheckOutTime TIMESTAMP,
+    PRIMARY KEY (EnrollmentID, EnrollmentDate),
+    FOREIGN KEY (MemberID) REFERENCES Members(MemberID),
+    FOREIGN KEY (InstanceID) REFERENCES ClassInstances(InstanceID)
+) PARTITION BY RANGE (EnrollmentDate);
+
+-- ================================================
+-- 4. EQUIPMENT/ROOM USAGE SYSTEM TABLES
+-- ================================================
+
+-- Equipment usage tracking, partitioned by start month
+CREATE TABLE EquipmentUsage (
+    UsageID VARCHAR(20) NOT NULL,
+    EquipmentID VARCHAR(20) NOT NULL,
+    MemberID VARCHAR(20),
+    StartTime TIMESTAMP NOT NULL,
+    EndTime TIMESTAMP,
+    DurationMinutes INT,
+    UsageType VARCHAR(20) CHECK (UsageType IN ('Member Use', 'Maintenance', 'Cleaning', 'Class Use')),
+    Notes TEXT,
+    PRIMARY KEY (UsageID, StartTime),
+    FOREIGN KEY (EquipmentID) REFERENCES Equipment(EquipmentID),
+    FOREIGN KEY (MemberID) REFERENCES Members(MemberID)
+) PARTITION BY RANGE (StartTime);
+
+-- ================================================
+-- 5. STAFF MANAGEMENT SYSTEM TABLES
+-- ================================================
+
+-- Staff actual work hours (time tracking), partitioned by shift start month
+CREATE TABLE StaffTimeTracking (
+    TimeTrackingID VARCHAR(20) NOT NULL,
+    StaffID VARCHAR(20) NOT NULL,
+    ScheduleID VARCHAR(20),
+    ActualStartTime TIMESTAMP NOT NULL,
+    ActualEndTime TIMESTAMP,
+    ActualHours DECIMAL(4,2),
+    OvertimeHours DECIMAL(4,2) DEFAULT 0,
+    BreakMinutes INT DEFAULT 0,
+    Notes TEXT,
+    PRIMARY KEY (TimeTrackingID, ActualStartTime),
+    FOREIGN KEY (StaffID) REFERENCES Staff(StaffID),
+    FOREIGN KEY (ScheduleID) REFERENCES StaffSchedules(ScheduleID)
+) PARTITION BY RANGE (ActualStartTime);
+
+-- ================================================
+-- INDEXES FOR DATE-BOUNDED QUERIES
+-- ================================================
+-- Created on the parent, so every partition (including ones attached by a
+-- period load) gets its own copy
+
+CREATE INDEX idx_memberaccess_member ON MemberAccess(MemberID, CheckInTime);
+CREATE INDEX idx_memberaccess_facility ON MemberAccess(FacilityID, CheckInTime);
+CREATE INDEX idx_memberpayments_member ON MemberPayments(MemberID, PaymentDate);
+CREATE INDEX idx_classenrollments_instance ON ClassEnrollments(InstanceID);
+CREATE INDEX idx_equipmentusage_equipment ON EquipmentUsage(EquipmentID, StartTime);
+CREATE INDEX idx_stafftimetracking_staff ON StaffTimeTracking(StaffID, ActualStartTime);
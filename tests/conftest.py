@@ -0,0 +1,15 @@
+"""
+Shared pytest setup
+
+The src/dataload modules import each other by bare module name, as when a
+loader is run from its own directory, so that directory goes on sys.path.
+None of these tests needs a database.
+
+Author: Fitness Center Analytics Team
+"""
+
+import os
+import sys
+
+DATALOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'dataload')
+sys.path.insert(0, os.path.abspath(DATALOAD_DIR))
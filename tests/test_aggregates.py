@@ -0,0 +1,131 @@
+"""
+Tests for the incrementally maintained summary tables
+
+Author: Fitness Center Analytics Team
+"""
+
+from aggregates import (AGGREGATES, AggregateHook, AggregateMaintainer, apply_deltas, merge_hooks,
+                        source_tables)
+from copy_engine import CopyEngine
+
+VISITS = {
+    'agg_visits': {
+        'columns': "facilityid VARCHAR(20), visit_date DATE, visits INT, PRIMARY KEY (facilityid, visit_date)",
+        'keys': ('facilityid', 'visit_date'),
+        'measures': ('visits',),
+        'attributes': ('facility_name',),
+        'window': "visit_date BETWEEN %(start)s AND %(end)s",
+        'sources': {
+            'memberaccess': {
+                'rows': "SELECT r.facilityid, r.checkintime::date AS visit_date, 1 AS visits FROM {rows} r",
+                'window': "checkintime >= %(start)s AND checkintime < %(end)s::date + 1",
+            },
+        },
+        'attribute_sources': {
+            'facilities': {
+                'rows': "SELECT r.facilityid, d.visit_date, r.name AS facility_name FROM {rows} r "
+                        "CROSS JOIN generate_series(%(start)s::date, %(end)s::date, '1 day') d(visit_date)",
+                'window': "TRUE",
+            },
+        },
+    },
+}
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = []
+        self.rowcount = 3
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.statements.append(' '.join(sql.split()))
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.recording = RecordingCursor()
+
+    def cursor(self):
+        return self.recording
+
+
+def test_source_tables_and_merge_hooks():
+    assert source_tables(VISITS) == {'memberaccess', 'facilities'}
+    assert {'memberaccess', 'classenrollments', 'equipmentusage'} <= source_tables()
+
+    hooks = merge_hooks(VISITS)
+    assert set(hooks) == {'memberaccess', 'facilities'}
+    assert hooks['memberaccess'] is hooks['facilities']
+    assert AggregateHook.delta_tables('ods.memberaccess') == ('ods_memberaccess__agg_new',
+                                                              'ods_memberaccess__agg_old')
+
+
+def test_apply_deltas_subtracts_replaced_rows_and_skips_their_attributes():
+    cursor = RecordingCursor()
+    apply_deltas(cursor, 'memberaccess', 'memberaccess__agg_old', -1, VISITS)
+    apply_deltas(cursor, 'facilities', 'facilities__agg_old', -1, VISITS)
+
+    assert cursor.statements == [
+        'INSERT INTO agg_visits (facilityid, visit_date, visits) SELECT facilityid, visit_date, -1 * SUM(visits) '
+        'FROM (SELECT r.facilityid, r.checkintime::date AS visit_date, 1 AS visits FROM memberaccess__agg_old r) c '
+        'GROUP BY facilityid, visit_date ON CONFLICT (facilityid, visit_date) DO UPDATE '
+        'SET visits = agg_visits.visits + EXCLUDED.visits, updated_at = CURRENT_TIMESTAMP']
+
+
+def test_merge_hook_sees_the_rows_a_merge_writes():
+    connection = RecordingConnection()
+    engine = CopyEngine(connection)
+    engine.merge_hooks = merge_hooks(VISITS)
+
+    with connection.cursor() as cursor:
+        inserted = engine.merge_staging(cursor, 'memberaccess', 'memberaccess__staging',
+                                        ['accessid', 'facilityid', 'checkintime'], on_conflict='nothing')
+
+    statements = connection.recording.statements
+    assert inserted == 3
+    assert statements[:2] == [
+        'CREATE TEMP TABLE IF NOT EXISTS memberaccess__agg_new (LIKE memberaccess)',
+        'CREATE TEMP TABLE IF NOT EXISTS memberaccess__agg_old (LIKE memberaccess)']
+    assert statements[2] == (
+        'WITH merged AS ( INSERT INTO memberaccess (accessid, facilityid, checkintime) '
+        'SELECT accessid, facilityid, checkintime FROM memberaccess__staging ON CONFLICT DO NOTHING '
+        'RETURNING *) INSERT INTO memberaccess__agg_new SELECT * FROM merged')
+    assert 'FROM memberaccess__agg_new r' in statements[3]
+    assert statements[4] == 'TRUNCATE TABLE memberaccess__agg_new, memberaccess__agg_old'
+
+
+def test_drift_query_compares_the_window():
+    query = ' '.join(AggregateMaintainer(None, VISITS).drift_query('agg_visits').split())
+
+    assert ("FROM (SELECT r.facilityid, r.checkintime::date AS visit_date, 1 AS visits FROM "
+            "(SELECT * FROM memberaccess WHERE checkintime >= %(start)s AND checkintime < %(end)s::date + 1) r) c "
+            "GROUP BY facilityid, visit_date") in query
+    assert "FULL JOIN (SELECT r.facilityid, d.visit_date, r.name AS facility_name FROM " \
+           "(SELECT * FROM facilities WHERE TRUE) r" in query
+    assert ("SELECT facilityid, visit_date, e.visits AS expected_visits, s.visits AS stored_visits, "
+            "e.facility_name AS expected_facility_name, s.facility_name AS stored_facility_name") in query
+    assert query.endswith("WHERE COALESCE(e.visits, 0) <> COALESCE(s.visits, 0) "
+                          "OR e.facility_name IS DISTINCT FROM s.facility_name")
+
+
+def test_drift_query_of_every_summary_table():
+    maintainer = AggregateMaintainer(None)
+    for table, aggregate in AGGREGATES.items():
+        query = maintainer.drift_query(table)
+        assert f"FROM {table} WHERE" in query
+        for column in aggregate['measures'] + aggregate['attributes']:
+            assert f"e.{column} AS expected_{column}" in query
+        # Only the window parameters are left for the driver
+        assert query.replace('%(start)s', '').replace('%(end)s', '').count('%') == 0
+
+
+def test_fed_by():
+    maintainer = AggregateMaintainer(None, VISITS)
+    assert maintainer.fed_by('facilities') == ['agg_visits']
+    assert maintainer.fed_by('members') == []
@@ -0,0 +1,62 @@
+"""
+Tests for the producer side of the pipelined asyncpg loader
+
+Author: Fitness Center Analytics Team
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from async_loader import produce_chunks
+from load_metrics import PhaseTimer
+
+CSV_TEXT = 'id,name\n1,Ann\n2,\n3,Cy\n4,Di\n5,Ed\n'
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'members.csv'
+    path.write_bytes(CSV_TEXT.encode())
+    return str(path)
+
+
+def drain(csv_path, start_offset, chunk_rows, maxsize=1, stop=None):
+    """Run produce_chunks in a thread against a bounded queue; returns the items"""
+    async def consume():
+        queue = asyncio.Queue(maxsize=maxsize)
+        timer = PhaseTimer()
+        producer = threading.Thread(target=produce_chunks, args=(
+            csv_path, ['id', 'name'], start_offset, chunk_rows, queue, asyncio.get_running_loop(),
+            stop or threading.Event(), timer))
+        producer.start()
+        items = []
+        while True:
+            item = await queue.get()
+            items.append(item)
+            if item is None or isinstance(item, Exception):
+                break
+        await asyncio.to_thread(producer.join)
+        return items, timer
+
+    return asyncio.run(consume())
+
+
+def test_produce_chunks_encodes_every_chunk_then_ends(csv_file):
+    items, timer = drain(csv_file, 0, chunk_rows=2)
+
+    assert items[-1] is None
+    assert [rows for rows, _ in items[:-1]] == [2, 2, 1]
+    assert b''.join(data for _, data in items[:-1]) == b'1,Ann\n2,\\N\n3,Cy\n4,Di\n5,Ed\n'
+    assert timer.seconds['parse'] > 0 and timer.seconds['encode'] > 0
+
+
+def test_produce_chunks_resumes_from_a_byte_offset(csv_file):
+    items, _ = drain(csv_file, CSV_TEXT.index('4,Di'), chunk_rows=10)
+    assert items == [(2, b'4,Di\n5,Ed\n'), None]
+
+
+def test_produce_chunks_puts_errors_on_the_queue(tmp_path):
+    items, _ = drain(str(tmp_path / 'missing.csv'), 0, chunk_rows=2)
+    assert len(items) == 1 and isinstance(items[0], FileNotFoundError)
@@ -0,0 +1,50 @@
+"""
+Tests for the loader benchmark helpers
+
+Author: Fitness Center Analytics Team
+"""
+
+import json
+
+from benchmark_loaders import ods_schema_sql, previous_results
+
+
+def test_ods_schema_sql_recreates_the_ods_schema():
+    ddl = ods_schema_sql()
+    assert ddl.startswith('DROP SCHEMA IF EXISTS ods CASCADE;\n')
+    assert 'CREATE SCHEMA ods' in ddl
+    # psql meta-commands cannot be sent through psycopg2
+    assert not any(line.startswith('\\') for line in ddl.splitlines())
+
+
+def test_previous_results_keeps_the_last_successful_run(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    runs = [
+        {'loader': 'db_loader', 'scale': 1, 'workers': 1, 'chunk_rows': 100, 'seconds': 3},
+        {'loader': 'db_loader', 'scale': 1, 'workers': 1, 'chunk_rows': 100, 'seconds': 2},
+        {'loader': 'db_loader', 'scale': 1, 'workers': 1, 'chunk_rows': 100, 'error': 'boom'},
+        {'loader': 'db_loader', 'scale': 10, 'workers': 1, 'chunk_rows': 100, 'seconds': 9},
+    ]
+    path.write_text(''.join(json.dumps(run) + '\n' for run in runs))
+
+    previous = previous_results(str(path))
+
+    assert len(previous) == 2
+    assert [result['seconds'] for result in previous.values()] == [2, 9]
+    assert previous_results(str(tmp_path / 'missing.jsonl')) == {}
+
+
+def test_previous_results_match_on_quarantine(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    runs = [
+        {'loader': 'database_loader', 'scale': 1, 'workers': 1, 'chunk_rows': 100, 'seconds': 4},
+        {'loader': 'database_loader', 'scale': 1, 'workers': 1, 'chunk_rows': 100, 'seconds': 5,
+         'quarantine': True},
+    ]
+    path.write_text(''.join(json.dumps(run) + '\n' for run in runs))
+
+    previous = previous_results(str(path))
+
+    # Results written before the quarantine setting was recorded ran without it
+    assert previous[('database_loader', 1, 1, 100, False)]['seconds'] == 4
+    assert previous[('database_loader', 1, 1, 100, True)]['seconds'] == 5
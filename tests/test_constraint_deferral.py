@@ -0,0 +1,59 @@
+"""
+Tests for capturing the indexes and constraints deferred during bulk loads
+
+Author: Fitness Center Analytics Team
+"""
+
+from constraint_deferral import ConstraintDeferral, _if_not_exists
+
+
+class CatalogCursor:
+    """Answers successive catalog queries with queued result sets"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.params = []
+
+    def execute(self, sql, params=None):
+        self.params.append(params)
+
+    def fetchall(self):
+        return self.results.pop(0)
+
+
+def test_if_not_exists():
+    assert (_if_not_exists('CREATE INDEX idx_members_email ON public.members USING btree (email)') ==
+            'CREATE INDEX IF NOT EXISTS idx_members_email ON public.members USING btree (email)')
+    assert (_if_not_exists('CREATE UNIQUE INDEX members_pkey ON public.members USING btree (memberid)') ==
+            'CREATE UNIQUE INDEX IF NOT EXISTS members_pkey ON public.members USING btree (memberid)')
+
+
+def test_capture_classifies_constraints_and_plain_indexes():
+    cursor = CatalogCursor(
+        [('members', 'members_pkey', 'p', 'PRIMARY KEY (memberid)',
+          'CREATE UNIQUE INDEX members_pkey ON public.members USING btree (memberid)', None, True),
+         ('visits', 'visits_memberid_fkey', 'f', 'FOREIGN KEY (memberid) REFERENCES members(memberid)',
+          None, 'members', False),
+         ('members', 'members_status_check', 'c', "CHECK (status IN ('Active'))", None, None, True)],
+        [('members', 'idx_members_email', 'CREATE INDEX idx_members_email ON public.members (email)')],
+    )
+
+    definitions = ConstraintDeferral(None, ['members'], {}).capture(cursor)
+
+    assert [(d['object_name'], d['kind']) for d in definitions] == [
+        ('members_pkey', 'primary_key'), ('visits_memberid_fkey', 'foreign_key'),
+        ('members_status_check', 'check'), ('idx_members_email', 'index')]
+    assert definitions[1]['referenced_table'] == 'members' and definitions[1]['validate'] is False
+    assert definitions[3]['index_definition'] is None
+    # Constraints from and to the target tables are both captured
+    assert cursor.params == [(['members'], ['members'], ['members']), (['members'],)]
+
+
+def test_fk_dependencies_come_from_the_saved_definitions():
+    deferral = ConstraintDeferral(None, ['ods.members', 'ods.visits'], {})
+    deferral.pending = lambda: [
+        {'table_name': 'ods.visits', 'kind': 'foreign_key', 'referenced_table': 'ods.members'},
+        {'table_name': 'ods.visits', 'kind': 'foreign_key', 'referenced_table': 'ods."Areas"'},
+        {'table_name': 'ods.members', 'kind': 'primary_key', 'referenced_table': None},
+    ]
+    assert deferral.fk_dependencies() == {'visits': {'members', 'areas'}}
@@ -0,0 +1,223 @@
+"""
+Tests for COPY chunk encoding and the streaming COPY engine
+
+Author: Fitness Center Analytics Team
+"""
+
+import numpy as np
+import pandas as pd
+import psycopg2
+import pytest
+
+from copy_engine import (ChunkedCopyStream, CopyEngine, commit_batches, encode_csv_chunk,
+                         normalize_chunk)
+
+
+class RecordingConnection:
+    """Records the statements and COPY data a CopyEngine sends"""
+
+    def __init__(self, rowcount=0, keys=()):
+        self.statements = []
+        self.keys = list(keys)
+        self.copied = []
+        self.rowcount = rowcount
+        self.commits = 0
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+    def commit(self):
+        self.commits += 1
+        self.statements.append('COMMIT')
+
+
+class RecordingCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = connection.rowcount
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.connection.statements.append(' '.join(sql.split()))
+
+    def fetchall(self):
+        return [(key,) for key in self.connection.keys]
+
+    def copy_expert(self, sql, stream):
+        self.connection.statements.append(sql)
+        self.connection.copied.append(stream.read())
+
+
+def test_normalize_chunk_restores_whole_number_columns():
+    df = pd.DataFrame({'count': [4.0, np.nan, 3.0], 'ratio': [1.5, 2.0, np.nan]})
+    normalized = normalize_chunk(df)
+    assert str(normalized['count'].dtype) == 'Int64'
+    assert normalized['ratio'].dtype == np.float64
+    # The caller's frame is left alone
+    assert df['count'].dtype == np.float64
+
+
+def test_encode_csv_chunk_quotes_and_marks_nulls():
+    df = pd.DataFrame({'count': [4.0, np.nan, 3.0], 'name': ['x', None, 'y,z']})
+    assert encode_csv_chunk(df) == '4,x\n\\N,\\N\n3,"y,z"\n'
+    assert encode_csv_chunk(df.iloc[:0]) == ''
+
+
+def test_chunked_copy_stream_reads_across_chunks():
+    chunks = [pd.DataFrame({'id': [1, 2]}), pd.DataFrame({'id': [3]})]
+    stream = ChunkedCopyStream(chunks)
+
+    parts = []
+    while True:
+        data = stream.read(3)
+        if not data:
+            break
+        parts.append(data)
+
+    assert b''.join(parts) == b'1\n2\n3\n'
+    assert max(map(len, parts)) <= 3
+    assert (stream.rows, stream.chunks, stream.bytes) == (3, 2, 6)
+
+
+def test_chunked_copy_stream_frames_byte_chunks():
+    stream = ChunkedCopyStream([b'ab', b'', b'cde'], encoder=bytes, prefix=b'<', suffix=b'>')
+    assert [stream.read(8) for _ in range(5)] == [b'<', b'ab', b'cde', b'>', b'']
+    assert (stream.rows, stream.chunks, stream.bytes) == (5, 3, 7)
+
+
+def test_copy_chunks_streams_into_the_target():
+    connection = RecordingConnection()
+    rows = CopyEngine(connection).copy_chunks('members', ['id', 'name'],
+                                              [pd.DataFrame({'id': [1], 'name': ['a']})])
+
+    assert rows == (1, 1)
+    assert connection.statements == ["COPY members (id, name) FROM STDIN WITH (FORMAT csv, NULL '\\N')"]
+    assert connection.copied == [b'1,a\n']
+
+
+def test_copy_chunks_merges_through_staging():
+    connection = RecordingConnection(rowcount=1)
+    rows = CopyEngine(connection).copy_chunks('members', ['id'], [pd.DataFrame({'id': [1, 2]})],
+                                              on_conflict='nothing')
+
+    assert rows == (2, 1)
+    assert connection.statements[2].startswith('COPY members__staging (id) FROM STDIN')
+    assert connection.statements[3] == ('INSERT INTO members (id) SELECT id FROM members__staging '
+                                        'ON CONFLICT DO NOTHING')
+
+
+def test_staging_tables_are_per_session_and_unqualified():
+    connection = RecordingConnection(rowcount=2)
+    CopyEngine(connection).copy_chunks('dw.dim_date', ['date_key'], [pd.DataFrame({'date_key': [1, 2]})],
+                                       on_conflict='nothing')
+
+    assert connection.statements[0] == ('CREATE TEMP TABLE IF NOT EXISTS dw_dim_date__staging '
+                                        '(LIKE dw.dim_date INCLUDING DEFAULTS) ON COMMIT DELETE ROWS')
+    assert connection.statements[3] == ('INSERT INTO dw.dim_date (date_key) SELECT date_key '
+                                        'FROM dw_dim_date__staging ON CONFLICT DO NOTHING')
+
+
+def test_copy_file_upserts_on_the_primary_key(tmp_path):
+    csv_path = tmp_path / 'members.csv'
+    csv_path.write_text('id,name\n1,a\n1,b\n')
+    connection = RecordingConnection(keys=['id'])
+
+    CopyEngine(connection).copy_file('members', str(csv_path), on_conflict='update')
+
+    merge = [s for s in connection.statements if s.startswith('INSERT')]
+    assert merge == ['INSERT INTO members (id, name) SELECT DISTINCT ON (id) id, name '
+                     'FROM members__staging ORDER BY id, ctid DESC '
+                     'ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name']
+
+
+def test_merge_staging_selects_expressions():
+    connection = RecordingConnection(keys=['id'])
+    with connection.cursor() as cursor:
+        CopyEngine(connection).merge_staging(cursor, 'members', 'members__staging', ['id', 'joined'],
+                                             on_conflict='update', expressions=['id', 'joined::date'])
+
+    merge = [s for s in connection.statements if s.startswith('INSERT')]
+    assert merge == ['INSERT INTO members (id, joined) SELECT DISTINCT ON (id) id, '
+                     'joined::date FROM members__staging ORDER BY id, ctid DESC '
+                     'ON CONFLICT (id) DO UPDATE SET joined = EXCLUDED.joined']
+
+
+def test_copy_chunks_rejects_unknown_conflict_modes():
+    with pytest.raises(ValueError):
+        CopyEngine(RecordingConnection()).copy_chunks('members', ['id'], [pd.DataFrame({'id': [1]})],
+                                                      on_conflict='replace')
+
+
+def test_commit_batches_groups_lazily():
+    batches = [list(batch) for batch in commit_batches(range(5), 2)]
+    assert batches == [[0, 1], [2, 3], [4]]
+    assert [list(batch) for batch in commit_batches(range(3), 0)] == [[0, 1, 2]]
+    assert list(commit_batches([], 2)) == []
+
+
+def test_copy_file_commits_every_commit_chunks(tmp_path):
+    csv_path = tmp_path / 'members.csv'
+    csv_path.write_text('id,name\n' + ''.join(f'{i},n{i}\n' for i in range(5)))
+    connection = RecordingConnection()
+    engine = CopyEngine(connection, chunk_rows=2, commit_chunks=2)
+
+    stats = engine.copy_file('members', str(csv_path))
+
+    assert (stats['rows'], stats['inserted'], stats['chunks'], stats['commits']) == (5, 5, 3, 2)
+    assert {'parse', 'encode', 'copy', 'commit'} <= set(stats['phases'])
+    assert connection.copied == [b'0,n0\n1,n1\n2,n2\n3,n3\n', b'4,n4\n']
+    assert [s.split(' (')[0] for s in connection.statements] == ['COPY members', 'COMMIT',
+                                                                 'COPY members', 'COMMIT']
+
+
+def test_copy_file_applies_the_transform_per_chunk(tmp_path):
+    csv_path = tmp_path / 'members.csv'
+    csv_path.write_text('id,name\n1,a\n2,b\n3,c\n')
+    connection = RecordingConnection()
+    engine = CopyEngine(connection, chunk_rows=2)
+
+    stats = engine.copy_file('members', str(csv_path), transform=lambda df: df[df['id'] != 2])
+
+    assert stats['rows'] == 2 and stats['commits'] == 1
+    assert connection.copied == [b'1,a\n3,c\n']
+
+
+class FailingCursor(RecordingCursor):
+    """Fails any COPY whose data holds ``bad``, like a row the database rejects"""
+
+    def __init__(self, connection, bad):
+        super().__init__(connection)
+        self.bad = bad
+        self.copied_rows = 0
+
+    def copy_expert(self, sql, stream):
+        data = stream.read()
+        if self.bad in data:
+            raise psycopg2.DataError('invalid input syntax\nLINE 1')
+        self.copied_rows = data.count(b'\n')
+
+    def execute(self, sql, params=None):
+        super().execute(sql, params)
+        self.rowcount = self.copied_rows
+
+
+def test_copy_chunk_isolating_bisects_down_to_bad_rows():
+    cursor = FailingCursor(RecordingConnection(), b'bad')
+    rejected = []
+    stats = {'bytes': 0, 'rejected': 0, 'retries': 0}
+    chunk = pd.DataFrame({'name': ['a', 'bad', 'c', 'd', 'bad']})
+
+    inserted = CopyEngine(None).copy_chunk_isolating(
+        cursor, 'members', 'members__staging', ['name'], chunk, 'nothing',
+        lambda rows, reason: rejected.append((rows['name'].tolist(), reason)), stats)
+
+    assert inserted == 3
+    assert rejected == [(['bad'], 'invalid input syntax')] * 2
+    assert stats['rejected'] == 2 and stats['retries'] > 0
+    statements = cursor.connection.statements
+    assert statements.count('SAVEPOINT copy_chunk') == statements.count('RELEASE SAVEPOINT copy_chunk')
@@ -0,0 +1,69 @@
+"""
+Tests for the seeded dataset scaler
+
+Author: Fitness Center Analytics Team
+"""
+
+import pandas as pd
+import pytest
+
+from data_scaler import DatasetScaler
+
+
+@pytest.fixture
+def fixture_dir(tmp_path):
+    source = tmp_path / 'source'
+    source.mkdir()
+    pd.DataFrame({
+        'MembershipTypeID': ['MT01', 'MT02'],
+        'Name': ['Basic', 'Premium'],
+    }).to_csv(source / 'membershiptypes.csv', index=False)
+    pd.DataFrame({
+        'MemberID': ['M001', 'M002', 'M003'],
+        'MembershipTypeID': ['MT01', 'MT02', 'MT01'],
+        'Email': ['a@x.com', 'b@x.com', 'c@x.com'],
+        'JoinDate': ['2024-01-05', '2024-02-10', ''],
+    }).to_csv(source / 'members.csv', index=False)
+    pd.DataFrame({
+        'VisitID': ['V0001', 'V0002', 'V0003'],
+        'MemberID': ['M003', 'M001', 'M001'],
+        'VisitTime': ['2024-03-01 08:00:00', '2024-03-02 09:30:00', '2024-03-03 18:15:00'],
+    }).to_csv(source / 'visits.csv', index=False)
+    return source
+
+
+def read(path):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def test_scaled_copies_keep_foreign_keys_consistent(fixture_dir, tmp_path):
+    output = tmp_path / 'scaled'
+    written = DatasetScaler(str(fixture_dir)).write(str(output), 3)
+
+    assert written == {'members': 9, 'membershiptypes': 2, 'visits': 9}
+    members, visits = read(output / 'members.csv'), read(output / 'visits.csv')
+    types = read(output / 'membershiptypes.csv')
+
+    assert members['MemberID'].is_unique and visits['VisitID'].is_unique
+    assert members['Email'].is_unique
+    assert set(visits['MemberID']) <= set(members['MemberID'])
+    # Reference ids are never renumbered
+    assert set(members['MembershipTypeID']) == set(types['MembershipTypeID']) == {'MT01', 'MT02'}
+    assert members['MemberID'].str.len().eq(4).all()
+    assert members['JoinDate'].tolist().count('') == 3
+
+
+def test_copy_zero_is_the_fixture(fixture_dir):
+    scaler = DatasetScaler(str(fixture_dir))
+    pd.testing.assert_frame_equal(scaler.scaled_copy('members', 0), read(fixture_dir / 'members.csv'))
+
+
+def test_scaled_copies_are_seeded(fixture_dir):
+    first = DatasetScaler(str(fixture_dir), seed=7).scaled_copy('visits', 2)
+    again = DatasetScaler(str(fixture_dir), seed=7).scaled_copy('visits', 2)
+    other = DatasetScaler(str(fixture_dir), seed=8).scaled_copy('visits', 2)
+    pd.testing.assert_frame_equal(first, again)
+    assert not first['VisitTime'].equals(other['VisitTime'])
+    # Dates only move back, keeping their format
+    assert first['VisitTime'].le('2024-03-03 18:15:00').all()
+    assert first['VisitTime'].str.fullmatch(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}').all()
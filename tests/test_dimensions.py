@@ -0,0 +1,85 @@
+"""
+Tests for the generated date and time-of-day dimensions
+
+Author: Fitness Center Analytics Team
+"""
+
+import pandas as pd
+import pytest
+
+from dimension_builder import DimensionBuilder, date_dimension, time_dimension
+
+
+def test_date_dimension_matches_the_calendar():
+    dates = date_dimension('2020-12-28', '2021-01-04')
+    expected = pd.date_range('2020-12-28', '2021-01-04')
+
+    assert dates['date_key'].tolist() == [int(d.strftime('%Y%m%d')) for d in expected]
+    assert dates['full_date'].tolist() == [d.strftime('%Y-%m-%d') for d in expected]
+    assert dates['day_of_week'].tolist() == [d.strftime('%A') for d in expected]
+    assert dates['day_of_week_num'].tolist() == [d.isoweekday() for d in expected]
+    assert dates['week_of_year'].tolist() == [d.isocalendar()[1] for d in expected]
+    assert dates['month_name'].tolist() == [d.strftime('%B') for d in expected]
+    assert dates['is_weekend'].tolist() == [d.isoweekday() >= 6 for d in expected]
+
+
+def test_date_dimension_covers_leap_days_and_rejects_reversed_ranges():
+    dates = date_dimension('2024-01-01', '2024-12-31')
+    assert len(dates) == 366 and 20240229 in dates['date_key'].tolist()
+    with pytest.raises(ValueError):
+        date_dimension('2024-01-02', '2024-01-01')
+
+
+def test_time_dimension_rows():
+    times = time_dimension(30)
+    assert len(times) == 48
+    row = times.iloc[27].to_dict()
+    assert row == {'time_key': 28, 'time_30min': '13:30:00', 'hour_24': 13, 'hour_12': 1, 'am_pm': 'PM',
+                   'time_block': 'Afternoon', 'interval_of_day': 28, 'minute_of_day': 13 * 60 + 30}
+    assert times.iloc[0]['hour_12'] == 12 and times.iloc[0]['am_pm'] == 'AM'
+
+
+def test_time_keys_match_the_talend_time_table():
+    keys = time_dimension().set_index('time_30min')['time_key']
+    assert len(keys) == 96
+    assert (keys['00:00:00'], keys['00:15:00'], keys['03:45:00'], keys['23:45:00']) == (1, 2, 16, 96)
+    with pytest.raises(ValueError):
+        time_dimension(7)
+
+
+def test_minute_of_day_is_stable_across_granularities():
+    fine = time_dimension(1).set_index('time_30min')['minute_of_day']
+    coarse = time_dimension(15).set_index('time_30min')['minute_of_day']
+    assert (fine.reindex(coarse.index) == coarse).all()
+
+
+class TimeTableBuilder(DimensionBuilder):
+    """DimensionBuilder over a time table that already holds ``existing`` rows"""
+
+    def __init__(self, existing):
+        super().__init__(None)
+        self.existing = existing
+        self.upserted = []
+
+    def existing_times(self):
+        return self.existing
+
+    def upsert(self, table_name, df):
+        self.upserted.append(df)
+        return len(df)
+
+
+def test_build_times_refreshes_the_talend_time_table():
+    talend = dict(zip(time_dimension(15)['time_key'], time_dimension(15)['time_30min']))
+    builder = TimeTableBuilder(talend)
+    assert builder.build_times(15) == 96
+    assert builder.upserted[0]['time_key'].tolist() == list(range(1, 97))
+
+
+def test_build_times_leaves_a_table_of_another_granularity_alone():
+    builder = TimeTableBuilder({1: '00:00:00', 2: '00:15:00', 16: '03:45:00'})
+    with pytest.raises(ValueError, match='time_key 2 is 00:15:00, not 00:30:00'):
+        builder.build_times(30)
+    assert builder.upserted == []
+
+    assert TimeTableBuilder({}).build_times(30) == 48
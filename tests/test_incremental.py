@@ -0,0 +1,70 @@
+"""
+Tests for the lastmodified watermark filter
+
+Author: Fitness Center Analytics Team
+"""
+
+import re
+
+import pandas as pd
+
+from incremental import DeltaFilter, find_watermark_column, new_run_id
+
+
+def test_new_run_id():
+    assert re.fullmatch(r'run_\d{13}', new_run_id())
+
+
+def test_find_watermark_column():
+    assert find_watermark_column(['MemberID', 'LastModified']) == 'LastModified'
+    assert find_watermark_column(['id', 'last_modified']) == 'last_modified'
+    assert find_watermark_column(['id']) is None
+
+
+def test_delta_filter_keeps_rows_at_or_after_the_watermark():
+    delta = DeltaFilter('modified', '2024-01-02')
+    chunk = pd.DataFrame({'id': [1, 2, 3, 4],
+                          'modified': ['2024-01-01', '2024-01-02', '2024-01-05', None]})
+    kept = delta(chunk)
+    assert kept['id'].tolist() == [2, 3, 4]
+    assert (delta.rows_seen, delta.rows_kept) == (4, 3)
+    assert delta.high_water_mark == pd.Timestamp('2024-01-05')
+
+
+def test_delta_filter_tracks_the_mark_across_chunks():
+    delta = DeltaFilter('modified', '2024-01-02')
+    delta(pd.DataFrame({'modified': ['2024-01-09']}))
+    delta(pd.DataFrame({'modified': ['2024-01-03', None]}))
+    assert delta.high_water_mark == pd.Timestamp('2024-01-09')
+    # An all-old chunk leaves the mark where it was
+    assert len(delta(pd.DataFrame({'modified': ['2023-01-01']}))) == 0
+    assert delta.high_water_mark == pd.Timestamp('2024-01-09')
+
+
+def test_delta_filter_first_load_keeps_everything():
+    delta = DeltaFilter('modified')
+    chunk = pd.DataFrame({'modified': ['2024-01-01', '2023-06-01']})
+    assert len(delta(chunk)) == 2
+    assert delta.high_water_mark == pd.Timestamp('2024-01-01')
+
+
+def test_delta_filter_marks_only_rows_written():
+    delta = DeltaFilter('modified', '2024-01-02')
+    kept = delta(pd.DataFrame({'modified': ['2024-01-01', '2024-01-03', '2024-01-04', '2024-01-09']}))
+    # The latest row is quarantined; the one before it still moves the mark
+    delta.reject(kept[kept['modified'] == '2024-01-09'])
+    assert delta.high_water_mark == pd.Timestamp('2024-01-04')
+
+
+def test_delta_filter_does_not_hold_the_mark_at_a_reject():
+    delta = DeltaFilter('modified', '2024-01-02')
+    first = delta(pd.DataFrame({'modified': ['2024-01-03', '2024-01-05']}))
+    delta.reject(first.iloc[:1])
+    # Later chunks are indexed on from the first, as read_csv chunks are
+    second = delta(pd.DataFrame({'modified': ['2024-01-07', '2024-01-08']}, index=[2, 3]))
+    delta.reject(second.iloc[1:])
+    assert delta.high_water_mark == pd.Timestamp('2024-01-07')
+    # Nothing written leaves the old mark
+    empty = DeltaFilter('modified', '2024-01-02')
+    empty.reject(empty(pd.DataFrame({'modified': ['2024-01-03']})))
+    assert empty.high_water_mark == pd.Timestamp('2024-01-02')
@@ -0,0 +1,89 @@
+"""
+Tests for the post-load referential integrity checks
+
+Author: Fitness Center Analytics Team
+"""
+
+import json
+import re
+
+import psycopg2
+import pytest
+
+from integrity import IntegrityChecker, format_result, schema_foreign_keys, write_report
+from quarantine import SCHEMA_FILE
+
+AREA_FK = {'name': 'memberaccess_facilityid_areaid_fkey', 'table': 'memberaccess',
+           'columns': ['facilityid', 'areaid'], 'parent': 'facilityareas',
+           'parent_columns': ['facilityid', 'areaid']}
+
+
+class CheckCursor:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        if self.error:
+            raise self.error
+
+    def fetchone(self):
+        return self.result
+
+
+def collapse(sql):
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def test_schema_foreign_keys_reads_the_ods_schema():
+    foreign_keys = [fk for fk in schema_foreign_keys(SCHEMA_FILE) if fk['table'] == 'memberaccess']
+    assert [fk['name'] for fk in foreign_keys] == [
+        'memberaccess_memberid_fkey', 'memberaccess_facilityid_fkey', 'memberaccess_facilityid_areaid_fkey']
+    assert foreign_keys[2] == AREA_FK
+
+
+def test_check_sql_skips_null_keys_and_applies_the_scope():
+    sql, params = IntegrityChecker(None, None, sample_keys=3).check_sql(
+        AREA_FK, ('checkintime', '>=', '2024-01-01'))
+
+    assert ("WHERE c.facilityid IS NOT NULL AND c.areaid IS NOT NULL AND c.checkintime >= %s "
+            "AND NOT EXISTS (SELECT 1 FROM facilityareas p "
+            "WHERE p.facilityid = c.facilityid AND p.areaid = c.areaid)") in collapse(sql)
+    assert "concat_ws('|', c.facilityid, c.areaid)" in sql
+    assert params == ['2024-01-01', 3]
+
+    with pytest.raises(ValueError):
+        IntegrityChecker(None, None).check_sql(AREA_FK, ('checkintime', '<', '2024-01-01'))
+
+
+def test_check_reports_orphans_and_errors():
+    checker = IntegrityChecker(None, None)
+
+    result = checker.check(CheckCursor((12, ['F1|A9', 'F2|A1'])), AREA_FK, ('etl_run_id', '=', 'run_7'))
+    assert (result['violations'], result['sample_keys'], result['scope']) == (12, ['F1|A9', 'F2|A1'],
+                                                                             'etl_run_id = run_7')
+    assert format_result(result) == ('memberaccess_facilityid_areaid_fkey memberaccess(facilityid, areaid) -> '
+                                     'facilityareas(facilityid, areaid): 12 orphans [etl_run_id = run_7], '
+                                     'e.g. F1|A9, F2|A1')
+
+    result = checker.check(CheckCursor(error=psycopg2.Error('relation "memberaccess" does not exist\nLINE 1')),
+                           AREA_FK)
+    assert result['violations'] is None and result['scope'] == 'all rows'
+    assert format_result(result).endswith(': ERROR - relation "memberaccess" does not exist')
+
+    result = checker.check(CheckCursor((0, [])), AREA_FK)
+    assert format_result(result).endswith(': OK [all rows]')
+
+
+def test_write_report(tmp_path):
+    checker = IntegrityChecker(None, None)
+    results = [checker.check(CheckCursor((2, ['F9|A1'])), AREA_FK),
+               checker.check(CheckCursor((0, [])), AREA_FK),
+               checker.check(CheckCursor(error=psycopg2.Error('timeout')), AREA_FK)]
+
+    path = write_report(results, str(tmp_path / 'report.json'))
+    report = json.loads((tmp_path / 'report.json').read_text())
+    assert path == str(tmp_path / 'report.json')
+    assert (report['constraints'], report['violated'], report['errors']) == (3, 1, 1)
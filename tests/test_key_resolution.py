@@ -0,0 +1,122 @@
+"""
+Tests for the in-memory dimension surrogate key cache
+
+Author: Fitness Center Analytics Team
+"""
+
+import datetime
+import re
+
+import numpy as np
+import pandas as pd
+
+from key_resolution import DAY_OFFSET, OPEN_END, KeyCache, KeyResolver, day_numbers
+
+
+class DimensionConnection:
+    """Serves dimension rows to COPY ... TO STDOUT, honouring ``surrogate > n``"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def copy_expert(self, sql, buffer):
+        self.queries.append(sql)
+        after = re.search(r'> (\d+)\)', sql)
+        for row in self.rows:
+            if after is None or row[1] > int(after.group(1)):
+                buffer.write(','.join('' if value is None else str(value) for value in row) + '\n')
+
+
+def cache(rows, versioned):
+    columns = ('effective', 'end') if versioned else (None, None)
+    key_cache = KeyCache(None, 'dim', 'natural', 'surrogate', *columns)
+    key_cache._build(rows)
+    return key_cache
+
+
+def test_day_numbers():
+    days = day_numbers(['1970-01-02', None, '2024-01-01'], -1)
+    assert days.tolist() == [1, -1, (datetime.date(2024, 1, 1) - datetime.date(1970, 1, 1)).days]
+
+
+def test_lookup_of_a_plain_dimension_takes_the_latest_key():
+    rows = pd.DataFrame({'natural': ['F1', 'F2', 'F1'], 'surrogate': np.array([1, 2, 3])})
+    keys, found = cache(rows, versioned=False).lookup(['F1', 'F9', 'F2', None])
+    assert found.tolist() == [True, False, True, False]
+    assert keys[found].tolist() == [3, 2]
+
+
+def test_lookup_of_a_versioned_dimension_picks_the_version_in_effect():
+    rows = pd.DataFrame({
+        'natural': ['M1', 'M1', 'M2', 'M3'],
+        'surrogate': np.array([10, 11, 20, 30]),
+        'effective': day_numbers([None, '2024-03-01', '2024-02-01', '2024-01-01'], 0 - DAY_OFFSET),
+        'end': day_numbers(['2024-02-29', None, None, '2024-01-31'], OPEN_END),
+    })
+    key_cache = cache(rows, versioned=True)
+
+    keys, found = key_cache.lookup(['M1', 'M1', 'M1', 'M2', 'M3', 'M3', 'M9'],
+                                   ['1999-01-01', '2024-02-29', '2024-03-01',
+                                    '2024-02-01', '2024-01-31', '2024-02-01', '2024-02-01'])
+    assert found.tolist() == [True, True, True, True, True, False, False]
+    assert keys[found].tolist() == [10, 10, 11, 20, 30]
+
+    # Without dates the current version is used
+    keys, found = key_cache.lookup(['M1', 'M2', 'M3'])
+    assert found.tolist() == [True, True, False]
+    assert keys[found].tolist() == [11, 20]
+
+
+def test_lookup_before_the_first_version_of_a_key():
+    rows = pd.DataFrame({
+        'natural': ['M1', 'M2'],
+        'surrogate': np.array([10, 20]),
+        'effective': day_numbers(['2024-03-01', '2024-01-01'], 0 - DAY_OFFSET),
+        'end': day_numbers([None, None], OPEN_END),
+    })
+    keys, found = cache(rows, versioned=True).lookup(['M1', 'M2', 'M1'], ['2024-02-01', '2023-12-31', '2024-03-01'])
+    assert found.tolist() == [False, False, True]
+    assert keys[found].tolist() == [10]
+
+
+def test_lookup_of_an_empty_dimension():
+    rows = pd.DataFrame({'natural': pd.Series(dtype=object), 'surrogate': np.array([], dtype=np.int64)})
+    keys, found = cache(rows, versioned=False).lookup(['F1'])
+    assert not found.any()
+
+
+def test_resolve_refreshes_once_for_new_keys():
+    connection = DimensionConnection([('F1', 1), ('F2', 2)])
+    key_cache = KeyCache(connection, 'dw.dim_facility', 'facility_id', 'facility_key')
+
+    assert key_cache.resolve(['F1', None]).fillna(0).tolist() == [1, 0]
+    connection.rows.append(('F3', 3))
+    assert key_cache.resolve(['F3', 'F9', 'F2']).fillna(0).tolist() == [3, 0, 2]
+
+    assert key_cache.fetches == 2
+    assert connection.queries[1].endswith('WHERE facility_key > 2) TO STDOUT WITH (FORMAT csv)')
+    # A key still unknown after the refresh is only fetched for again on the next chunk
+    key_cache.resolve(['F9'])
+    assert key_cache.fetches == 3
+
+
+def test_key_resolver_adds_keys_and_counts_unmatched():
+    connection = DimensionConnection([('M1', 5, '2024-01-01', None)])
+    resolver = KeyResolver(connection, [('member_id', 'member_key', 'member', 'usage_date')])
+    df = pd.DataFrame({'member_id': ['M1', 'M2', None], 'usage_date': ['2024-02-01'] * 3})
+
+    result = resolver(df)
+
+    assert result['member_key'].fillna(0).tolist() == [5, 0, 0]
+    assert resolver.unmatched == {'member_key': 1}
+    assert 'member_key' not in df
@@ -0,0 +1,128 @@
+"""
+Tests for foreign key load ordering
+
+Author: Fitness Center Analytics Team
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from load_graph import (chain_dependencies, fetch_fk_dependencies, parse_schema_dependencies,
+                        run_in_dependency_order, run_in_dependency_order_async)
+
+
+class CatalogCursor:
+    """Returns fixed (child, parent) rows for the pg_constraint query"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = None
+
+    def execute(self, sql, params=None):
+        self.params = params
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_chain_dependencies():
+    assert chain_dependencies(['a', 'b', 'c']) == {'b': {'a'}, 'c': {'b'}}
+    assert chain_dependencies(['a']) == {}
+
+
+def test_fetch_fk_dependencies_lowercases_names():
+    cursor = CatalogCursor([('Equipment', 'Facilities'), ('equipment', 'FacilityAreas')])
+    assert fetch_fk_dependencies(cursor, 'ods') == {'equipment': {'facilities', 'facilityareas'}}
+    assert cursor.params == ('ods',)
+
+
+def test_parse_schema_dependencies():
+    dependencies = parse_schema_dependencies()
+    assert 'facilities' in dependencies['facilityareas']
+    assert {'facilities', 'facilityareas'} <= dependencies['equipment']
+
+
+def test_run_in_dependency_order_waits_for_parents():
+    finished = []
+    lock = threading.Lock()
+
+    def load(table):
+        time.sleep(0.01)
+        with lock:
+            finished.append(table)
+        return table.upper()
+
+    dependencies = {'areas': {'facilities'}, 'equipment': {'facilities', 'areas'},
+                    'members': {'members', 'outside'}}
+    results = run_in_dependency_order(['equipment', 'areas', 'facilities', 'members'],
+                                      dependencies, load, workers=3)
+
+    assert results == {'facilities': 'FACILITIES', 'areas': 'AREAS',
+                       'equipment': 'EQUIPMENT', 'members': 'MEMBERS'}
+    assert finished.index('facilities') < finished.index('areas') < finished.index('equipment')
+
+
+def test_run_in_dependency_order_serially_follows_a_chain():
+    order = []
+    tables = ['c', 'a', 'b']
+    run_in_dependency_order(tables, chain_dependencies(tables), order.append, workers=4)
+    assert order == tables
+
+
+def test_run_in_dependency_order_stops_after_a_failure():
+    started = []
+
+    def load(table):
+        started.append(table)
+        if table == 'a':
+            raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError, match='boom'):
+        run_in_dependency_order(['a', 'b'], {'b': {'a'}}, load, workers=2)
+    assert started == ['a']
+
+
+def test_run_in_dependency_order_rejects_cycles():
+    with pytest.raises(ValueError, match='Circular'):
+        run_in_dependency_order(['a', 'b'], {'a': {'b'}, 'b': {'a'}}, lambda t: t, workers=2)
+
+
+def test_run_in_dependency_order_async_waits_for_parents():
+    finished = []
+    running = []
+    most_running = []
+
+    async def load(table):
+        running.append(table)
+        most_running.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(table)
+        finished.append(table)
+        return table.upper()
+
+    dependencies = {'areas': {'facilities'}, 'equipment': {'facilities', 'areas'}}
+    results = asyncio.run(run_in_dependency_order_async(
+        ['equipment', 'areas', 'facilities', 'members', 'staff'], dependencies, load, workers=2))
+
+    assert results['equipment'] == 'EQUIPMENT' and len(results) == 5
+    assert finished.index('facilities') < finished.index('areas') < finished.index('equipment')
+    assert max(most_running) == 2
+
+
+def test_run_in_dependency_order_async_stops_after_a_failure():
+    started = []
+
+    async def load(table):
+        started.append(table)
+        if table == 'a':
+            raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError, match='boom'):
+        asyncio.run(run_in_dependency_order_async(['a', 'b'], {'b': {'a'}}, load, workers=2))
+    assert started == ['a']
+
+    with pytest.raises(ValueError, match='Circular'):
+        asyncio.run(run_in_dependency_order_async(['a', 'b'], {'a': {'b'}, 'b': {'a'}}, load, workers=2))
@@ -0,0 +1,125 @@
+"""
+Tests for the byte offsets and checkpoints of resumable loads
+
+Author: Fitness Center Analytics Team
+"""
+
+import hashlib
+
+import pytest
+
+from load_journal import TableCheckpoint, file_checksum, has_quoted_newlines, line_offset
+
+CSV_TEXT = 'id,name\n' + ''.join(f'{i},name{i}\n' for i in range(1, 101))
+
+
+class RecordingJournal:
+    """Collects the checkpoints a TableCheckpoint writes"""
+
+    def __init__(self):
+        self.checkpoints = []
+
+    def checkpoint(self, table_name, chunks, rows, byte_offset):
+        self.checkpoints.append((table_name, chunks, rows, byte_offset))
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'members.csv'
+    path.write_bytes(CSV_TEXT.encode())
+    return str(path)
+
+
+def test_file_checksum(csv_file):
+    assert file_checksum(csv_file) == hashlib.sha256(CSV_TEXT.encode()).hexdigest()
+
+
+def test_line_offset(csv_file):
+    data = CSV_TEXT.encode()
+    header_end = line_offset(csv_file, 1)
+    assert header_end == data.index(b'\n') + 1
+    assert line_offset(csv_file, 0, header_end) == header_end
+    assert data[line_offset(csv_file, 10, header_end):].startswith(b'11,name11\n')
+    assert line_offset(csv_file, 1000) == len(data)
+
+
+def test_has_quoted_newlines(tmp_path):
+    plain = tmp_path / 'plain.csv'
+    plain.write_bytes(b'id,note\n1,"a, ""quoted"" b"\n2,c\n')
+    multiline = tmp_path / 'multiline.csv'
+    multiline.write_bytes(b'id,address\n1,"12 Main St\nSuite 4"\n2,x\n')
+    assert not has_quoted_newlines(str(plain))
+    assert has_quoted_newlines(str(multiline))
+
+
+def test_table_checkpoint_advances_from_the_header(csv_file):
+    journal = RecordingJournal()
+    entry = {'chunks_committed': 0, 'rows_committed': 0, 'byte_offset': 0}
+    checkpoint = TableCheckpoint(journal, 'members', csv_file, entry)
+
+    assert checkpoint.start_offset == 0
+    checkpoint(25, 1)
+    checkpoint(50, 2)
+
+    offset = journal.checkpoints[-1][3]
+    assert journal.checkpoints[-1][:3] == ('members', 2, 50)
+    assert CSV_TEXT.encode()[offset:].startswith(b'51,name51\n')
+
+
+def test_table_checkpoint_resumes_from_a_journaled_offset(csv_file):
+    journal = RecordingJournal()
+    resume_at = CSV_TEXT.encode().index(b'51,name51\n')
+    entry = {'chunks_committed': 2, 'rows_committed': 50, 'byte_offset': resume_at}
+    checkpoint = TableCheckpoint(journal, 'members', csv_file, entry)
+
+    assert checkpoint.start_offset == resume_at
+    # rows_read counts from the resume point
+    checkpoint(10, 1)
+    checkpoint(20, 2)
+    assert journal.checkpoints[0][:3] == ('members', 3, 60)
+    assert journal.checkpoints[1][:3] == ('members', 4, 70)
+    assert CSV_TEXT.encode()[journal.checkpoints[1][3]:].startswith(b'71,name71\n')
+
+
+def test_table_checkpoint_advance_returns_the_progress_to_journal(csv_file):
+    journal = RecordingJournal()
+    entry = {'chunks_committed': 1, 'rows_committed': 20, 'byte_offset': CSV_TEXT.encode().index(b'21,name21\n')}
+    checkpoint = TableCheckpoint(journal, 'members', csv_file, entry)
+
+    chunks, rows, offset = checkpoint.advance(5, 1)
+    assert (chunks, rows) == (2, 25) and journal.checkpoints == []
+    assert CSV_TEXT.encode()[offset:].startswith(b'26,name26\n')
+
+
+def test_table_checkpoint_without_offsets_counts_rows_only(csv_file):
+    entry = {'chunks_committed': 1, 'rows_committed': 20, 'byte_offset': 0}
+    checkpoint = TableCheckpoint(RecordingJournal(), 'members', csv_file, entry, offsets=False)
+    assert checkpoint.advance(5, 1) == (2, 25, 0)
+
+
+def test_loader_journals_runs_started_without_a_run_id(csv_file, monkeypatch):
+    import database_loader
+
+    started = []
+
+    class FakeJournal(RecordingJournal):
+        def __init__(self, connection, run_id):
+            super().__init__()
+            self.run_id = run_id
+
+        def start(self, table_name, source_file, checksum, restart=False):
+            started.append((self.run_id, table_name, checksum))
+            return {'rows_committed': 0, 'chunks_committed': 0, 'byte_offset': 0}
+
+    class FakeConnection:
+        def commit(self):
+            pass
+
+    monkeypatch.setattr(database_loader, 'LoadJournal', FakeJournal)
+    loader = database_loader.FitnessCenterDatabaseLoader('postgresql://unused')
+
+    checkpoint = loader.start_journal(FakeConnection(), 'members', csv_file, resume=False)
+
+    assert loader.run_id.startswith('run_')
+    assert started == [(loader.run_id, 'members', file_checksum(csv_file))]
+    assert checkpoint.table_name == 'members' and checkpoint.start_offset == 0
@@ -0,0 +1,82 @@
+"""
+Tests for load phase timing and metrics output
+
+Author: Fitness Center Analytics Team
+"""
+
+import json
+import time
+
+from load_metrics import COUNTERS, PHASES, LoadMetrics, PhaseTimer, format_phases
+
+
+def test_phase_timer_charges_nested_time_to_the_inner_phase():
+    timer = PhaseTimer()
+    with timer.phase('copy'):
+        time.sleep(0.02)
+        with timer.phase('encode'):
+            time.sleep(0.05)
+
+    assert timer.seconds['encode'] >= 0.05
+    assert 0.02 <= timer.seconds['copy'] < 0.05
+    assert set(PHASES) <= set(timer.seconds)
+
+
+def test_phase_timer_times_each_item_of_an_iterator():
+    timer = PhaseTimer()
+
+    def slow():
+        for value in range(3):
+            time.sleep(0.01)
+            yield value
+
+    consumed = []
+    for value in timer.timed(slow(), 'parse'):
+        with timer.phase('copy'):
+            consumed.append(value)
+
+    assert consumed == [0, 1, 2]
+    assert timer.seconds['parse'] >= 0.03
+    assert timer.seconds['copy'] < timer.seconds['parse']
+
+
+def test_phase_timer_merge_and_summary():
+    timer = PhaseTimer()
+    timer.merge({'copy': 1.25, 'worker': 0.5})
+    timer.merge({'copy': 0.25})
+    assert timer.summary()['copy'] == 1.5
+    assert timer.summary()['worker'] == 0.5
+
+
+def test_load_metrics_records_and_writes_json_lines(tmp_path):
+    metrics = LoadMetrics('run_1', 'database_loader')
+    record = metrics.record('members', {'rows': 10, 'inserted': 9, 'seconds': 2.0,
+                                        'rows_per_sec': 5.0, 'phases': {'copy': 1.5}})
+
+    assert record['rejected'] == 0 and record['processes'] == 1
+    assert set(COUNTERS) <= set(record)
+    path = metrics.write_jsonl(str(tmp_path / 'metrics.jsonl'))
+    metrics.write_jsonl(path)
+    lines = [json.loads(line) for line in open(path)]
+    assert len(lines) == 2 and lines[0]['table'] == 'members' and lines[0]['inserted'] == 9
+
+
+def test_prometheus_text(tmp_path):
+    metrics = LoadMetrics('run_1', 'database_loader')
+    metrics.record('members', {'rows': 10, 'peak_rss_mb': 2.0, 'phases': {'copy': 1.5}})
+
+    text = metrics.prometheus_text()
+
+    assert '# TYPE fitness_load_rows gauge' in text
+    assert 'fitness_load_rows{loader="database_loader",table="members"} 10' in text
+    assert 'fitness_load_peak_rss_bytes{loader="database_loader",table="members"} 2097152' in text
+    assert 'fitness_load_phase_seconds{loader="database_loader",table="members",phase="copy"} 1.5' in text
+
+    path = tmp_path / 'load.prom'
+    metrics.write_prometheus(str(path))
+    assert path.read_text().startswith('# HELP fitness_load_rows')
+    assert [p.name for p in tmp_path.iterdir()] == ['load.prom']
+
+
+def test_format_phases_skips_phases_that_took_no_time():
+    assert format_phases({'parse': 1.234, 'encode': 0.001, 'copy': 2.0}) == 'parse 1.23s, copy 2.00s'
@@ -0,0 +1,64 @@
+"""
+Tests for member de-duplication
+
+Author: Fitness Center Analytics Team
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from member_match import MemberMatcher, block_pairs, connected_components, find_columns
+
+
+def members():
+    return pd.DataFrame({
+        'MemberID': ['M004', 'M001', 'M002', 'M003', 'M005'],
+        'FirstName': ['Ann', 'ann', 'Bob', 'Ann', 'Cy'],
+        'LastName': ['Lee', 'Lee', 'Stone', 'Lee-', 'Ray'],
+        'Email': ['ann@x.com', ' ANN@x.com', 'bob@x.com', '', 'cy@x.com'],
+        'Phone': ['(555) 123-4567', '+1 555 123 4567', '555-999-0000', '5551234567', ''],
+        'DateOfBirth': ['1990-05-01', '01-05-1990', '1980-01-01', '1990-05-01', '1970-01-01'],
+        'JoinDate': ['2024-01-01', '2023-06-01', '2023-01-01', '2024-02-01', '2023-01-01'],
+        'LastModified': ['2024-03-01', '2024-01-01', '2024-01-01', '2024-04-01', '2024-01-01'],
+        'Address': ['1 Old St', '', '2 Bob St', '9 New St', '3 Cy St'],
+    })
+
+
+def test_find_columns_requires_a_member_id():
+    assert find_columns(['MemberID', 'Email'])['member_id'] == 'MemberID'
+    with pytest.raises(ValueError):
+        find_columns(['Email'])
+
+
+def test_block_pairs_skips_oversized_blocks():
+    left, right, skipped = block_pairs(['a', 'b', 'a', None, 'c', 'c', 'c'], max_block_size=2)
+    assert list(zip(left, right)) == [(0, 2)] and skipped == 1
+
+
+def test_connected_components_labels_by_smallest_row():
+    labels = connected_components(6, np.array([4, 1, 2]), np.array([5, 4, 5]))
+    assert labels.tolist() == [0, 1, 1, 3, 1, 1]
+
+
+def test_match_merges_duplicates_into_golden_records():
+    result = MemberMatcher().match(members())
+
+    xref = result['xref'].set_index('member_id')
+    assert xref.loc[['M004', 'M001'], 'survivor_id'].tolist() == ['M001'] * 2
+    assert xref.loc[['M002', 'M003', 'M005'], 'is_survivor'].all()
+    assert xref.loc['M004', 'match_score'] == 1.0
+    assert result['duplicates'] == 1 and len(result['golden']) == 4
+
+    ann = result['golden'].set_index('MemberID').loc['M001']
+    # Most recently modified non-empty value wins
+    assert ann['Address'] == '1 Old St'
+    assert ann['Email'] == 'ann@x.com'
+
+
+def test_match_threshold():
+    # M003 has no email: phone, birth date and names score 0.65
+    loose = MemberMatcher(threshold=0.6).match(members())
+    assert loose['xref'].set_index('member_id').loc['M003', 'survivor_id'] == 'M001'
+    assert loose['duplicates'] == 2
+    assert loose['golden'].set_index('MemberID').loc['M001', 'Address'] == '9 New St'
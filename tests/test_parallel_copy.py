@@ -0,0 +1,53 @@
+"""
+Tests for splitting a CSV file into parallel COPY byte ranges
+
+Author: Fitness Center Analytics Team
+"""
+
+import io
+import mmap
+
+import pytest
+
+from parallel_copy import _MmapRange, split_byte_ranges
+
+CSV_TEXT = 'id,name\n' + ''.join(f'{i},name{i}\n' for i in range(1, 101))
+HEADER_END = len('id,name\n')
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'members.csv'
+    path.write_bytes(CSV_TEXT.encode())
+    return str(path)
+
+
+@pytest.mark.parametrize('parts', [1, 2, 3, 7, 100, 500])
+def test_split_byte_ranges_covers_every_data_line_once(csv_file, parts):
+    ranges = split_byte_ranges(csv_file, parts)
+    data = CSV_TEXT.encode()
+
+    assert 1 <= len(ranges) <= parts
+    assert ranges[0][0] == HEADER_END
+    assert ranges[-1][1] == len(data)
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+    for start, end in ranges:
+        assert data[end - 1:end] == b'\n'
+    assert b''.join(data[start:end] for start, end in ranges) == data[HEADER_END:]
+
+
+def test_split_byte_ranges_of_header_only_and_empty_files(tmp_path):
+    header = tmp_path / 'header.csv'
+    header.write_bytes(b'id,name\n')
+    empty = tmp_path / 'empty.csv'
+    empty.write_bytes(b'')
+    assert split_byte_ranges(str(header), 4) == []
+    assert split_byte_ranges(str(empty), 4) == []
+
+
+def test_mmap_range_reads_only_its_range(csv_file):
+    start, end = split_byte_ranges(csv_file, 3)[1]
+    with open(csv_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = io.BufferedReader(_MmapRange(mm, start, end), buffer_size=7).read()
+    assert data == CSV_TEXT.encode()[start:end]
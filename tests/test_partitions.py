@@ -0,0 +1,92 @@
+"""
+Tests for the monthly partition helpers
+
+Author: Fitness Center Analytics Team
+"""
+
+import pandas as pd
+import pytest
+
+from partitions import PartitionManager, PeriodFilter, month_bounds, months_in, parse_month, partition_name
+
+
+class CatalogCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.connection.queries += 1
+
+    def fetchone(self):
+        return self.connection.rows[0] if self.connection.rows else None
+
+    def fetchall(self):
+        return self.connection.rows
+
+
+class CatalogConnection:
+    """Answers every catalog query with the same rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def cursor(self):
+        return CatalogCursor(self)
+
+
+def test_parse_month():
+    assert parse_month('2024-02') == pd.Period('2024-02', freq='M')
+    for text in ('2024-2', '2024-02-01', '', None):
+        with pytest.raises(ValueError):
+            parse_month(text)
+
+
+def test_month_bounds_and_partition_name():
+    assert month_bounds(parse_month('2024-02')) == ('2024-02-01', '2024-03-01')
+    assert month_bounds(parse_month('2024-12')) == ('2024-12-01', '2025-01-01')
+    assert partition_name('memberaccess', parse_month('2024-02')) == 'memberaccess_p202402'
+
+
+def test_months_in_ignores_unparseable_dates():
+    values = pd.Series(['2024-01-31 23:59:59', '2024-02-01', '', None, 'not a date', '2024-01-01'])
+    assert months_in(values) == {parse_month('2024-01'), parse_month('2024-02')}
+
+
+def test_period_filter_keeps_one_month():
+    keep = PeriodFilter('accessdate', parse_month('2024-02'))
+    df = pd.DataFrame({'accessdate': ['2024-01-31 23:59:59', '2024-02-01 00:00:00',
+                                      '2024-02-29 23:59:59', '2024-03-01', None]})
+
+    assert keep(df)['accessdate'].tolist() == ['2024-02-01 00:00:00', '2024-02-29 23:59:59']
+    assert (keep.rows_seen, keep.rows_kept) == (5, 2)
+
+
+def test_partitions_only_lists_monthly_bounds():
+    connection = CatalogConnection([
+        ('memberaccess_p202401', "FOR VALUES FROM ('2024-01-01') TO ('2024-02-01')"),
+        ('memberaccess_p202402', "FOR VALUES FROM ('2024-02-01 00:00:00') TO ('2024-03-01 00:00:00')"),
+        ('memberaccess_q1', "FOR VALUES FROM ('2023-01-01') TO ('2023-04-01')"),
+        ('memberaccess_default', 'DEFAULT'),
+    ])
+
+    assert PartitionManager(connection).partitions('memberaccess') == {
+        parse_month('2024-01'): 'memberaccess_p202401',
+        parse_month('2024-02'): 'memberaccess_p202402',
+    }
+
+
+def test_partition_key_is_cached():
+    connection = CatalogConnection([('accessdate',)])
+    manager = PartitionManager(connection)
+    assert manager.partition_key('memberaccess') == 'accessdate'
+    assert manager.partition_key('memberaccess') == 'accessdate'
+    assert connection.queries == 1
+
+    assert PartitionManager(CatalogConnection([])).partition_key('members') is None
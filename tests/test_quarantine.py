@@ -0,0 +1,142 @@
+"""
+Tests for vectorized chunk validation and bad-record files
+
+Author: Fitness Center Analytics Team
+"""
+
+import pandas as pd
+
+from quarantine import (REASON_COLUMN, ChunkValidator, QuarantineFilter, RejectWriter,
+                        parse_schema_constraints)
+
+
+class ParentConnection:
+    """Answers the parent key queries of ChunkValidator from a dict"""
+
+    def __init__(self, parents):
+        self.parents = parents
+        self.queries = 0
+
+    def cursor(self):
+        return ParentCursor(self)
+
+
+class ParentCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.connection.queries += 1
+        self.rows = self.connection.parents[sql.split(' FROM ')[1].strip()]
+
+    def fetchall(self):
+        return self.rows
+
+
+AREA_CONSTRAINTS = {
+    'columns': {
+        'areaid': ('VARCHAR', 5, None, 0, True),
+        'facilityid': ('VARCHAR', 20, None, 0, True),
+        'capacity': ('INT', None, None, 0, False),
+        'areatype': ('VARCHAR', 20, None, 0, False),
+        'rating': ('DECIMAL', None, 3, 1, False),
+        'opened': ('DATE', None, None, 0, False),
+        'active': ('BOOLEAN', None, None, 0, False),
+    },
+    'enums': {'areatype': {'Studio', 'Pool'}},
+    'ranges': {'rating': (0, 5)},
+    'foreign_keys': [(['facilityid'], 'facilities', ['facilityid'])],
+}
+
+
+def area_rows(**overrides):
+    row = {'areaid': 'A1', 'facilityid': 'F1', 'capacity': 10, 'areatype': 'Studio',
+           'rating': 4.5, 'opened': '2024-01-01', 'active': 'true'}
+    row.update(overrides)
+    return row
+
+
+def test_chunk_validator_flags_every_broken_constraint():
+    connection = ParentConnection({'facilities': [('F1',), ('F2',)]})
+    validator = ChunkValidator('facilityareas', AREA_CONSTRAINTS, connection)
+    chunk = pd.DataFrame([
+        area_rows(),
+        area_rows(areaid=None),
+        area_rows(capacity=2.5),
+        area_rows(areaid='TOOLONG'),
+        area_rows(facilityid='F9'),
+        area_rows(areatype='Gym', rating=7),
+        area_rows(opened='not a date', active='maybe'),
+        area_rows(facilityid='F2', areatype=None, capacity=None),
+    ])
+
+    valid, rejected = validator.validate(chunk)
+
+    assert len(valid) == 2 and valid['facilityid'].tolist() == ['F1', 'F2']
+    assert rejected[REASON_COLUMN].tolist() == [
+        'areaid: NULL not allowed',
+        'capacity: invalid int',
+        'areaid: invalid varchar',
+        'facilityid: no matching facilities',
+        'areatype: value not allowed by CHECK; rating: outside 0..5',
+        'opened: invalid date; active: invalid boolean',
+    ]
+    # Parent keys are fetched once per parent table
+    validator.validate(chunk)
+    assert connection.queries == 1
+
+
+def test_chunk_validator_without_a_connection_skips_foreign_keys():
+    valid, rejected = ChunkValidator('facilityareas', AREA_CONSTRAINTS).validate(
+        pd.DataFrame([area_rows(facilityid='F9')]))
+    assert len(valid) == 1 and rejected.empty
+    assert REASON_COLUMN in rejected.columns
+
+
+def test_quarantine_filter_writes_rejects_and_reports_them(tmp_path):
+    reported = []
+    writer = RejectWriter(str(tmp_path), 'run_1', 'facilityareas', reported.append)
+    screen = QuarantineFilter(ChunkValidator('facilityareas', AREA_CONSTRAINTS), writer)
+
+    valid = screen(pd.DataFrame([area_rows(), area_rows(areaid=None)]))
+    screen(pd.DataFrame([area_rows(capacity='x')]))
+
+    assert valid['areaid'].tolist() == ['A1']
+    assert writer.rows == 2
+    assert [len(rows) for rows in reported] == [1, 1]
+    assert writer.path.endswith('run_1-facilityareas-badrecords.csv')
+    written = pd.read_csv(writer.path)
+    assert written[REASON_COLUMN].tolist() == ['areaid: NULL not allowed', 'capacity: invalid int']
+
+
+def test_quarantine_filter_validates_only_rows_the_transform_keeps(tmp_path):
+    writer = RejectWriter(str(tmp_path), 'run_1', 'facilityareas')
+    seen = []
+
+    def delta(df):
+        seen.append(len(df))
+        return df[df['areaid'] != 'OLD']
+
+    screen = QuarantineFilter(ChunkValidator('facilityareas', AREA_CONSTRAINTS), writer, delta)
+    valid = screen(pd.DataFrame([area_rows(), area_rows(areaid='OLD', capacity='x'),
+                                 area_rows(areaid='A2', rating=9)]))
+
+    # The unchanged bad row is dropped by the transform, not quarantined
+    assert seen == [3]
+    assert valid['areaid'].tolist() == ['A1']
+    assert writer.rows == 1
+    assert pd.read_csv(writer.path)['areaid'].tolist() == ['A2']
+
+
+def test_parse_schema_constraints_reads_the_ods_schema():
+    equipment = parse_schema_constraints()['equipment']
+    assert equipment['columns']['equipmentid'] == ('VARCHAR', 20, None, 0, True)
+    assert "Jacob's Ladder" in equipment['enums']['equipmenttype']
+    assert (['facilityid'], 'facilities', ['facilityid']) in equipment['foreign_keys']
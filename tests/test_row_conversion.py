@@ -0,0 +1,89 @@
+"""
+Tests for column-wise row conversion
+
+Author: Fitness Center Analytics Team
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from row_conversion import SchemaCoercer, convert_column, dataframe_to_rows
+from copy_engine import NULL_MARKER
+
+
+def row_loop(df):
+    """The per-cell conversion convert_column replaced"""
+    rows = []
+    for _, row in df.iterrows():
+        values = []
+        for value in row:
+            if pd.isna(value):
+                values.append(None)
+            elif hasattr(value, 'isoformat'):
+                values.append(value.isoformat())
+            else:
+                values.append(value)
+        rows.append(tuple(values))
+    return rows
+
+
+def test_convert_column_matches_row_loop():
+    df = pd.DataFrame({
+        'id': [1, 2, 3],
+        'price': [1.5, np.nan, 3.0],
+        'name': ['a', None, 'c'],
+        'seen': pd.to_datetime(['2024-01-02 03:04:05', None, '2024-01-02 03:04:05.500000'],
+                               format='ISO8601'),
+    })
+    assert dataframe_to_rows(df) == row_loop(df)
+
+
+def test_convert_column_returns_native_values():
+    values = convert_column(pd.Series([1, 2], dtype='int64'))
+    assert [type(value) for value in values] == [int, int]
+    assert list(convert_column(pd.Series([True, False]))) == [True, False]
+
+
+def test_dataframe_to_rows_without_columns():
+    assert dataframe_to_rows(pd.DataFrame(index=range(2))) == [(), ()]
+
+
+def test_convert_column_uses_null_marker():
+    values = convert_column(pd.Series([1.0, np.nan]), null=NULL_MARKER)
+    assert list(values) == [1.0, NULL_MARKER]
+    dates = convert_column(pd.Series(pd.to_datetime(['2024-01-01', None])), null=NULL_MARKER)
+    assert list(dates) == ['2024-01-01T00:00:00', NULL_MARKER]
+
+
+def test_schema_coercer_converts_by_column_type():
+    df = pd.DataFrame({
+        'visits': [4.0, np.nan, 3.0],
+        'amount': ['1.50', '2', None],
+        'joined': ['2024-01-02', 'not a date', None],
+        'opens': ['06:00:00', '', None],
+        'name': ['Ann', None, 'Cy'],
+        'extra': [None, 'x', 'y'],
+    })
+    coerce = SchemaCoercer({'visits': 'integer', 'amount': 'numeric', 'joined': 'date',
+                            'opens': 'time without time zone', 'name': 'character varying'})
+
+    result = coerce(df)
+
+    assert str(result['visits'].dtype) == 'Int64' and result['visits'].tolist()[::2] == [4, 3]
+    assert result['amount'].tolist()[:2] == [1.5, 2.0] and pd.isna(result['amount'][2])
+    assert result['joined'][0] == pd.Timestamp('2024-01-02') and result['joined'][1:].isna().all()
+    assert result['opens'][0] == '06:00:00' and result['opens'][1:].isna().all()
+    assert result['name'].tolist() == ['Ann', '', 'Cy']
+    assert result['extra'].equals(df['extra'])
+    # The caller's frame is left alone
+    assert df['visits'].dtype == np.float64 and pd.isna(df['name'][1])
+
+
+def test_schema_coercer_truncates_integers_and_pickles():
+    coerce = pickle.loads(pickle.dumps(SchemaCoercer({'visits': 'bigint'})))
+    visits = coerce(pd.DataFrame({'visits': ['7', '', None]}))['visits']
+    assert visits[0] == 7 and visits.isna().tolist() == [False, True, True]
+    assert coerce.coerce(pd.Series([2.0, 5.0]), 'smallint').tolist() == [2, 5]
+    assert coerce.coerce(pd.Series(['a']), 'jsonb').tolist() == ['a']
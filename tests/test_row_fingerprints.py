@@ -0,0 +1,89 @@
+"""
+Tests for row fingerprints and the changed-rows filter
+
+Author: Fitness Center Analytics Team
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from copy_engine import NULL_MARKER
+from row_fingerprints import ChangeFilter, canonical_text, natural_keys, row_fingerprints
+
+
+def fingerprints(rows, key_columns=('id',)):
+    return pd.Series(row_fingerprints(rows, list(key_columns)),
+                     index=pd.Index(natural_keys(rows, list(key_columns))))
+
+
+def test_row_fingerprints_ignore_key_and_volatile_columns():
+    a = pd.DataFrame({'id': [1], 'name': ['x'], 'lastmodified': ['2024-01-01']})
+    b = pd.DataFrame({'id': [2], 'name': ['x'], 'lastmodified': ['2025-01-01']})
+    c = pd.DataFrame({'id': [1], 'name': ['y'], 'lastmodified': ['2024-01-01']})
+    assert row_fingerprints(a, ['id'])[0] == row_fingerprints(b, ['id'])[0]
+    assert row_fingerprints(a, ['id'])[0] != row_fingerprints(c, ['id'])[0]
+
+
+def test_canonical_text_follows_the_declared_type():
+    assert list(canonical_text(pd.Series([30.0, np.nan, 2.5]), 'integer')) == ['30', NULL_MARKER, '2.5']
+    assert list(canonical_text(pd.Series(['30.0', '', None]), 'numeric')) == ['30', NULL_MARKER, NULL_MARKER]
+    assert list(canonical_text(pd.Series(['t', 'FALSE']), 'boolean')) == ['true', 'false']
+    assert list(canonical_text(pd.Series([True, False]))) == ['true', 'false']
+    assert list(canonical_text(pd.Series(['2024-01-02 00:00:00', '2024-01-02']), 'date')) == ['2024-01-02'] * 2
+    assert list(canonical_text(pd.Series(['x', np.nan]), 'text')) == ['x', NULL_MARKER]
+
+
+def test_row_fingerprints_do_not_depend_on_the_inferred_dtype():
+    types = {'age': 'integer', 'joined': 'timestamp without time zone', 'name': 'text'}
+    csv = 'id,age,joined,name\n1,30,2024-01-02,x\n2,,2024-01-02 10:00:00,\n'
+    inferred = pd.read_csv(io.StringIO(csv))
+    as_text = pd.read_csv(io.StringIO(csv), dtype=str)
+    # A NaN elsewhere in a chunk turns 30 into 30.0
+    as_float = inferred.assign(age=[30.0, np.nan], name=pd.array(['x', pd.NA], dtype='string'))
+
+    expected = row_fingerprints(as_text, ['id'], types)
+    assert (row_fingerprints(inferred, ['id'], types) == expected).all()
+    assert (row_fingerprints(as_float, ['id'], types) == expected).all()
+
+
+def test_natural_keys_join_composite_keys():
+    df = pd.DataFrame({'facility': ['F1', 'F2'], 'area': [1, 2]})
+    assert list(natural_keys(df, ['facility', 'area'])) == ['F1|1', 'F2|2']
+
+
+def test_change_filter_keeps_new_and_changed_rows():
+    stored = fingerprints(pd.DataFrame({'id': [1, 2], 'name': ['a', 'b']}))
+
+    changes = ChangeFilter(['id'], stored)
+    kept = changes(pd.DataFrame({'id': [1, 2, 3], 'name': ['a', 'B', 'c']}))
+
+    assert kept['id'].tolist() == [2, 3]
+    assert (changes.inserted, changes.updated, changes.unchanged) == (1, 1, 1)
+    saved = changes.changed_fingerprints('members')
+    assert saved['natural_key'].tolist() == ['2', '3']
+    assert set(saved['table_name']) == {'members'}
+
+
+def test_change_filter_on_first_load_keeps_everything():
+    changes = ChangeFilter(['id'], pd.Series([], dtype='i8'))
+    kept = changes(pd.DataFrame({'id': [1, 2], 'name': ['a', 'b']}))
+    assert len(kept) == 2 and changes.inserted == 2
+    assert ChangeFilter(['id'], pd.Series([], dtype='i8')).changed_fingerprints('members').empty
+
+
+def test_change_filter_does_not_save_rejected_rows():
+    changes = ChangeFilter(['id'], pd.Series([], dtype='i8'))
+    kept = changes(pd.DataFrame({'id': [1, 2, 3], 'name': ['a', 'b', 'c']}))
+    changes.reject(kept[kept['id'] == 2])
+    assert changes.changed_fingerprints('members')['natural_key'].tolist() == ['1', '3']
+
+
+def test_change_filter_ignores_dtype_only_differences():
+    types = {'visits': 'integer'}
+    stored = fingerprints(pd.DataFrame({'id': [1, 2], 'visits': ['4', '5']}))
+    changes = ChangeFilter(['id'], stored, types)
+    kept = changes(pd.DataFrame({'id': [1, 2, 3], 'visits': [4.0, 6.0, np.nan]}))
+    assert kept['id'].tolist() == [2, 3]
+    assert (changes.inserted, changes.updated, changes.unchanged) == (1, 1, 1)
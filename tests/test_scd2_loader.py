@@ -0,0 +1,76 @@
+"""
+Tests for the SCD Type 2 membership diff
+
+Author: Fitness Center Analytics Team
+"""
+
+import pandas as pd
+
+from scd2_loader import MembershipSCD2Loader
+
+
+def snapshot(rows):
+    df = pd.DataFrame(rows, columns=['member_id', 'membership_type', 'join_date', 'last_modified'])
+    for col in ('join_date', 'last_modified'):
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def current(rows):
+    df = pd.DataFrame(rows, columns=['member_id', 'effective_date', 'membership_type'])
+    df['effective_date'] = pd.to_datetime(df['effective_date'])
+    return df
+
+
+def test_read_snapshot_keeps_the_latest_row_per_member(tmp_path):
+    path = tmp_path / 'members-run_1.csv'
+    path.write_text('member_id,membership_type,join_date,last_modified\n'
+                    'M1,Basic,01-12-2023,01-02-2024\n'
+                    'M1,Premium,01-12-2023,15-02-2024\n'
+                    'M2,Basic,bad,\n')
+
+    df = MembershipSCD2Loader(None).read_snapshot(str(path))
+
+    assert df['member_id'].tolist() == ['M1', 'M2']
+    assert df.loc[0, 'membership_type'] == 'Premium'
+    assert df.loc[0, 'last_modified'] == pd.Timestamp('2024-02-15')
+    assert df.loc[1, ['join_date', 'last_modified']].isna().all()
+
+
+def test_compute_changes_finds_new_and_changed_members():
+    loader = MembershipSCD2Loader(None)
+    stored = current([
+        ('M1', '2024-01-01', 'Basic'),
+        ('M2', '2024-01-01', 'Basic'),
+        ('M3', '2024-03-01', 'Basic'),
+    ])
+    incoming = snapshot([
+        ('M1', 'Basic', '2023-12-01', '2024-02-01'),
+        ('M2', 'Premium', '2023-12-01', '2024-02-15'),
+        ('M3', 'Premium', '2023-12-01', '2024-02-01'),
+        ('M4', 'Basic', '2024-02-20', None),
+        ('M5', 'Premium', None, None),
+    ])
+
+    changes, unchanged = loader.compute_changes(incoming, stored, run_date='2024-04-01')
+
+    assert unchanged == 1
+    assert changes.to_dict('records') == [
+        {'member_id': 'M2', 'membership_type': 'Premium',
+         'effective_date': '2024-02-15', 'action': 'change'},
+        # Changed before its current version started: starts the day after it
+        {'member_id': 'M3', 'membership_type': 'Premium',
+         'effective_date': '2024-03-02', 'action': 'change'},
+        {'member_id': 'M4', 'membership_type': 'Basic',
+         'effective_date': '2024-02-20', 'action': 'insert'},
+        {'member_id': 'M5', 'membership_type': 'Premium',
+         'effective_date': '2024-04-01', 'action': 'insert'},
+    ]
+
+
+def test_compute_changes_against_an_empty_dimension():
+    changes, unchanged = MembershipSCD2Loader(None).compute_changes(
+        snapshot([('M1', None, '2024-01-05', '2024-02-01')]), current([]), run_date='2024-04-01')
+    assert unchanged == 0
+    assert changes[['member_id', 'effective_date', 'action']].values.tolist() == [
+        ['M1', '2024-01-05', 'insert']]
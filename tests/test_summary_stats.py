@@ -0,0 +1,109 @@
+"""
+Tests for the statistics-based summary counts and date ranges
+
+Author: Fitness Center Analytics Team
+"""
+
+from summary_stats import TableSummary, format_count, format_range
+
+
+class StatsCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.connection.executed.append(sql)
+        self.rows = self.connection.answer(sql, params)
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0]
+
+
+class StatsConnection:
+    """Answers queries with ``answer(sql, params)``, which may raise"""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.executed = []
+
+    def cursor(self):
+        return StatsCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def test_row_counts_prefers_loaded_counts_over_estimates():
+    def answer(sql, params):
+        assert params == (['facilities', 'missing'],)
+        return [('facilities', 40)]
+
+    summary = TableSummary(StatsConnection(answer), None, workers=1)
+    counts = summary.row_counts(['members', 'facilities', 'missing'], loaded={'members': 1200})
+
+    assert counts == {'members': (1200, 'loaded'), 'facilities': (40, 'estimate'), 'missing': (None, 'estimate')}
+    assert list(counts) == ['members', 'facilities', 'missing']
+
+
+def test_exact_row_counts_report_failed_queries():
+    def answer(sql, params):
+        if 'missing' in sql:
+            raise RuntimeError('relation "missing" does not exist')
+        return [(7,)]
+
+    summary = TableSummary(StatsConnection(answer), None, workers=1)
+    assert summary.row_counts(['members', 'missing'], exact=True) == {
+        'members': (7, 'exact'), 'missing': (None, 'error')}
+
+
+def test_date_ranges_use_the_cheapest_source():
+    def answer(sql, params):
+        table = params[0] if params else None
+        if 'FROM pg_index' in sql:
+            return [(1,)] if table == 'memberaccess' else []
+        if 'pg_partitioned_table' in sql:
+            if table != 'memberpayments':
+                return []
+            return [("FOR VALUES FROM ('2024-01-01') TO ('2024-02-01')", 10),
+                    ("FOR VALUES FROM ('2024-02-01') TO ('2024-03-01')", 5),
+                    ("FOR VALUES FROM ('2024-03-01') TO ('2024-04-01')", 0)]
+        if 'pg_stats' in sql:
+            return [('2023-05-01', '2024-06-30')] if table == 'classenrollments' else []
+        return [('2024-01-02 06:00:00', '2024-03-31 22:15:00')]
+
+    summary = TableSummary(StatsConnection(answer), None, workers=1)
+    ranges = summary.date_ranges([('memberaccess', 'checkintime'), ('memberpayments', 'paymentdate'),
+                                  ('classenrollments', 'enrollmentdate'), ('members', 'joindate')])
+
+    assert ranges == {
+        ('memberaccess', 'checkintime'): ('2024-01-02 06:00:00', '2024-03-31 22:15:00', 'index'),
+        ('memberpayments', 'paymentdate'): ('2024-01-01', '2024-03-01', 'partitions'),
+        ('classenrollments', 'enrollmentdate'): ('2023-05-01', '2024-06-30', 'statistics'),
+        ('members', 'joindate'): (None, None, 'unavailable'),
+    }
+
+
+def test_format_count():
+    assert format_count(1234567, 'estimate') == '~1,234,567'
+    assert format_count(1234567, 'loaded') == '1,234,567'
+    assert format_count(None, 'error') == 'n/a'
+
+
+def test_format_range():
+    assert format_range('2024-01-01', '2024-03-01', 'partitions') == '2024-01-01 to before 2024-03-01 (partition bounds)'
+    assert format_range('2024-01-01', '2024-02-28', 'statistics') == '~2024-01-01 to ~2024-02-28 (statistics)'
+    assert format_range('2024-01-01', '2024-02-28', 'index') == '2024-01-01 to 2024-02-28'
+    assert format_range(None, None, 'unavailable') == 'n/a'
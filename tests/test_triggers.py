@@ -0,0 +1,198 @@
+"""
+Tests for trigger file discovery, run processing and the geography change files
+
+Author: Fitness Center Analytics Team
+"""
+
+import os
+
+import pytest
+
+from geography_merge import GeographyMerge, find_run_files, read_changes
+from trigger_watcher import InotifyWatch, TriggerWatcher
+
+
+class PooledConnection:
+    closed = 0
+
+    def __init__(self):
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class SingleConnectionPool:
+    def __init__(self):
+        self.connection = PooledConnection()
+
+    def getconn(self):
+        return self.connection
+
+    def putconn(self, connection, close=False):
+        pass
+
+
+@pytest.fixture
+def loads_dir(tmp_path):
+    trigger = tmp_path / 'trigger'
+    trigger.mkdir()
+    for name in ('ctrl-run_20.csv', 'ctrl-run_20refresh.csv', 'ctrl-run_20geography-update.csv',
+                 'ctrl-run_20geography-insert.csv', 'ctrl-run_3.csv', 'ctrl-run_3refresh.csv',
+                 'ctrl-run_3unknown.csv', 'notes.txt'):
+        (trigger / name).write_text('x\n')
+    return tmp_path
+
+
+def watcher(loads_dir, **kwargs):
+    return TriggerWatcher('postgresql://unused', loads_dir=str(loads_dir), use_inotify=False, **kwargs)
+
+
+def test_scan_groups_handled_files_by_run_in_epoch_order(loads_dir):
+    handlers = {'refresh': lambda connection, run_id, path: None}
+    runs = watcher(loads_dir, handlers=handlers).scan()
+
+    trigger = os.path.join(str(loads_dir), 'trigger')
+    assert list(runs) == ['run_3', 'run_20']
+    assert runs['run_3'] == [('control', os.path.join(trigger, 'ctrl-run_3.csv')),
+                             ('refresh', os.path.join(trigger, 'ctrl-run_3refresh.csv'))]
+    assert [kind for kind, _ in runs['run_20']] == ['control', 'geography-insert', 'geography-update', 'refresh']
+
+
+def test_scan_leaves_files_without_a_handler(loads_dir):
+    runs = watcher(loads_dir).scan()
+    assert [kind for kind, _ in runs['run_3']] == ['control']
+    assert os.path.exists(os.path.join(str(loads_dir), 'trigger', 'ctrl-run_3unknown.csv'))
+
+
+def test_stage_of(loads_dir):
+    stages = {'rollup': lambda connection, run_id, paths: None}
+    trigger_watcher = watcher(loads_dir, stages=stages)
+    assert trigger_watcher.stage_of('geography-insert') == 'geography'
+    assert trigger_watcher.stage_of('rollup-update') == 'rollup'
+    assert trigger_watcher.stage_of('geography') is None
+    assert trigger_watcher.stage_of('other-insert') is None
+
+
+def test_settled(loads_dir):
+    trigger_watcher = watcher(loads_dir, settle_seconds=5)
+    files = trigger_watcher.scan()['run_3']
+    newest = max(os.stat(path).st_mtime for _, path in files)
+    assert not trigger_watcher.settled(files, now=newest + 1)
+    assert trigger_watcher.settled(files, now=newest + 5)
+    assert not trigger_watcher.settled([('control', str(loads_dir / 'missing.csv'))])
+
+
+def test_process_run_archives_handled_runs(loads_dir):
+    seen = []
+    handler = lambda connection, run_id, path: seen.append((run_id, os.path.basename(path)))
+    trigger_watcher = watcher(loads_dir, handlers={'control': handler, 'refresh': handler})
+    trigger_watcher.pool = SingleConnectionPool()
+
+    assert trigger_watcher.process_run('run_3', trigger_watcher.scan()['run_3'])
+
+    assert seen == [('run_3', 'ctrl-run_3.csv'), ('run_3', 'ctrl-run_3refresh.csv')]
+    # One transaction per run
+    assert trigger_watcher.pool.connection.commits == 1
+    assert sorted(os.listdir(loads_dir / 'archive')) == ['ctrl-run_3.csv', 'ctrl-run_3refresh.csv']
+
+
+def test_process_run_calls_a_stage_once_with_all_its_files(loads_dir):
+    calls = []
+    trigger_watcher = watcher(loads_dir, handlers={'control': lambda *args: None, 'refresh': lambda *args: None},
+                              stages={'geography': lambda connection, run_id, paths: calls.append(paths)})
+    trigger_watcher.pool = SingleConnectionPool()
+
+    assert trigger_watcher.process_run('run_20', trigger_watcher.scan()['run_20'])
+
+    trigger = str(loads_dir / 'trigger')
+    assert calls == [{'insert': os.path.join(trigger, 'ctrl-run_20geography-insert.csv'),
+                      'update': os.path.join(trigger, 'ctrl-run_20geography-update.csv')}]
+    assert trigger_watcher.pool.connection.commits == 1
+
+
+def test_process_run_moves_failed_runs_to_error(loads_dir):
+    def fail(connection, run_id, path):
+        raise ValueError('run_20 is not complete')
+
+    trigger_watcher = watcher(loads_dir, handlers={'control': lambda *args: None, 'refresh': fail},
+                              stages={'geography': lambda *args: None})
+    trigger_watcher.pool = SingleConnectionPool()
+
+    assert not trigger_watcher.process_run('run_20', trigger_watcher.scan()['run_20'])
+    # The handlers that succeeded are rolled back with the failed one
+    assert trigger_watcher.pool.connection.commits == 0
+    assert sorted(os.listdir(loads_dir / 'error')) == [
+        'ctrl-run_20.csv', 'ctrl-run_20geography-insert.csv', 'ctrl-run_20geography-update.csv',
+        'ctrl-run_20refresh.csv']
+    assert not (loads_dir / 'archive').exists()
+
+
+def test_inotify_watch_wakes_on_new_files(tmp_path):
+    try:
+        watch = InotifyWatch(str(tmp_path))
+    except OSError:
+        pytest.skip('inotify is not available')
+    try:
+        assert not watch.wait(0)
+        (tmp_path / 'ctrl-run_1.csv').write_text('x\n')
+        assert watch.wait(1)
+    finally:
+        watch.close()
+
+
+def test_read_changes_splits_rows_by_entity(tmp_path):
+    path = tmp_path / 'ctrl-run_20geography-insert.csv'
+    path.write_text('run_20;facility;F1;"Main; North";Atlanta\n'
+                    'run_20;facilityareas;F1;A1;Studio\n'
+                    'run_20;geography;true\n'
+                    '\n'
+                    'run_20;facility;F2;South;\n', encoding='utf-8')
+
+    rows, other = read_changes(str(path))
+
+    assert rows == {'facility': [['F1', 'Main; North', 'Atlanta'], ['F2', 'South', '']],
+                    'facilityareas': [['F1', 'A1', 'Studio']]}
+    assert other == 1
+
+
+def test_frame_orders_changes_and_checks_their_width():
+    class ColumnCursor:
+        def execute(self, sql, params=None):
+            pass
+
+        def fetchall(self):
+            return [('facilityid',), ('name',), ('city',)]
+
+    merge = GeographyMerge(None)
+    df = merge.frame(ColumnCursor(), 'facilities', [('insert', [['F1', 'Main', '']]),
+                                                    ('update', [['F1', 'Main North', 'Atlanta']])])
+    assert df['name'].tolist() == ['Main', 'Main North']
+    assert df['city'].isna().tolist() == [True, False]
+
+    with pytest.raises(ValueError, match='facilities update row 1: expected 3 columns, got 2'):
+        merge.frame(ColumnCursor(), 'facilities', [('update', [['F1', 'Main']])])
+
+
+def test_find_run_files(loads_dir):
+    trigger = os.path.join(str(loads_dir), 'trigger')
+    assert find_run_files(trigger, 'run_20') == {
+        'insert': os.path.join(trigger, 'ctrl-run_20geography-insert.csv'),
+        'update': os.path.join(trigger, 'ctrl-run_20geography-update.csv'),
+    }
+    assert find_run_files(trigger, 'run_2') == {}